@@ -0,0 +1,59 @@
+"""Defines vectorized encoders for commanding many bionic motors at once.
+
+The encoders apply the same clamping and quantization as the scalar builders
+in `commands.py`, element-wise with NumPy, and are bit-exact with them.
+"""
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+DEG_TO_RAD = np.pi / 180.0
+
+
+def _truncate(values: np.ndarray) -> np.ndarray:
+    # Matches `int()` on floats, which rounds towards zero.
+    return np.trunc(values).astype(np.int64)
+
+
+def force_position_hybrid_control_batch(
+    kp: ArrayLike,
+    kd: ArrayLike,
+    position: ArrayLike,
+    speed: ArrayLike,
+    torque_ff: ArrayLike,
+) -> np.ndarray:
+    """Gets the force position hybrid control commands for many motors.
+
+    The arguments are broadcast against each other, so the gains can be
+    scalars shared by every motor.
+
+    Args:
+        kp: The proportional gains.
+        kd: The derivative gains.
+        position: The positions to set the motors to, in degrees.
+        speed: The speeds to set the motors to, in rpm.
+        torque_ff: The feedforward torques in Nm.
+
+    Returns:
+        An (N, 8) uint8 array with one command payload per row, identical to
+        the output of `force_position_hybrid_control` for each motor.
+    """
+    kp_arr, kd_arr, position_arr, speed_arr, torque_arr = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(values, dtype=np.float64)) for values in (kp, kd, position, speed, torque_ff))
+    )
+
+    kp_int = _truncate(kp_arr * 4095 / 500) & 0xFFF
+    kd_int = _truncate(kd_arr * 511 / 5) & 0x1FF
+    # Clamping the truncated floats is equivalent to clamping the truncated ints, and avoids overflow.
+    position_int = np.clip(np.trunc(((position_arr * DEG_TO_RAD + 12.5) / 25.0) * 65536), 0, 65536).astype(np.int64)
+    speed_int = np.clip(np.trunc(((speed_arr + 18.0) / 36.0) * 4095), 0, 4095).astype(np.int64)
+    torque_int = np.clip(np.trunc(((torque_arr + 150) / 300) * 4095), 0, 4095).astype(np.int64)
+
+    command = (
+        (kp_int.astype(np.uint64) << np.uint64(49))
+        | (kd_int.astype(np.uint64) << np.uint64(40))
+        | ((position_int & 0xFFFF).astype(np.uint64) << np.uint64(24))
+        | (speed_int.astype(np.uint64) << np.uint64(12))
+        | torque_int.astype(np.uint64)
+    )
+    return command.ravel().astype(">u8").view(np.uint8).reshape(-1, 8)
@@ -0,0 +1,108 @@
+"""Defines a broadcast-then-gather state query for many bionic motors.
+
+Instead of querying each motor and waiting for its reply in turn, every
+position and speed request for a bus is sent back-to-back and all of the
+replies are collected from the bus mailbox in a single read window, which
+closes as soon as the last reply has arrived. Motors whose automatic replies
+have recently refreshed their state since the last command are not queried.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from firmware.bionic_motors.mailbox import QUERY_ANGLE, QUERY_SPEED, MailboxKey, ResponseMailbox
+from firmware.bionic_motors.motors import DEFAULT_MAX_AGE, BionicMotor
+
+
+@dataclass
+class MotorStateSnapshot:
+    positions: Dict[int, float] = field(default_factory=dict)
+    speeds: Dict[int, float] = field(default_factory=dict)
+    missing: List[int] = field(default_factory=list)
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing
+
+
+def query_states(
+    motors: Sequence[BionicMotor], wait_time: Optional[float] = None, max_age: float = DEFAULT_MAX_AGE
+) -> MotorStateSnapshot:
+    """Queries the position and speed of many motors in one read window.
+
+    Motors whose bus has no mailbox fall back to the per-motor queries. The
+    `position` and `speed` attributes of every motor that answered are updated
+    as a side effect.
+
+    Args:
+        motors: The motors to query, possibly spread across several buses.
+        wait_time: The maximum time to wait for the replies after the last
+            request has been sent, in seconds. Defaults to the largest timeout
+            derived from the round-trip times of the queried motors.
+        max_age: The maximum age of the state from automatic replies for a
+            motor not to be queried, in seconds.
+
+    Returns:
+        The state snapshot, including the IDs of motors which did not reply
+        to one of the queries.
+    """
+    snapshot = MotorStateSnapshot()
+    pending: List[Tuple[BionicMotor, int, int, float]] = []
+
+    for motor in motors:
+        if motor.position_fresh(max_age) and motor.speed_fresh(max_age):
+            snapshot.positions[motor.motor_id] = motor.position
+            snapshot.speeds[motor.motor_id] = motor.speed
+            continue
+        mailbox = motor.communication_interface.mailbox
+        if mailbox is None:
+            motor.update_position(wait_time)
+            motor.update_speed(wait_time)
+            snapshot.positions[motor.motor_id] = motor.position
+            snapshot.speeds[motor.motor_id] = motor.speed
+            continue
+        since_position = mailbox.count(motor.motor_id, QUERY_ANGLE)
+        since_speed = mailbox.count(motor.motor_id, QUERY_SPEED)
+        sent_at = time.monotonic()
+        motor.request_position()
+        motor.request_speed()
+        pending.append((motor, since_position, since_speed, sent_at))
+
+    if not pending:
+        return snapshot
+
+    if wait_time is None:
+        wait_time = max(motor.communication_interface.rtt.timeout(motor.motor_id) for motor, *_ in pending)
+
+    expected: Dict[ResponseMailbox, Dict[MailboxKey, int]] = {}
+    for motor, since_position, since_speed, _ in pending:
+        keys = expected.setdefault(motor.communication_interface.mailbox, {})
+        keys[(motor.motor_id, QUERY_ANGLE)] = since_position
+        keys[(motor.motor_id, QUERY_SPEED)] = since_speed
+
+    deadline = time.monotonic() + wait_time
+    for mailbox, keys in expected.items():
+        mailbox.wait_for(keys, max(0.0, deadline - time.monotonic()))
+
+    for motor, since_position, since_speed, sent_at in pending:
+        mailbox = motor.communication_interface.mailbox
+        rtt = motor.communication_interface.rtt
+        position = mailbox.latest(motor.motor_id, QUERY_ANGLE, since_position)
+        speed = mailbox.latest(motor.motor_id, QUERY_SPEED, since_speed)
+        if position is not None:
+            motor.position = position.data
+            snapshot.positions[motor.motor_id] = motor.position
+        if speed is not None:
+            motor.speed = speed.data
+            snapshot.speeds[motor.motor_id] = motor.speed
+        if position is None or speed is None:
+            snapshot.missing.append(motor.motor_id)
+            rtt.record_miss(motor.motor_id)
+        else:
+            received_at = max(
+                mailbox.received_at(motor.motor_id, QUERY_ANGLE), mailbox.received_at(motor.motor_id, QUERY_SPEED)
+            )
+            rtt.record(motor.motor_id, received_at - sent_at)
+
+    return snapshot
@@ -8,6 +8,14 @@ from typing import List, Literal
 # Bitwise helpers
 #######################################
 
+# Precompiled layouts for the in-place encoders below.
+_FP32 = struct.Struct("f")
+_U32 = struct.Struct("I")
+_U64 = struct.Struct(">Q")
+_U8_U16 = struct.Struct(">BH")
+_U8_FP32_U16 = struct.Struct(">BfH")
+_U16_U8_U8 = struct.Struct(">HBB")
+
 
 def push_bits(value: int, data: int, num_bits: int) -> int:
     value <<= num_bits
@@ -15,9 +23,12 @@ def push_bits(value: int, data: int, num_bits: int) -> int:
     return value
 
 
+def fp32_bits(data: float) -> int:
+    return _U32.unpack(_FP32.pack(data))[0]
+
+
 def push_fp32_bits(value: int, data: float) -> int:
-    data_bits = struct.unpack("I", struct.pack("f", data))[0]
-    value = push_bits(value, data_bits, 32)
+    value = push_bits(value, fp32_bits(data), 32)
     return value
 
 
@@ -211,6 +222,13 @@ def get_motor_power() -> List[int]:
     return split_into_bytes(command, 2)
 
 
+# The query commands are constant, so the encoded frames are cached.
+MOTOR_POS_QUERY = bytes([0xE0, 0x01])
+MOTOR_SPEED_QUERY = bytes([0xE0, 0x02])
+MOTOR_CURRENT_QUERY = bytes([0xE0, 0x03])
+MOTOR_POWER_QUERY = bytes([0xE0, 0x04])
+
+
 #######################################
 # Motor feedback control commands
 #######################################
@@ -249,6 +267,144 @@ def force_position_hybrid_control(kp: float, kd: float, position: float, speed:
     return split_into_bytes(command)
 
 
+#######################################
+# In-place encoders
+#######################################
+
+
+def set_position_control_into(
+    buffer: bytearray | memoryview,
+    offset: int,
+    position: float,
+    *,
+    motor_mode: int = 1,
+    max_speed: float = 60.0,
+    max_current: float = 5.0,
+    message_return: Literal[0, 1, 2, 3] = 0,
+) -> None:
+    """Writes the servo position control command into a buffer.
+
+    Produces the same 8 bytes as `set_position_control`.
+
+    Args:
+        buffer: The buffer to write into.
+        offset: The offset of the command in the buffer.
+        position: The position to set the motor to.
+        motor_mode: 0x1 for servo position control.
+        max_speed: The maximum speed of the motor, in rotations per minute.
+        max_current: The maximum current of the motor, in amps.
+        message_return: The message return status.
+    """
+    command = (
+        (motor_mode & 0x7) << 61
+        | fp32_bits(position) << 29
+        | (int(max_speed * 10) & 0x7FFF) << 14
+        | (int(max_current * 10) & 0xFFF) << 2
+        | (message_return & 0x3)
+    )
+    _U64.pack_into(buffer, offset, command)
+
+
+def set_speed_control_into(
+    buffer: bytearray | memoryview,
+    offset: int,
+    speed: float,
+    *,
+    motor_mode: int = 2,
+    current: float = 5.0,
+    message_return: Literal[0, 1, 2, 3] = 0,
+) -> None:
+    """Writes the speed control command into a buffer.
+
+    Produces the same 7 bytes as `set_speed_control`.
+
+    Args:
+        buffer: The buffer to write into.
+        offset: The offset of the command in the buffer.
+        speed: The speed to set the motor to, in rotations per minute.
+        motor_mode: 0x2 for speed control.
+        current: The current of the motor, in amps.
+        message_return: The message return status.
+    """
+    header = (motor_mode & 0x7) << 5 | (message_return & 0x3)
+    _U8_FP32_U16.pack_into(buffer, offset, header, speed, int(current * 10) & 0xFFFF)
+
+
+def set_zero_position_into(buffer: bytearray | memoryview, offset: int, motor_id: int) -> None:
+    """Writes the set zero position command into a buffer.
+
+    Produces the same 4 bytes as `set_zero_position`.
+
+    Args:
+        buffer: The buffer to write into.
+        offset: The offset of the command in the buffer.
+        motor_id: The ID of the motor.
+    """
+    _U16_U8_U8.pack_into(buffer, offset, motor_id & 0xFFFF, 0, 3)
+
+
+def force_position_hybrid_control_into(
+    buffer: bytearray | memoryview,
+    offset: int,
+    kp: float,
+    kd: float,
+    position: float,
+    *,
+    speed: float,
+    torque_ff: float,
+) -> None:
+    """Writes the force position hybrid control command into a buffer.
+
+    Produces the same 8 bytes as `force_position_hybrid_control`, without
+    building any intermediate lists.
+
+    Args:
+        buffer: The buffer to write into.
+        offset: The offset of the command in the buffer.
+        kp: The proportional gain.
+        kd: The derivative gain.
+        position: The position to set the motor to, in degrees.
+        speed: The speed to set the motor to, in rpm.
+        torque_ff: The feedforward torque in Nm.
+    """
+    position_int = max(0, min(65536, int(((math.radians(position) + 12.5) / 25.0) * 65536)))
+    speed_int = max(0, min(4095, int(((speed + 18.0) / 36.0) * 4095)))
+    torque_int = max(0, min(4095, int(((torque_ff + 150) / 300) * 4095)))
+    command = (
+        (int(kp * 4095 / 500) & 0xFFF) << 49
+        | (int(kd * 511 / 5) & 0x1FF) << 40
+        | (position_int & 0xFFFF) << 24
+        | (speed_int & 0xFFF) << 12
+        | (torque_int & 0xFFF)
+    )
+    _U64.pack_into(buffer, offset, command)
+
+
+def set_current_torque_control_into(
+    buffer: bytearray | memoryview,
+    offset: int,
+    value: int,
+    *,
+    control_status: Literal[0, 1, 2, 3, 4, 5, 6, 7] = 0,
+    motor_mode: int = 3,
+    message_return: Literal[0, 1, 2, 3] = 0,
+) -> None:
+    """Writes the current or torque control command into a buffer.
+
+    Produces the same 3 bytes as `set_current_torque_control`.
+
+    Args:
+        buffer: The buffer to write into.
+        offset: The offset of the command in the buffer.
+        value: The current (A) or torque (N*m) to set the motor to.
+        control_status: 0x0 for current control, 0x1 for torque control.
+        motor_mode: 0x3 for current control.
+        message_return: The message return status.
+    """
+    header = (motor_mode & 0x7) << 5 | (control_status & 0x7) << 2 | (message_return & 0x3)
+    _U8_U16.pack_into(buffer, offset, header, int(value * 10) & 0xFFFF)
+
+
 def debug(command: bytes) -> List[str]:
     return [hex(i) for i in command]
 
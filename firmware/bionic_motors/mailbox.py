@@ -0,0 +1,175 @@
+"""Defines an indexed mailbox for responses from the bionic motors.
+
+Every motor on a bus shares a single mailbox, which is filled by one
+`can.Notifier` listener. Responses are keyed by the arbitration ID of the
+replying motor and the query code of the response, so looking up the latest
+value for a motor is a dictionary access instead of a scan over every frame
+received on the bus.
+
+Callers waiting for replies block on a condition variable which is notified
+for every stored response, so a wait returns as soon as the last expected
+response arrives instead of sleeping for a fixed window.
+
+Automatic replies to control commands (message types 1 to 3) are not stored,
+they are decoded and handed to the handler subscribed for the motor instead.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Mapping, Optional, Tuple
+
+import can
+
+from firmware.bionic_motors.responses import DECODERS, QueryResponse, Response, decode_query
+
+# Query codes for type 5 responses, matching `responses.QUERY_MAP`.
+QUERY_ANGLE = 1
+QUERY_SPEED = 2
+QUERY_CURRENT = 3
+QUERY_POWER = 4
+
+# The payload length of each message type, indexed like `DECODERS`. Shorter frames are dropped.
+MESSAGE_LENGTHS = (0, 8, 8, 8, 3, 6, 0, 0)
+
+MailboxKey = Tuple[int, int]
+FeedbackHandler = Callable[[Response], None]
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseMailbox(can.Listener):
+    """Stores decoded query responses in bounded per-key deques."""
+
+    def __init__(self, maxlen: int = 8) -> None:
+        """Initializes the mailbox.
+
+        Args:
+            maxlen: The number of responses to keep for each key.
+        """
+        self.maxlen = maxlen
+        self._responses: Dict[MailboxKey, Deque[QueryResponse]] = {}
+        self._counts: Dict[MailboxKey, int] = {}
+        self._received_at: Dict[MailboxKey, float] = {}
+        self._condition = threading.Condition()
+        self._handlers: Dict[int, FeedbackHandler] = {}
+
+    def subscribe(self, motor_id: int, handler: Optional[FeedbackHandler]) -> None:
+        """Sets the handler called with every automatic reply from a motor.
+
+        The handler runs on the notifier thread, so it should only store the
+        decoded values.
+
+        Args:
+            motor_id: The arbitration ID of the motor.
+            handler: Called with the decoded type 1, 2 or 3 reply, or None to
+                stop handling the replies of the motor.
+        """
+        if handler is None:
+            self._handlers.pop(motor_id, None)
+        else:
+            self._handlers[motor_id] = handler
+
+    def on_message_received(self, msg: can.Message) -> None:
+        data = msg.data
+        if msg.is_error_frame or not data:
+            return
+        message_type = data[0] >> 5
+        if len(data) < MESSAGE_LENGTHS[message_type]:
+            return
+        if message_type != 5:
+            handler = self._handlers.get(msg.arbitration_id)
+            decoder = DECODERS[message_type]
+            if handler is not None and decoder is not None and 1 <= message_type <= 3:
+                # An exception here would stop the notifier thread, and with it every reply on the bus.
+                try:
+                    handler(decoder(data))
+                except Exception:
+                    logger.exception("Failed to handle reply %s from motor %d", data.hex(), msg.arbitration_id)
+            return
+        result = decode_query(data)
+        key = (msg.arbitration_id, result.query_code)
+        with self._condition:
+            responses = self._responses.get(key)
+            if responses is None:
+                responses = self._responses.setdefault(key, deque(maxlen=self.maxlen))
+            responses.append(result)
+            self._counts[key] = self._counts.get(key, 0) + 1
+            self._received_at[key] = time.monotonic()
+            self._condition.notify_all()
+
+    def count(self, motor_id: int, query_code: int) -> int:
+        """Returns the number of responses received so far for a key.
+
+        Callers can record the count before sending a query and compare it
+        afterwards to check whether a fresh response has arrived.
+
+        Args:
+            motor_id: The arbitration ID of the motor.
+            query_code: The query code of the response.
+
+        Returns:
+            The total number of responses received for the key.
+        """
+        return self._counts.get((motor_id, query_code), 0)
+
+    def received_at(self, motor_id: int, query_code: int) -> float:
+        """Returns when the latest response for a key was received.
+
+        Args:
+            motor_id: The arbitration ID of the motor.
+            query_code: The query code of the response.
+
+        Returns:
+            The monotonic time of the latest response, or -inf if there is none.
+        """
+        return self._received_at.get((motor_id, query_code), -math.inf)
+
+    def latest(self, motor_id: int, query_code: int, since: int = 0) -> Optional[QueryResponse]:
+        """Returns the most recent response for a key.
+
+        Args:
+            motor_id: The arbitration ID of the motor.
+            query_code: The query code of the response.
+            since: Only return a response if more than this many responses
+                have been received for the key, as returned by `count`.
+
+        Returns:
+            The latest decoded response record, or None if there is no new response.
+        """
+        key = (motor_id, query_code)
+        if self._counts.get(key, 0) <= since:
+            return None
+        responses = self._responses.get(key)
+        if not responses:
+            return None
+        return responses[-1]
+
+    def wait_for(self, expected: Mapping[MailboxKey, int], timeout: float) -> List[MailboxKey]:
+        """Waits until every expected key has a new response, or the timeout expires.
+
+        Args:
+            expected: Maps each `(motor_id, query_code)` key to its count
+                before the query was sent, as returned by `count`.
+            timeout: The maximum time to wait, in seconds.
+
+        Returns:
+            The keys which are still missing a new response, empty if every
+            response arrived in time.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                missing = [key for key, since in expected.items() if self._counts.get(key, 0) <= since]
+                remaining = deadline - time.monotonic()
+                if not missing or remaining <= 0:
+                    return missing
+                self._condition.wait(remaining)
+
+    def clear(self) -> None:
+        """Drops all stored responses."""
+        with self._condition:
+            for responses in self._responses.values():
+                responses.clear()
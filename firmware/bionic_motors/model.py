@@ -7,6 +7,9 @@ from typing import Optional
 
 from firmware.bionic_motors.motors import BionicMotor
 
+# How often `hold_position` prints the position of the first motor, in seconds.
+HOLD_PRINT_PERIOD = 0.1
+
 # TODO: Head
 
 
@@ -55,18 +58,21 @@ class Arm:
                 else:
                     position[idx] += sign * increments[idx]
 
-                part.update_position(0.001)
+                part.update_position()
                 part.set_position(int(position[idx]), 0, 0)
 
     def hold_position(self, position: list, timeout: float = 2.0) -> None:
         cur_time = time.time()
         print("These are the current pos", position)
+        for idx, part in enumerate(self.motors):
+            part.hold(int(position[idx]))
         while time.time() - cur_time < timeout:
-            for idx, part in enumerate(self.motors):
-                part.set_position(int(position[idx]), 0, 0)
-                part.update_position(0.001)
-                if idx == 0:
-                    print(part.position)
+            self.motors[0].update_position()
+            print(self.motors[0].position)
+            # The kernel keeps sending the hold frames, so the position is only sampled for the printout.
+            time.sleep(max(0.0, min(HOLD_PRINT_PERIOD, cur_time + timeout - time.time())))
+        for part in self.motors:
+            part.release()
 
 
 @dataclass
@@ -112,18 +118,21 @@ class Leg:
                 else:
                     position[idx] += sign * increments[idx]
 
-                part.update_position(0.001)
+                part.update_position()
                 part.set_position(int(position[idx]), 0, 0)
 
     def hold_position(self, position: list, timeout: float = 2.0) -> None:
         cur_time = time.time()
         print("These are the current pos", position)
+        for idx, part in enumerate(self.motors):
+            part.hold(int(position[idx]))
         while time.time() - cur_time < timeout:
-            for idx, part in enumerate(self.motors):
-                part.set_position(int(position[idx]), 0, 0)
-                part.update_position(0.001)
-                if idx == 0:
-                    print(part.position)
+            self.motors[0].update_position()
+            print(self.motors[0].position)
+            # The kernel keeps sending the hold frames, so the position is only sampled for the printout.
+            time.sleep(max(0.0, min(HOLD_PRINT_PERIOD, cur_time + timeout - time.time())))
+        for part in self.motors:
+            part.release()
 
 
 @dataclass
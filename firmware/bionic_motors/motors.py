@@ -1,22 +1,41 @@
 """Defines a class that dictates how to communicate with the motors."""
 
+import math
 import time
-from dataclasses import dataclass
-from typing import Any, List
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Literal, Optional, Sequence
 
 import can
 
 from firmware.bionic_motors.commands import (
+    MOTOR_POS_QUERY,
+    MOTOR_SPEED_QUERY,
     force_position_hybrid_control,
-    get_motor_pos,
-    get_motor_speed,
-    set_current_torque_control,
+    force_position_hybrid_control_into,
+    set_current_torque_control_into,
     set_zero_position,
 )
-from firmware.bionic_motors.responses import read_result, valid_message
+from firmware.bionic_motors.mailbox import QUERY_ANGLE, QUERY_SPEED, ResponseMailbox
+from firmware.bionic_motors.responses import (
+    PositionResponse,
+    PositionSpeedResponse,
+    Response,
+    SpeedResponse,
+    read_result,
+    valid_message,
+)
+from firmware.motor_utils.bus_pool import BusPool
+from firmware.motor_utils.can_filters import bionic_filters
+from firmware.motor_utils.frames import FrameBuffer
 from firmware.motor_utils.motor_utils import MotorInterface, MotorParams
+from firmware.motor_utils.rtt import RttTracker
 
 SPECIAL_IDENTIFIER = 0x7FF
+HOLD_PERIOD = 0.005
+RAD_S_TO_RPM = 60.0 / (2.0 * math.pi)
+
+# How old the state from an automatic reply may be before it is queried again, in seconds.
+DEFAULT_MAX_AGE = 0.01
 
 
 @dataclass
@@ -30,6 +49,9 @@ class CANInterface:
     bus: Any
     channel: can.BufferedReader
     bustype: can.Notifier
+    mailbox: Optional[ResponseMailbox] = None
+    # Round-trip times of the queries, keyed by motor ID, which set the default read windows.
+    rtt: RttTracker = field(default_factory=RttTracker)
 
 
 @dataclass
@@ -43,16 +65,53 @@ class BionicMotor(MotorInterface):
 
     can_messages: List[Any] = []
 
-    def __init__(self, motor_id: int, control_params: ControlParams, can_bus: CANInterface) -> None:
+    def __init__(
+        self,
+        motor_id: int,
+        control_params: ControlParams,
+        can_bus: CANInterface,
+        message_return: Literal[0, 1, 2, 3] = 0,
+        initialize: bool = True,
+    ) -> None:
         """Initializes the motor.
 
         Args:
         motor_id: The ID of the motor.
         control_params: The control parameters for the motor.
         can_bus: The CAN bus interface.
+        message_return: The type of the automatic reply requested with every
+            current command, 0 for none. Force position hybrid commands are
+            always answered with a type 1 reply. If the bus has a mailbox, the
+            replies update the state of the motor, and `get_position` and
+            `get_speed` skip the query while the state is newer than the last
+            command and recent enough.
+        initialize: Whether to read the position right away. Pass False to
+            read many motors at once with `bulk.query_states`.
         """
         super().__init__(motor_id, control_params, can_bus)
-        self.update_position()
+        self.message_return = message_return
+        self.current: float = 0
+        self.temperature: float = 0
+        self.error = 0
+        self._command_time = 0.0
+        self._position_time = -math.inf
+        self._speed_time = -math.inf
+        self._hold_message: Optional[can.Message] = None
+        self._hold_task: Optional[can.ModifiableCyclicTaskABC] = None
+
+        # Preallocated frames for the commands sent every control tick.
+        self._position_frame = FrameBuffer(motor_id)
+        self._current_frame = FrameBuffer(SPECIAL_IDENTIFIER, 3)
+        self._position_query_frame = FrameBuffer(motor_id, 2)
+        self._position_query_frame.data[:] = MOTOR_POS_QUERY
+        self._speed_query_frame = FrameBuffer(motor_id, 2)
+        self._speed_query_frame.data[:] = MOTOR_SPEED_QUERY
+
+        if message_return and can_bus.mailbox is not None:
+            can_bus.mailbox.subscribe(motor_id, self._on_feedback)
+
+        if initialize:
+            self.update_position()
 
     def send(self, can_id: int, data: bytes, length: int = 8) -> None:
         """Sends a CAN message to a motor.
@@ -70,27 +129,35 @@ class BionicMotor(MotorInterface):
         )
         self.communication_interface.bus.send(message)
 
-    def read(self, timeout: float = 0.001, read_data_only: bool = True) -> None:
+    def read(
+        self, timeout: float = 0.001, read_data_only: bool = True, expected_ids: Optional[Iterable[int]] = None
+    ) -> None:
         """Generic read can bus method that reads messages from the can bus.
 
         Args:
             timeout: how long to read messages for in seconds
             read_data_only: whether to read only data that has been queried. If true, only type 5 messages are read.
+            expected_ids: if given, return as soon as a type 5 message from each of these motors has been read,
+                instead of reading for the full timeout
         """
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            message = self.communication_interface.channel.get_message(timeout=timeout)
-            if message is not None:
-                if valid_message(message.data):
-                    message_id = message.arbitration_id
-                    message_data = read_result(message.data)
-                    if read_data_only:
-                        if message_data and message_data["Message Type"] == 5:
-                            BionicMotor.can_messages.append(CanMessage(id=message_id, data=message_data))
-                    else:
-                        BionicMotor.can_messages.append(CanMessage(id=message_id, data=str(message_data)))
-                else:
-                    pass
+        waiting = None if expected_ids is None else set(expected_ids)
+        deadline = time.monotonic() + timeout
+        while waiting is None or waiting:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            message = self.communication_interface.channel.get_message(timeout=remaining)
+            if message is None or not valid_message(message.data):
+                continue
+            message_id = message.arbitration_id
+            message_data = read_result(message.data)
+            if message_data and message_data["Message Type"] == 5:
+                if waiting is not None:
+                    waiting.discard(message_id)
+                if read_data_only:
+                    BionicMotor.can_messages.append(CanMessage(id=message_id, data=message_data))
+            if not read_data_only:
+                BionicMotor.can_messages.append(CanMessage(id=message_id, data=str(message_data)))
 
     def set_position(self, position: float, **kwargs: Any) -> None:
         """Sets the position of the motor using force position hybrid control.
@@ -102,8 +169,57 @@ class BionicMotor(MotorInterface):
         speed = kwargs.get("speed", 0)
         torque = kwargs.get("torque", 0)
 
+        force_position_hybrid_control_into(
+            self._position_frame.data,
+            0,
+            self.control_params.kp,
+            self.control_params.kd,
+            position,
+            speed=speed,
+            torque_ff=torque,
+        )
+        self._command_time = time.monotonic()
+        self._position_frame.send(self.communication_interface.bus)
+
+    def send_position_command(self, command: Any) -> None:
+        """Sends a force position hybrid control payload which was encoded elsewhere.
+
+        Args:
+            command: The 8-byte payload, like a row of `batch.force_position_hybrid_control_batch`.
+        """
+        self._position_frame.data[:] = command
+        self._command_time = time.monotonic()
+        self._position_frame.send(self.communication_interface.bus)
+
+    def hold(self, position: float, period: float = HOLD_PERIOD, **kwargs: Any) -> None:
+        """Keeps sending a force position hybrid control setpoint at a fixed rate.
+
+        The frame is transmitted periodically by the bus (the kernel broadcast
+        manager for socketcan), so holding a pose costs no Python time. Calling
+        this again updates the payload of the running task in place.
+
+        Args:
+            position: The position to hold (in degrees)
+            period: The transmission period, in seconds
+            kwargs: Additional arguments to pass to the motor. (speed in rpm, torque in Nm)
+        """
+        speed = kwargs.get("speed", 0)
+        torque = kwargs.get("torque", 0)
         command = force_position_hybrid_control(self.control_params.kp, self.control_params.kd, position, speed, torque)
-        self.send(self.motor_id, bytes(command))
+
+        if self._hold_message is None or self._hold_task is None:
+            self._hold_message = can.Message(arbitration_id=self.motor_id, data=bytes(command), is_extended_id=False)
+            self._hold_task = self.communication_interface.bus.send_periodic(self._hold_message, period)
+        else:
+            self._hold_message.data[:] = bytes(command)
+            self._hold_task.modify_data(self._hold_message)
+
+    def release(self) -> None:
+        """Stops sending the setpoint started by `hold`."""
+        if self._hold_task is not None:
+            self._hold_task.stop()
+        self._hold_task = None
+        self._hold_message = None
 
     def set_current(self, current: float) -> None:
         """Sets the current of the motor.
@@ -111,25 +227,115 @@ class BionicMotor(MotorInterface):
         Args:
             current: The current to set the motor to (in A)
         """
-        command = set_current_torque_control(motor_id=self.motor_id, value=int(current), control_status=0)
-        self.send(SPECIAL_IDENTIFIER, bytes(command), 3)
+        set_current_torque_control_into(
+            self._current_frame.data, 0, value=int(current), control_status=0, message_return=self.message_return
+        )
+        self._command_time = time.monotonic()
+        self._current_frame.send(self.communication_interface.bus)
 
     def set_zero_position(self) -> None:
         """Sets the zero position of the motor."""
         command = set_zero_position(self.motor_id)
         self.send(SPECIAL_IDENTIFIER, bytes(command), 4)
 
-    def get_position(self) -> float:
-        """Gets the current position of the motor."""
-        self.update_position()
+    def request_position(self) -> None:
+        """Sends a position query without waiting for the reply."""
+        self._position_query_frame.send(self.communication_interface.bus)
+
+    def request_speed(self) -> None:
+        """Sends a speed query without waiting for the reply."""
+        self._speed_query_frame.send(self.communication_interface.bus)
+
+    def _on_feedback(self, response: Response) -> None:
+        """Updates the state of the motor from an automatic reply.
+
+        Type 1 replies carry the position in radians and the speed in radians
+        per second, so they are converted to the degrees and rpm of the queries.
+
+        Args:
+            response: The decoded type 1, 2 or 3 reply.
+        """
+        now = time.monotonic()
+        if isinstance(response, PositionSpeedResponse):
+            self.position = math.degrees(response.position)
+            self.speed = response.speed * RAD_S_TO_RPM
+            self._position_time = self._speed_time = now
+        elif isinstance(response, PositionResponse):
+            self.position = response.position
+            self._position_time = now
+        elif isinstance(response, SpeedResponse):
+            self.speed = response.speed
+            self._speed_time = now
+        else:
+            return
+        self.current = response.current
+        self.temperature = response.temperature
+        self.error = response.error
+
+    def position_fresh(self, max_age: float = DEFAULT_MAX_AGE) -> bool:
+        """Whether an automatic reply has updated the position since the last command.
+
+        Args:
+            max_age: The maximum age of the reply, in seconds.
+        """
+        return self._position_time >= self._command_time and time.monotonic() - self._position_time <= max_age
+
+    def speed_fresh(self, max_age: float = DEFAULT_MAX_AGE) -> bool:
+        """Whether an automatic reply has updated the speed since the last command.
+
+        Args:
+            max_age: The maximum age of the reply, in seconds.
+        """
+        return self._speed_time >= self._command_time and time.monotonic() - self._speed_time <= max_age
+
+    def get_position(self, max_age: float = DEFAULT_MAX_AGE) -> float:
+        """Gets the current position of the motor, only querying it if the position from the replies is stale.
+
+        Args:
+            max_age: The maximum age of the position from an automatic reply, in seconds.
+        """
+        if not self.position_fresh(max_age):
+            self.update_position()
         return self.position
 
-    def get_speed(self) -> float:
-        """Gets the current speed of the motor."""
-        self.update_speed()
+    def get_speed(self, max_age: float = DEFAULT_MAX_AGE) -> float:
+        """Gets the current speed of the motor, only querying it if the speed from the replies is stale.
+
+        Args:
+            max_age: The maximum age of the speed from an automatic reply, in seconds.
+        """
+        if not self.speed_fresh(max_age):
+            self.update_speed()
         return self.speed
 
-    def update_position(self, wait_time: float = 0.001) -> None:
+    def _query(self, query_code: int, wait_time: Optional[float]) -> Optional[float]:
+        """Sends a query and waits for the reply in the mailbox, recording its round-trip time.
+
+        Args:
+            query_code: The query code, `QUERY_ANGLE` or `QUERY_SPEED`.
+            wait_time: How long to wait for the reply, defaults to the timeout
+                derived from the round-trip times of the motor.
+
+        Returns:
+            The queried value, or None if no reply arrived in time.
+        """
+        mailbox = self.communication_interface.mailbox
+        rtt = self.communication_interface.rtt
+        timeout = rtt.timeout(self.motor_id) if wait_time is None else wait_time
+        since = mailbox.count(self.motor_id, query_code)
+        sent_at = time.monotonic()
+        if query_code == QUERY_ANGLE:
+            self.request_position()
+        else:
+            self.request_speed()
+        if mailbox.wait_for({(self.motor_id, query_code): since}, timeout):
+            rtt.record_miss(self.motor_id)
+            return None
+        rtt.record(self.motor_id, mailbox.received_at(self.motor_id, query_code) - sent_at)
+        response = mailbox.latest(self.motor_id, query_code, since)
+        return None if response is None else response.data
+
+    def update_position(self, wait_time: Optional[float] = None) -> None:
         """Updates the value of the motor's position attribute.
 
         NOTE: Do NOT use this to access the motor's position value.
@@ -137,13 +343,22 @@ class BionicMotor(MotorInterface):
         Just use <motor>.position instead.
 
         Args:
-            wait_time: how long to wait for a response from the motor
-            read_only: whether to read the position value or not
+            wait_time: how long to wait for a response from the motor, defaults to the
+                timeout derived from the measured round-trip times
         """
-        command = get_motor_pos()
-        self.send(self.motor_id, bytes(command), 2)
-        self.read(wait_time)
-        for message in BionicMotor.can_messages:
+        if self.communication_interface.mailbox is not None:
+            position = self._query(QUERY_ANGLE, wait_time)
+            if position is not None:
+                self.position = position
+            return
+
+        self.request_position()
+        self.read(
+            self.communication_interface.rtt.timeout(self.motor_id) if wait_time is None else wait_time,
+            expected_ids=[self.motor_id],
+        )
+        # Iterates over a copy, since the messages are removed from the buffer while scanning it.
+        for message in list(BionicMotor.can_messages):
             if message.id == self.motor_id and message.data["Message Type"] == 5:
                 BionicMotor.can_messages.remove(message)
                 self.position = message.data["Data"]
@@ -153,7 +368,7 @@ class BionicMotor(MotorInterface):
                 BionicMotor.can_messages.remove(message)
                 continue
 
-    def update_speed(self, wait_time: float = 0.001) -> str:
+    def update_speed(self, wait_time: Optional[float] = None) -> str:
         """Updates the value of the motor's speed attribute.
 
         NOTE: Do NOT use this to access the motor's speed value.
@@ -161,15 +376,23 @@ class BionicMotor(MotorInterface):
         Just use <motor>.speed instead.
 
         Args:
-            wait_time: how long to wait for a response from the motor
-            read_only: whether to read the speed value or not
+            wait_time: how long to wait for a response from the motor, defaults to the
+                timeout derived from the measured round-trip times
         Returns:
             "Valid" if the message is valid, "Invalid" otherwise
         """
-        command = get_motor_speed(self.motor_id)
-        self.send(self.motor_id, bytes(command), 2)
-        self.read(wait_time)
-        for message in BionicMotor.can_messages:
+        if self.communication_interface.mailbox is not None:
+            speed = self._query(QUERY_SPEED, wait_time)
+            if speed is not None:
+                self.speed = speed
+            return "Valid"
+
+        self.request_speed()
+        self.read(
+            self.communication_interface.rtt.timeout(self.motor_id) if wait_time is None else wait_time,
+            expected_ids=[self.motor_id],
+        )
+        for message in list(BionicMotor.can_messages):
             if message.id == self.motor_id and message.data["Message Type"] == 5:
                 BionicMotor.can_messages.remove(message)
                 self.speed = message.data["Data"]
@@ -192,3 +415,57 @@ class BionicMotor(MotorInterface):
 
     def __str__(self) -> str:
         return f"BionicMotor ({self.motor_id})"
+
+
+def create_motor(
+    motor_id: int,
+    control_params: Dict[str, Any],
+    communication_interface: CANInterface,
+    *,
+    initialize: bool = True,
+    control_mode: str = "position",
+) -> BionicMotor:
+    """Creates a Bionic motor from its config parameters, the `bionic` backend of `MotorFactory`.
+
+    Args:
+        motor_id: The ID of the motor.
+        control_params: The parameters of the motor from the config.
+        communication_interface: The CAN interface of the bus of the motor.
+        initialize: Whether to configure the motor right away.
+        control_mode: Unused, Bionic motors are always commanded with hybrid control frames.
+
+    Returns:
+        The motor.
+    """
+    return BionicMotor(
+        motor_id,
+        ControlParams(kp=control_params["kp"], kd=control_params["kd"]),
+        communication_interface,
+        message_return=control_params.get("message_return", 0),
+        initialize=initialize,
+    )
+
+
+def create_interface(bus_pool: BusPool, canbus_id: int, motor_ids: Sequence[int], host_can_id: int) -> CANInterface:
+    """Opens the bus of Bionic motors, the `bionic` interface factory of `MotorFactory`.
+
+    Args:
+        bus_pool: The pool of the shared CAN channels.
+        canbus_id: The ID of the CAN bus.
+        motor_ids: The IDs of the motors on the bus, whose replies pass the receive filters.
+        host_can_id: Unused, Bionic replies are not addressed to a host.
+
+    Returns:
+        The interface shared by every motor on the bus, whose query replies are indexed by a mailbox.
+    """
+    channel = bus_pool.get(f"can{canbus_id}")
+    mailbox = ResponseMailbox()
+    channel.add_listener(mailbox)
+    assert channel.notifier is not None
+    return CANInterface(
+        bus_pool.view(channel.channel, motor_ids, bionic_filters),
+        can.BufferedReader(),
+        channel.notifier,
+        mailbox,
+        RttTracker(),
+    )
@@ -1,7 +1,12 @@
-"""Takes in responses from the Q&A return type and interprets them."""
+"""Takes in responses from the Q&A return type and interprets them.
+
+`decode` returns a compact record per message, with numeric fields and an
+integer error code. The dictionary format returned by `read_result` is kept
+as a view of the records for backward compatibility.
+"""
 
 import struct
-from typing import Dict, Union
+from typing import Callable, Dict, NamedTuple, Optional, Tuple, Union
 
 # Defintions
 
@@ -29,57 +34,213 @@ CONFIG_MAP = {
 CONFIG_STATUS_MAP = {0: "Failure", 1: "Success"}
 
 
+# Records
+
+
+class PositionSpeedResponse(NamedTuple):
+    """Message Type 1: position, speed and current feedback."""
+
+    error: int
+    position: float
+    speed: float
+    current: float
+    temperature: float
+    mos_temperature: float
+
+    @property
+    def message_type(self) -> int:
+        return 1
+
+    def as_dict(self) -> dict:
+        return {
+            "Message Type": 1,
+            "Error": ERROR_MAP[self.error],
+            "Position": self.position,
+            "Speed": self.speed,
+            "Current": self.current,
+            "Temperature": self.temperature,
+            "MOS": self.mos_temperature,
+        }
+
+
+class PositionResponse(NamedTuple):
+    """Message Type 2: position feedback."""
+
+    error: int
+    position: float
+    current: float
+    temperature: float
+
+    @property
+    def message_type(self) -> int:
+        return 2
+
+    def as_dict(self) -> dict:
+        return {
+            "Message Type": 2,
+            "Error": ERROR_MAP[self.error],
+            "Position": self.position,
+            "Current": self.current,
+            "Temperature": self.temperature,
+        }
+
+
+class SpeedResponse(NamedTuple):
+    """Message Type 3: speed feedback."""
+
+    error: int
+    speed: float
+    current: float
+    temperature: float
+
+    @property
+    def message_type(self) -> int:
+        return 3
+
+    def as_dict(self) -> dict:
+        return {
+            "Message Type": 3,
+            "Error": ERROR_MAP[self.error],
+            "Speed": self.speed,
+            "Current": self.current,
+            "Temperature": self.temperature,
+        }
+
+
+class ConfigurationResponse(NamedTuple):
+    """Message Type 4: configuration acknowledgement."""
+
+    error: int
+    configuration_code: int
+    configuration_status: int
+
+    @property
+    def message_type(self) -> int:
+        return 4
+
+    def as_dict(self) -> dict:
+        return {
+            "Message Type": 4,
+            "Error": ERROR_MAP[self.error],
+            "Configuration Code": CONFIG_MAP[self.configuration_code],
+            "Configuration Status": CONFIG_STATUS_MAP[self.configuration_status],
+        }
+
+
+class QueryResponse(NamedTuple):
+    """Message Type 5: reply to a query, see `QUERY_MAP` for the query codes."""
+
+    error: int
+    query_code: int
+    data: float
+
+    @property
+    def message_type(self) -> int:
+        return 5
+
+    def as_dict(self) -> dict:
+        return {
+            "Message Type": 5,
+            "Error": ERROR_MAP[self.error],
+            "Query Code": QUERY_MAP[self.query_code],
+            "Data": self.data,
+        }
+
+
+Response = Union[PositionSpeedResponse, PositionResponse, SpeedResponse, ConfigurationResponse, QueryResponse]
+
+_U16 = struct.Struct("!H")
+_FP32 = struct.Struct("!f")
+_FP32_U16_U8 = struct.Struct("!fHB")
+
+
 def get_message_type(msg: bytes) -> int:
     """Returns the message type of the message."""
-    for i in range(1, 6):
-        if msg[0] >> 5 == i:
-            return i
-    return -1
+    message_type = msg[0] >> 5
+    return message_type if 1 <= message_type <= 5 else -1
 
 
-def position_speed_message(msg: bytes) -> dict:
-    """Message Type 1.
+# Decoders
 
-    Interprets the message type 1 and returns a list of the results
+
+def decode_position_speed(msg: bytes | bytearray) -> PositionSpeedResponse:
+    motor_pos = _U16.unpack_from(msg, 1)[0]
+    motor_speed = _U16.unpack_from(msg, 3)[0] >> 4
+    motor_current = _U16.unpack_from(msg, 4)[0] & 0xFFF
+    # NOTE: The temperatures are converted twice, matching the original decoder.
+    motor_temp = int((msg[6] - 50) / 2)
+    motor_mos_temp = int((msg[7] - 50) / 2)
+    return PositionSpeedResponse(
+        msg[0] & 0x1F,
+        motor_pos * (25.0 / 65536.0) - 12.5,
+        motor_speed * (36.0 / 4095.0) - 18.0,
+        motor_current * (140.0 / 4095) - 70.0,
+        (motor_temp - 50.0) / 2.0,
+        (motor_mos_temp - 50.0) / 2.0,
+    )
+
+
+def decode_position(msg: bytes | bytearray) -> PositionResponse:
+    motor_pos, motor_current, motor_temp = _FP32_U16_U8.unpack_from(msg, 1)
+    return PositionResponse(msg[0] & 0x1F, motor_pos, motor_current / 10.0, (motor_temp - 50.0) / 2.0)
+
+
+def decode_speed(msg: bytes | bytearray) -> SpeedResponse:
+    motor_speed, motor_current, motor_temp = _FP32_U16_U8.unpack_from(msg, 1)
+    return SpeedResponse(msg[0] & 0x1F, motor_speed, motor_current / 10.0, (motor_temp - 50.0) / 2.0)
+
+
+def decode_configuration(msg: bytes | bytearray) -> ConfigurationResponse:
+    return ConfigurationResponse(msg[0] & 0x1F, msg[1], msg[2])
+
+
+def decode_query(msg: bytes | bytearray) -> QueryResponse:
+    return QueryResponse(msg[0] & 0x1F, msg[1], _FP32.unpack_from(msg, 2)[0])
+
+
+# Indexed directly by the top three bits of the first byte.
+DECODERS: Tuple[Optional[Callable[[bytes | bytearray], Response]], ...] = (
+    None,
+    decode_position_speed,
+    decode_position,
+    decode_speed,
+    decode_configuration,
+    decode_query,
+    None,
+    None,
+)
+
+
+def decode(msg: bytes | bytearray) -> Optional[Response]:
+    """Decodes a message into a typed record, regardless of Message Type.
 
     Args:
         msg: bytes: The message to interpret
 
     Returns:
-        dictionary of the message results
+        The decoded record, or None if the message type is not valid.
     """
+    decoder = DECODERS[msg[0] >> 5]
+    if decoder is None:
+        return None
+    return decoder(msg)
 
-    def get_position(data: int) -> float:
-        return data * (25.0 / 65536.0) - 12.5
 
-    def get_speed(data: int) -> float:
-        return data * (36.0 / 4095.0) - 18.0
+# Dictionary views, kept for backward compatibility
 
-    def get_current(data: int) -> float:
-        return data * (140.0 / 4095) - 70.0
 
-    def get_temp(data: int) -> float:
-        return (data - 50.0) / 2.0
+def position_speed_message(msg: bytes) -> dict:
+    """Message Type 1.
 
-    def get_mos_temp(data: int) -> float:
-        return (data - 50.0) / 2.0
+    Interprets the message type 1 and returns a list of the results
 
-    error = msg[0] & 0x1F
-    motor_pos = int.from_bytes(msg[1:3], "big")
-    motor_speed = int.from_bytes(msg[3:5], "big") >> 4
-    motor_current = int.from_bytes(msg[4:6], "big") & 0xFFF
-    motor_temp: int = int(((msg[6]) - 50) / 2)
-    motor_mos_temp: int = int(((msg[7]) - 50) / 2)
+    Args:
+        msg: bytes: The message to interpret
 
-    return {
-        "Message Type": 1,
-        "Error": ERROR_MAP[error],
-        "Position": get_position(motor_pos),
-        "Speed": get_speed(motor_speed),
-        "Current": get_current(motor_current),
-        "Temperature": get_temp(motor_temp),
-        "MOS": get_mos_temp(motor_mos_temp),
-    }
+    Returns:
+        dictionary of the message results
+    """
+    return decode_position_speed(msg).as_dict()
 
 
 def position_message(msg: bytes) -> dict:
@@ -94,28 +255,7 @@ def position_message(msg: bytes) -> dict:
         dictionary of the message results
 
     """
-
-    def get_position(data: int) -> float:
-        return data
-
-    def get_current(data: int) -> float:
-        return data / 10.0
-
-    def get_temp(data: int) -> float:
-        return (data - 50.0) / 2.0
-
-    error = msg[0] & 0x1F
-    motor_pos = struct.unpack("!f", msg[1:5])[0]
-    motor_current = int.from_bytes(msg[5:7], "big")
-    motor_temp = msg[7]
-
-    return {
-        "Message Type": 2,
-        "Error": ERROR_MAP[error],
-        "Position": get_position(motor_pos),
-        "Current": get_current(motor_current),
-        "Temperature": get_temp(motor_temp),
-    }
+    return decode_position(msg).as_dict()
 
 
 def speed_message(msg: bytes) -> dict:
@@ -129,28 +269,7 @@ def speed_message(msg: bytes) -> dict:
     Returns:
         dictionary of the message results
     """
-
-    def get_speed(data: int) -> float:
-        return data
-
-    def get_current(data: int) -> float:
-        return data / 10.0
-
-    def get_temp(data: int) -> float:
-        return (data - 50.0) / 2.0
-
-    error = msg[0] & 0x1F
-    motor_speed = struct.unpack("!f", msg[1:5])[0]
-    motor_current = int.from_bytes(msg[5:7], "big")
-    motor_temp = msg[7]
-
-    return {
-        "Message Type": 3,
-        "Error": ERROR_MAP[error],
-        "Speed": get_speed(motor_speed),
-        "Current": get_current(motor_current),
-        "Temperature": get_temp(motor_temp),
-    }
+    return decode_speed(msg).as_dict()
 
 
 def configuration_message(msg: bytes) -> dict:
@@ -165,16 +284,7 @@ def configuration_message(msg: bytes) -> dict:
         dictionary of the message results
 
     """
-    error = msg[0] & 0x1F
-    configuration_code = msg[1]
-    configuration_status = msg[2]
-
-    return {
-        "Message Type": 4,
-        "Error": ERROR_MAP[error],
-        "Configuration Code": CONFIG_MAP[configuration_code],
-        "Configuration Status": CONFIG_STATUS_MAP[configuration_status],
-    }
+    return decode_configuration(msg).as_dict()
 
 
 def custom_message(msg: bytes) -> dict:
@@ -188,12 +298,7 @@ def custom_message(msg: bytes) -> dict:
         dictionary of the message results
 
     """
-    error = msg[0] & 0x1F
-    query_code = msg[1]
-    data = bytes(msg[2:])
-    data = struct.unpack("!f", data)[0]
-
-    return {"Message Type": 5, "Error": ERROR_MAP[error], "Query Code": QUERY_MAP[query_code], "Data": data}
+    return decode_query(msg).as_dict()
 
 
 MESSAGE_MAP = {
@@ -215,12 +320,14 @@ def valid_message(msg: bytes) -> bool:
         bool: True if the message is valid, False otherwise
 
     """
-    return get_message_type(msg) in MESSAGE_MAP
+    return DECODERS[msg[0] >> 5] is not None
 
 
 def read_result(msg: bytes) -> Union[Dict, None]:
     """Reads the result of the message and returns a list of the results regardless of Message Type.
 
+    Prefer `decode`, which returns a typed record instead of a new dictionary.
+
     Args:
         msg: bytes: The message to interpret
 
@@ -228,10 +335,10 @@ def read_result(msg: bytes) -> Union[Dict, None]:
         dictionary of the message results
 
     """
-    message_type = get_message_type(msg)
-    if valid_message(msg):
-        return MESSAGE_MAP[message_type](msg)
-    return None
+    result = decode(msg)
+    if result is None:
+        return None
+    return result.as_dict()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,256 @@
+"""Defines a pool of CAN buses which opens each physical channel only once.
+
+Each channel gets a single socket, a single writer thread and at most one
+reader (a `can.Notifier`), no matter how many body parts are attached to it.
+Body parts talk to their channel through a `BusView`, which behaves like a
+regular python-can bus.
+
+Receive filters set on a view are merged with those of the other views and
+installed on the shared socket, so the kernel drops frames no part cares about.
+
+Preallocated frames skip the writer and are written from the calling thread
+under the send lock of the channel, see `firmware.motor_utils.frames`.
+"""
+
+import errno
+import logging
+import queue
+import select
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import can
+from can.typechecking import CanFilter, CanFilters
+
+FilterBuilder = Callable[[Iterable[int]], List[CanFilter]]
+
+# How long a raw write keeps retrying while the transmit queue of the interface is full, in seconds.
+RAW_SEND_TIMEOUT = 0.01
+RAW_SEND_RETRY_ERRNOS = (errno.ENOBUFS, errno.EAGAIN)
+
+logger = logging.getLogger(__name__)
+
+
+def send_raw(sock: socket.socket, frame: Union[bytes, bytearray], timeout: float = RAW_SEND_TIMEOUT) -> None:
+    """Writes a raw socketcan frame, retrying while the transmit queue is full.
+
+    Args:
+        sock: The raw socketcan socket.
+        frame: The bytes of a `struct can_frame`.
+        timeout: How long to keep retrying, in seconds.
+
+    Raises:
+        can.CanOperationError: If the frame could not be written, like `SocketcanBus.send`.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            sock.send(frame)
+            return
+        except OSError as error:
+            remaining = deadline - time.monotonic()
+            if error.errno not in RAW_SEND_RETRY_ERRNOS or remaining <= 0:
+                raise can.CanOperationError(f"Failed to transmit: {error.strerror}", error.errno) from error
+        # A full queue disc still reports the socket as writable, so back off briefly between attempts.
+        select.select([], [sock], [], remaining)
+        time.sleep(min(0.0002, max(0.0, deadline - time.monotonic())))
+
+
+class CanChannel:
+    """A single physical CAN channel with one writer worker and one reader worker."""
+
+    def __init__(self, channel: str, interface: str = "socketcan") -> None:
+        """Opens the channel and starts its writer worker.
+
+        Args:
+            channel: The name of the channel, like "can0".
+            interface: The python-can interface type.
+        """
+        self.channel = channel
+        self.bus = can.interface.Bus(channel=channel, interface=interface)
+        self.notifier: Optional[can.Notifier] = None
+        self.views: List["BusView"] = []
+        sock = getattr(self.bus, "socket", None)
+        self.raw_socket: Optional[socket.socket] = sock if isinstance(sock, socket.socket) else None
+        self._tx_queue: "queue.SimpleQueue[Optional[can.Message]]" = queue.SimpleQueue()
+        self._send_lock = threading.Lock()
+        self._writer = threading.Thread(target=self._write_loop, name=f"{channel}-writer", daemon=True)
+        self._writer.start()
+
+    def send(self, msg: can.Message) -> None:
+        """Queues a message for the writer worker of this channel.
+
+        Args:
+            msg: The message to send.
+        """
+        self._tx_queue.put(msg)
+
+    def write_frame(self, frame: Union[bytes, bytearray]) -> None:
+        """Writes a raw socketcan frame to the socket from the calling thread.
+
+        Args:
+            frame: The bytes of a `struct can_frame`, only valid if `raw_socket` is set.
+
+        Raises:
+            can.CanOperationError: If the frame could not be written.
+        """
+        assert self.raw_socket is not None
+        with self._send_lock:
+            send_raw(self.raw_socket, frame)
+
+    def write(self, msg: can.Message) -> None:
+        """Sends a message from the calling thread, bypassing the writer worker.
+
+        Args:
+            msg: The message to send, which the bus must be done with when this returns.
+
+        Raises:
+            can.CanError: If the message could not be sent.
+        """
+        with self._send_lock:
+            self.bus.send(msg)
+
+    def add_listener(self, listener: can.Listener) -> None:
+        """Adds a listener to the reader worker, starting it if needed.
+
+        Args:
+            listener: The listener to call for every received message.
+        """
+        if self.notifier is None:
+            self.notifier = can.Notifier(self.bus, [listener])
+        else:
+            self.notifier.add_listener(listener)
+
+    def update_filters(self) -> None:
+        """Installs the union of the receive filters of every view on the socket.
+
+        If any view accepts every frame, the filters are removed.
+        """
+        filters: List[CanFilter] = []
+        for view in self.views:
+            if view.filters is None:
+                self.bus.set_filters(None)
+                return
+            filters.extend(view.filters)
+        self.bus.set_filters(filters)
+
+    def shutdown(self) -> None:
+        for view in self.views:
+            view.shutdown()
+        self._tx_queue.put(None)
+        self._writer.join()
+        if self.notifier is not None:
+            self.notifier.stop()
+        self.bus.shutdown()
+
+    def _write_loop(self) -> None:
+        while True:
+            msg = self._tx_queue.get()
+            if msg is None:
+                return
+            try:
+                self.write(msg)
+            except can.CanError:
+                logger.exception("Failed to send on %s", self.channel)
+
+
+class BusView(can.BusABC):
+    """A per-part view of a shared channel.
+
+    Sends go through the writer worker of the channel, while everything else
+    is delegated to the underlying bus.
+    """
+
+    def __init__(
+        self,
+        channel: CanChannel,
+        motor_ids: Iterable[int] = (),
+        filter_builder: Optional[FilterBuilder] = None,
+    ) -> None:
+        """Initializes the view.
+
+        Args:
+            channel: The shared channel.
+            motor_ids: The IDs of the motors reached through this view.
+            filter_builder: Builds the receive filters for the motor IDs, if
+                None then the view receives every frame.
+        """
+        self.shared = channel
+        self.motor_ids: List[int] = list(motor_ids)
+        self.filter_builder = filter_builder
+        self.channel_info = f"{channel.channel} view"
+        channel.views.append(self)
+        super().__init__(channel=channel.channel, can_filters=self._build_filters())
+
+    def add_motor(self, motor_id: int) -> None:
+        if motor_id not in self.motor_ids:
+            self.motor_ids.append(motor_id)
+            self.set_filters(self._build_filters())
+
+    def remove_motor(self, motor_id: int) -> None:
+        if motor_id in self.motor_ids:
+            self.motor_ids.remove(motor_id)
+            self.set_filters(self._build_filters())
+
+    def _build_filters(self) -> Optional[CanFilters]:
+        if self.filter_builder is None:
+            return None
+        return self.filter_builder(self.motor_ids)
+
+    def _apply_filters(self, filters: Optional[CanFilters]) -> None:
+        self.shared.update_filters()
+
+    def send(self, msg: can.Message, timeout: Optional[float] = None) -> None:
+        self.shared.send(msg)
+
+    def _recv_internal(self, timeout: Optional[float]) -> Tuple[Optional[can.Message], bool]:
+        return self.shared.bus.recv(timeout), False
+
+    def _send_periodic_internal(self, *args: Any, **kwargs: Any) -> can.broadcastmanager.CyclicSendTaskABC:
+        # Periodic frames bypass the writer worker, so socketcan hands them to the kernel broadcast manager.
+        return self.shared.bus._send_periodic_internal(*args, **kwargs)
+
+    def shutdown(self) -> None:
+        # The shared channel is closed by its pool.
+        super().shutdown()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.shared.bus, name)
+
+
+class BusPool:
+    """Opens each CAN channel at most once and hands out views of it."""
+
+    def __init__(self, interface: str = "socketcan") -> None:
+        self.interface = interface
+        self.channels: Dict[str, CanChannel] = {}
+
+    def get(self, channel: str) -> CanChannel:
+        if channel not in self.channels:
+            self.channels[channel] = CanChannel(channel, self.interface)
+        return self.channels[channel]
+
+    def view(
+        self,
+        channel: str,
+        motor_ids: Iterable[int] = (),
+        filter_builder: Optional[FilterBuilder] = None,
+    ) -> BusView:
+        """Returns a new view of a channel, opening the channel if needed.
+
+        Args:
+            channel: The name of the channel, like "can0".
+            motor_ids: The IDs of the motors reached through the view.
+            filter_builder: Builds the receive filters for the motor IDs.
+
+        Returns:
+            The view of the shared channel.
+        """
+        return BusView(self.get(channel), motor_ids, filter_builder)
+
+    def shutdown(self) -> None:
+        for channel in self.channels.values():
+            channel.shutdown()
+        self.channels.clear()
@@ -0,0 +1,56 @@
+"""Builds kernel-side CAN receive filters from the configured motor IDs.
+
+The filters use the python-can format, a list of dictionaries with
+`can_id`, `can_mask` and `extended` keys. Installing them on a socketcan
+socket means frames from unrelated devices never wake up a Python reader.
+"""
+
+from typing import TYPE_CHECKING, Iterable, List
+
+if TYPE_CHECKING:
+    from can.typechecking import CanFilter
+
+CAN_SFF_MASK = 0x7FF
+
+# Robstride replies put the motor ID in bits 8-15 and the host ID in bits 0-7.
+ROBSTRIDE_ID_MASK = 0xFFFF
+ROBSTRIDE_MSG_TYPE_MASK = 0x1F000000
+ROBSTRIDE_INFO_HOST_ID = 0xFE
+DEFAULT_HOST_CAN_ID = 0xAA
+
+
+def bionic_filters(motor_ids: Iterable[int]) -> List["CanFilter"]:
+    """Returns filters accepting replies from the given bionic motors.
+
+    Args:
+        motor_ids: The IDs of the motors, which reply with their ID as the
+            standard arbitration ID.
+
+    Returns:
+        One exact-match filter per motor.
+    """
+    return [{"can_id": motor_id, "can_mask": CAN_SFF_MASK, "extended": False} for motor_id in sorted(set(motor_ids))]
+
+
+def robstride_filters(motor_ids: Iterable[int], host_can_id: int = DEFAULT_HOST_CAN_ID) -> List["CanFilter"]:
+    """Returns filters accepting replies from the given Robstride motors to the host.
+
+    Args:
+        motor_ids: The IDs of the motors.
+        host_can_id: The CAN ID of the host.
+
+    Returns:
+        A filter per motor for replies addressed to the host, plus one for
+        the device info reply, which is addressed to 0xFE instead.
+    """
+    filters: List["CanFilter"] = []
+    for motor_id in sorted(set(motor_ids)):
+        filters.append({"can_id": (motor_id << 8) | host_can_id, "can_mask": ROBSTRIDE_ID_MASK, "extended": True})
+        filters.append(
+            {
+                "can_id": (motor_id << 8) | ROBSTRIDE_INFO_HOST_ID,
+                "can_mask": ROBSTRIDE_MSG_TYPE_MASK | ROBSTRIDE_ID_MASK,
+                "extended": True,
+            }
+        )
+    return filters
@@ -0,0 +1,90 @@
+"""Defines preallocated CAN frames which are patched in place before sending.
+
+A `FrameBuffer` holds the raw bytes of a socketcan `struct can_frame`. The
+payload (and, if needed, the arbitration ID) is overwritten in place, and the
+frame is sent without creating a `can.Message` or any intermediate lists per
+call. On a view of a shared channel, the buffer is written to the socket of the
+channel from the calling thread, under the send lock it shares with the writer
+worker. Other buses with a raw socket get the frame written to the socket
+directly, and buses without one fall back to a preallocated `can.Message`.
+"""
+
+import socket
+import struct
+from typing import Optional
+
+import can
+
+from firmware.motor_utils.bus_pool import BusView, CanChannel, send_raw
+
+# Layout of `struct can_frame` from linux/can.h.
+CAN_FRAME_HEADER = struct.Struct("=IB")
+CAN_FRAME_SIZE = 16
+CAN_DATA_OFFSET = 8
+
+CAN_EFF_FLAG = 0x80000000
+
+
+class FrameBuffer:
+    """A preallocated CAN frame for one motor and command type."""
+
+    def __init__(self, arbitration_id: int, length: int = 8, is_extended_id: bool = False) -> None:
+        """Initializes the frame.
+
+        Args:
+            arbitration_id: The arbitration ID of the frame.
+            length: The length of the payload, in bytes.
+            is_extended_id: Whether the arbitration ID is a 29-bit extended ID.
+        """
+        self.length = length
+        self.is_extended_id = is_extended_id
+        self.buffer = bytearray(CAN_FRAME_SIZE)
+        self.data = memoryview(self.buffer)[CAN_DATA_OFFSET : CAN_DATA_OFFSET + length]
+        self.message = can.Message(arbitration_id=arbitration_id, data=bytearray(length), is_extended_id=is_extended_id)
+        self._arbitration_id = -1
+        self._bus: Optional[can.BusABC] = None
+        self._channel: Optional[CanChannel] = None
+        self._sock: Optional[socket.socket] = None
+        self.arbitration_id = arbitration_id
+
+    @property
+    def arbitration_id(self) -> int:
+        return self._arbitration_id
+
+    @arbitration_id.setter
+    def arbitration_id(self, arbitration_id: int) -> None:
+        if arbitration_id == self._arbitration_id:
+            return
+        self._arbitration_id = arbitration_id
+        can_id = arbitration_id | CAN_EFF_FLAG if self.is_extended_id else arbitration_id
+        CAN_FRAME_HEADER.pack_into(self.buffer, 0, can_id, self.length)
+        self.message.arbitration_id = arbitration_id
+
+    def send(self, bus: can.BusABC) -> None:
+        """Sends the current contents of the frame.
+
+        Args:
+            bus: The bus to send on. Views of a shared channel and other buses
+                which expose a raw socketcan socket get the frame written to
+                the socket directly, so it can be patched again as soon as this
+                returns.
+
+        Raises:
+            can.CanError: If the write fails, like `SocketcanBus.send`.
+        """
+        if bus is not self._bus:
+            self._bus = bus
+            self._channel = bus.shared if isinstance(bus, BusView) else None
+            sock = getattr(bus, "socket", None)
+            self._sock = sock if isinstance(sock, socket.socket) else None
+        if self._channel is not None:
+            if self._channel.raw_socket is not None:
+                self._channel.write_frame(self.buffer)
+            else:
+                self.message.data[:] = self.data
+                self._channel.write(self.message)
+        elif self._sock is not None:
+            send_raw(self._sock, self.buffer)
+        else:
+            self.message.data[:] = self.data
+            bus.send(self.message)
@@ -1,36 +1,163 @@
-"""Motor factory module. Contains a factory class to create motor objects based on configuration."""
+"""Motor factory module. Contains a factory class to create motor objects based on configuration.
 
-from typing import Any
+Each motor type is provided by a backend, a function which creates a motor from
+its config parameters, and an interface factory, a function which opens the
+communication interface shared by the motors of the type on one CAN bus. Both
+are referenced as `module:function` strings, like entry points, and their
+module is only imported the first time they are used, so a robot or tool which
+uses one motor type never loads the stack of the others. The built-in types are
+listed in `BUILTIN_BACKENDS` and `BUILTIN_INTERFACE_FACTORIES`, and other
+packages can add motor types through the `firmware.motors` and
+`firmware.motor_interfaces` entry point groups, which are only scanned for
+types that are not registered otherwise.
+"""
+
+import importlib
+from typing import Any, Callable, Dict, List, Optional, Union
 
-from firmware.bionic_motors.motors import BionicMotor, ControlParams
 from firmware.motor_utils.motor_utils import MotorInterface
-from firmware.robstride_motors.motors import RobstrideMotor, RobstrideParams
+
+ENTRY_POINT_GROUP = "firmware.motors"
+INTERFACE_ENTRY_POINT_GROUP = "firmware.motor_interfaces"
+
+# Called with the motor ID, the config parameters, the communication interface, and `initialize` and
+# `control_mode` as keywords.
+MotorBackend = Callable[..., MotorInterface]
+
+# Called with the bus pool, the CAN bus ID, the IDs of the motors on the bus and the host CAN ID.
+InterfaceFactory = Callable[..., Any]
+
+BUILTIN_BACKENDS = {
+    "bionic": "firmware.bionic_motors.motors:create_motor",
+    "robstride": "firmware.robstride_motors.motors:create_motor",
+}
+
+BUILTIN_INTERFACE_FACTORIES = {
+    "bionic": "firmware.bionic_motors.motors:create_interface",
+    "robstride": "firmware.robstride_motors.motors:create_interface",
+}
+
+
+def _entry_points(group: str) -> Dict[str, str]:
+    # Importing the metadata machinery takes longer than the rest of the factory, so only types
+    # which are not built in pay for it.
+    from importlib.metadata import entry_points  # noqa: PLC0415
+
+    eps: Any = entry_points()
+    selected = eps.select(group=group) if hasattr(eps, "select") else eps.get(group, [])
+    return {ep.name: ep.value for ep in selected}
+
+
+def _load(target: str) -> Callable[..., Any]:
+    module_name, _, attr = target.partition(":")
+    loaded = importlib.import_module(module_name)
+    for name in attr.split("."):
+        loaded = getattr(loaded, name)
+    return loaded  # type: ignore[return-value]
 
 
 class MotorFactory:
-    @staticmethod
-    def create_motor(motor: str, motor_id: int, control_params: Any, communication_interface: Any) -> MotorInterface:
-        if motor == "bionic":
-            bionic_params = ControlParams(
-                kp=control_params["kp"],
-                kd=control_params["kd"],
-            )
-
-            return BionicMotor(motor_id, bionic_params, communication_interface)
-        elif motor == "robstride":
-            robstride_params = RobstrideParams(
-                limit_torque=control_params["limit_torque"],
-                cur_kp=control_params["cur_kp"],
-                cur_ki=control_params["cur_ki"],
-                cur_fit_gain=control_params["cur_fit_gain"],
-                limit_spd=control_params["limit_spd"],
-                limit_cur=control_params["limit_cur"],
-                loc_kp=control_params["loc_kp"],
-                spd_kp=control_params["spd_kp"],
-                spd_ki=control_params["spd_ki"],
-                spd_filt_gain=control_params["spd_filt_gain"],
-            )
-
-            return RobstrideMotor(motor_id, robstride_params, communication_interface)
-        else:
+    _backends: Dict[str, Union[str, MotorBackend]] = dict(BUILTIN_BACKENDS)
+    _interface_factories: Dict[str, Union[str, InterfaceFactory]] = dict(BUILTIN_INTERFACE_FACTORIES)
+    _entry_points_scanned = False
+
+    @classmethod
+    def register_backend(
+        cls,
+        motor: str,
+        backend: Union[str, MotorBackend],
+        interface_factory: Optional[Union[str, InterfaceFactory]] = None,
+    ) -> None:
+        """Registers the backend of a motor type, replacing any previous one.
+
+        Args:
+            motor: The motor type, as written in the `motor_type` of the config.
+            backend: The function creating the motors, or its `module:function` path to import it lazily.
+            interface_factory: The function opening the communication interface of a bus, or its
+                `module:function` path. Only needed for robots built from the config.
+        """
+        cls._backends[motor] = backend
+        if interface_factory is not None:
+            cls._interface_factories[motor] = interface_factory
+
+    @classmethod
+    def _scan_entry_points(cls) -> None:
+        if cls._entry_points_scanned:
+            return
+        cls._entry_points_scanned = True
+        for motor, target in _entry_points(ENTRY_POINT_GROUP).items():
+            cls._backends.setdefault(motor, target)
+        for motor, target in _entry_points(INTERFACE_ENTRY_POINT_GROUP).items():
+            cls._interface_factories.setdefault(motor, target)
+
+    @classmethod
+    def backends(cls) -> List[str]:
+        """Returns every available motor type, without importing their backends."""
+        cls._scan_entry_points()
+        return sorted(cls._backends)
+
+    @classmethod
+    def has_backend(cls, motor: str) -> bool:
+        """Returns whether a motor type is available, only scanning the entry points if it is not built in.
+
+        Args:
+            motor: The motor type.
+        """
+        if motor not in cls._backends:
+            cls._scan_entry_points()
+        return motor in cls._backends
+
+    @classmethod
+    def get_backend(cls, motor: str) -> MotorBackend:
+        """Returns the backend of a motor type, importing it on first use.
+
+        Args:
+            motor: The motor type.
+
+        Returns:
+            The function creating motors of the type.
+        """
+        if not cls.has_backend(motor):
             raise ValueError(f"Motor type {motor} not recognized.")
+        backend = cls._backends[motor]
+        if isinstance(backend, str):
+            backend = cls._backends[motor] = _load(backend)
+        return backend
+
+    @classmethod
+    def get_interface_factory(cls, motor: str) -> InterfaceFactory:
+        """Returns the interface factory of a motor type, importing it on first use.
+
+        Args:
+            motor: The motor type.
+
+        Returns:
+            The function opening the communication interface of a bus.
+        """
+        if motor not in cls._interface_factories:
+            cls._scan_entry_points()
+        factory = cls._interface_factories.get(motor)
+        if factory is None:
+            raise ValueError(f"Motor type {motor} has no interface factory.")
+        if isinstance(factory, str):
+            factory = cls._interface_factories[motor] = _load(factory)
+        return factory
+
+    @classmethod
+    def create_motor(
+        cls,
+        motor: str,
+        motor_id: int,
+        control_params: Any,
+        communication_interface: Any,
+        *,
+        initialize: bool = True,
+        control_mode: str = "position",
+    ) -> MotorInterface:
+        return cls.get_backend(motor)(
+            motor_id,
+            control_params,
+            communication_interface,
+            initialize=initialize,
+            control_mode=control_mode,
+        )
@@ -0,0 +1,185 @@
+"""Tracks request-reply round-trip times and derives read windows from them.
+
+Instead of waiting a hard-coded time for every reply, callers ask the tracker
+for a timeout, which is a high percentile of the recent round-trip times of
+the motor plus a margin, clamped to a minimum and maximum. Until enough
+samples have been recorded, the initial timeout is used. A missed reply
+doubles the timeout of the motor until the next reply arrives, so a busy bus
+widens the window instead of losing every reply.
+"""
+
+import bisect
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class RttStats:
+    """Round-trip time statistics of one motor, in seconds."""
+
+    count: int
+    misses: int
+    mean: float
+    p50: float
+    p99: float
+    max: float
+    timeout: float
+
+    @property
+    def miss_rate(self) -> float:
+        total = self.count + self.misses
+        return self.misses / total if total else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.count} replies, {self.misses} missed, rtt mean {self.mean * 1e3:.3f} ms / "
+            f"p50 {self.p50 * 1e3:.3f} ms / p99 {self.p99 * 1e3:.3f} ms / max {self.max * 1e3:.3f} ms, "
+            f"timeout {self.timeout * 1e3:.3f} ms"
+        )
+
+
+class _Samples:
+    def __init__(self, window: int) -> None:
+        self.rtts: Deque[float] = deque(maxlen=window)
+        # The same samples kept in order, so percentiles are looked up without sorting the window.
+        self.sorted_rtts: List[float] = []
+        self.count = 0
+        self.misses = 0
+        self.backoff = 1.0
+        self.timeout: Optional[float] = None
+
+    def add(self, rtt: float) -> None:
+        if len(self.rtts) == self.rtts.maxlen:
+            del self.sorted_rtts[bisect.bisect_left(self.sorted_rtts, self.rtts[0])]
+        self.rtts.append(rtt)
+        bisect.insort(self.sorted_rtts, rtt)
+
+
+class RttTracker:
+    """Keeps a sliding window of round-trip times per motor."""
+
+    def __init__(
+        self,
+        *,
+        initial: float = 0.005,
+        minimum: float = 0.0005,
+        maximum: float = 0.05,
+        percentile: float = 0.99,
+        margin: float = 0.0005,
+        window: int = 256,
+        min_samples: int = 8,
+    ) -> None:
+        """Initializes the tracker.
+
+        Args:
+            initial: The timeout used until enough samples are recorded, in seconds.
+            minimum: The lower bound of the timeout, in seconds.
+            maximum: The upper bound of the timeout, in seconds.
+            percentile: The percentile of the round-trip times the timeout is based on.
+            margin: Added to the percentile, in seconds.
+            window: The number of recent samples kept for each motor.
+            min_samples: The number of samples needed before the timeout is adapted.
+        """
+        if not 0.0 < minimum <= maximum:
+            raise ValueError(f"Invalid timeout bounds [{minimum}, {maximum}]")
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.percentile = percentile
+        self.margin = margin
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[int, _Samples] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, motor_id: int) -> _Samples:
+        samples = self._samples.get(motor_id)
+        if samples is None:
+            samples = self._samples.setdefault(motor_id, _Samples(self.window))
+        return samples
+
+    def record(self, motor_id: int, rtt: float) -> None:
+        """Records the round-trip time of a reply.
+
+        Args:
+            motor_id: The ID of the motor the reply came from.
+            rtt: The time between sending the request and receiving the reply, in seconds.
+        """
+        with self._lock:
+            samples = self._get(motor_id)
+            samples.add(rtt)
+            samples.count += 1
+            samples.backoff = 1.0
+            samples.timeout = None
+
+    def record_miss(self, motor_id: int) -> None:
+        """Records a request whose reply did not arrive before its timeout.
+
+        Args:
+            motor_id: The ID of the motor the reply was expected from.
+        """
+        with self._lock:
+            samples = self._get(motor_id)
+            samples.misses += 1
+            samples.backoff = min(samples.backoff * 2.0, 1024.0)
+            samples.timeout = None
+
+    def timeout(self, motor_id: int) -> float:
+        """Returns how long to wait for a reply from a motor.
+
+        Args:
+            motor_id: The ID of the motor to wait for.
+
+        Returns:
+            The timeout, in seconds.
+        """
+        samples = self._samples.get(motor_id)
+        if samples is None:
+            return self.initial
+        cached = samples.timeout
+        if cached is not None:
+            return cached
+        with self._lock:
+            if len(samples.rtts) < self.min_samples:
+                base = self.initial
+            else:
+                base = _quantile(samples.sorted_rtts, self.percentile) + self.margin
+            samples.timeout = max(self.minimum, min(self.maximum, base * samples.backoff))
+            return samples.timeout
+
+    def stats(self, motor_id: int) -> RttStats:
+        """Returns the round-trip time statistics of a motor.
+
+        Args:
+            motor_id: The ID of the motor to describe.
+
+        Returns:
+            The statistics over the recent samples, all zero if there are none.
+        """
+        timeout = self.timeout(motor_id)
+        with self._lock:
+            samples = self._samples.get(motor_id)
+            if samples is None or not samples.rtts:
+                return RttStats(0, samples.misses if samples else 0, 0.0, 0.0, 0.0, 0.0, timeout)
+            rtts = samples.sorted_rtts
+            return RttStats(
+                samples.count,
+                samples.misses,
+                sum(rtts) / len(rtts),
+                _quantile(rtts, 0.5),
+                _quantile(rtts, 0.99),
+                rtts[-1],
+                timeout,
+            )
+
+    def summary(self) -> Dict[int, RttStats]:
+        """Returns the statistics of every motor seen so far."""
+        return {motor_id: self.stats(motor_id) for motor_id in list(self._samples)}
+
+
+def _quantile(values: list, q: float) -> float:
+    # Nearest-rank quantile of sorted values.
+    return values[min(len(values) - 1, max(0, math.ceil(q * len(values)) - 1))]
@@ -0,0 +1,58 @@
+"""Defines the base class for asyncio CAN transports."""
+
+from abc import ABC, abstractmethod
+from types import TracebackType
+from typing import NamedTuple, Optional, Type
+
+
+class CanFrame(NamedTuple):
+    id: int
+    data: bytes
+    is_extended_id: bool = False
+
+
+class CanBase(ABC):
+    """An asyncio CAN transport.
+
+    Transports are used as async context managers, and only need to implement
+    sending and receiving single frames. Matching replies to requests is done
+    by `firmware.motors.motor.Motors`.
+    """
+
+    async def __aenter__(self) -> "CanBase":
+        await self.open()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        """Opens the underlying interface."""
+        pass
+
+    async def close(self) -> None:
+        """Closes the underlying interface."""
+        pass
+
+    @abstractmethod
+    async def send(self, id: int, data: bytes, is_extended_id: bool = False) -> None:
+        """Sends a single frame.
+
+        Args:
+            id: The arbitration ID of the frame.
+            data: The payload, up to 8 bytes.
+            is_extended_id: Whether the arbitration ID is a 29-bit extended ID.
+        """
+
+    @abstractmethod
+    async def recv(self) -> CanFrame:
+        """Waits for the next frame on the bus.
+
+        Returns:
+            The received frame.
+        """
@@ -0,0 +1,45 @@
+"""Defines a CAN transport wrapper which calls back on every frame."""
+
+from typing import Awaitable, Callable, Optional
+
+from firmware.motors.can.base import CanBase, CanFrame
+
+Callback = Callable[[int, bytes], Awaitable[None]]
+
+
+class CanWithCallback(CanBase):
+    """Wraps another transport and awaits a callback for each sent or received frame."""
+
+    def __init__(
+        self,
+        can: CanBase,
+        send_callback: Optional[Callback] = None,
+        recv_callback: Optional[Callback] = None,
+    ) -> None:
+        """Initializes the wrapper.
+
+        Args:
+            can: The transport to wrap.
+            send_callback: Called with the ID and payload of every sent frame.
+            recv_callback: Called with the ID and payload of every received frame.
+        """
+        self.can = can
+        self.send_callback = send_callback
+        self.recv_callback = recv_callback
+
+    async def open(self) -> None:
+        await self.can.open()
+
+    async def close(self) -> None:
+        await self.can.close()
+
+    async def send(self, id: int, data: bytes, is_extended_id: bool = False) -> None:
+        await self.can.send(id, data, is_extended_id)
+        if self.send_callback is not None:
+            await self.send_callback(id, data)
+
+    async def recv(self) -> CanFrame:
+        frame = await self.can.recv()
+        if self.recv_callback is not None:
+            await self.recv_callback(frame.id, frame.data)
+        return frame
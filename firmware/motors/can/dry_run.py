@@ -0,0 +1,39 @@
+"""Defines a CAN transport which does not touch any hardware."""
+
+import asyncio
+from typing import Callable, Iterable, List, Optional
+
+from firmware.motors.can.base import CanBase, CanFrame
+
+Responder = Callable[[CanFrame], Iterable[CanFrame]]
+
+
+class CanDryRun(CanBase):
+    """Records sent frames and replays frames from an optional responder.
+
+    The responder is called with every sent frame and returns the frames the
+    simulated motors would reply with. Frames can also be injected directly.
+    """
+
+    def __init__(self, responder: Optional[Responder] = None) -> None:
+        self.responder = responder
+        self.sent: List[CanFrame] = []
+        self._queue: "asyncio.Queue[CanFrame]" = asyncio.Queue()
+
+    def inject(self, frame: CanFrame) -> None:
+        """Queues a frame to be returned by `recv`.
+
+        Args:
+            frame: The frame to queue.
+        """
+        self._queue.put_nowait(frame)
+
+    async def send(self, id: int, data: bytes, is_extended_id: bool = False) -> None:
+        frame = CanFrame(id, bytes(data), is_extended_id)
+        self.sent.append(frame)
+        if self.responder is not None:
+            for response in self.responder(frame):
+                self.inject(response)
+
+    async def recv(self) -> CanFrame:
+        return await self._queue.get()
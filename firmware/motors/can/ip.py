@@ -0,0 +1,102 @@
+"""Defines a non-blocking socketcan transport driven by the asyncio event loop."""
+
+import asyncio
+import socket
+import struct
+from typing import Optional, Tuple
+
+from can.typechecking import CanFilter, CanFilters
+
+from firmware.motors.can.base import CanBase, CanFrame
+
+# Layout of `struct can_frame` and `struct can_filter` from linux/can.h.
+CAN_FRAME = struct.Struct("=IB3x8s")
+CAN_FILTER = struct.Struct("=II")
+
+CAN_EFF_FLAG = 0x80000000
+CAN_RTR_FLAG = 0x40000000
+CAN_ERR_FLAG = 0x20000000
+CAN_EFF_MASK = 0x1FFFFFFF
+CAN_SFF_MASK = 0x000007FF
+
+
+class CanIP(CanBase):
+    """Reads and writes frames on a raw socketcan socket without blocking.
+
+    Reads and writes are awaited through the event loop, so a single loop can
+    service many motors on several buses without a thread per bus.
+    """
+
+    def __init__(self, channel: str = "can0", filters: Optional[CanFilters] = None) -> None:
+        """Initializes the transport.
+
+        Args:
+            channel: The name of the socketcan interface, like "can0".
+            filters: Receive filters in the python-can format, installed in
+                the kernel when the socket is opened. None receives every frame.
+        """
+        self.channel = channel
+        self.filters = filters
+        self._sock: Optional[socket.socket] = None
+
+    async def open(self) -> None:
+        if self._sock is not None:
+            return
+        sock = socket.socket(socket.PF_CAN, socket.SOCK_RAW, socket.CAN_RAW)
+        sock.bind((self.channel,))
+        sock.setblocking(False)
+        self._sock = sock
+        self.set_filters(self.filters)
+
+    def set_filters(self, filters: Optional[CanFilters]) -> None:
+        """Installs receive filters on the socket, replacing the previous ones.
+
+        Args:
+            filters: Receive filters in the python-can format, or None to
+                receive every frame.
+        """
+        self.filters = filters
+        if self._sock is None:
+            return
+        if filters is None:
+            packed = CAN_FILTER.pack(0, 0)
+        else:
+            packed = b"".join(CAN_FILTER.pack(*self._pack_filter(f)) for f in filters)
+        self._sock.setsockopt(socket.SOL_CAN_RAW, socket.CAN_RAW_FILTER, packed)
+
+    async def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    @property
+    def sock(self) -> socket.socket:
+        if self._sock is None:
+            raise RuntimeError(f"CAN channel {self.channel} is not open")
+        return self._sock
+
+    @staticmethod
+    def _pack_filter(can_filter: CanFilter) -> Tuple[int, int]:
+        can_id, can_mask = can_filter["can_id"], can_filter["can_mask"]
+        if "extended" in can_filter:
+            # Matches on the frame format as well as the ID bits.
+            can_mask |= CAN_EFF_FLAG
+            if can_filter["extended"]:
+                can_id |= CAN_EFF_FLAG
+        return can_id, can_mask
+
+    async def send(self, id: int, data: bytes, is_extended_id: bool = False) -> None:
+        can_id = (id & CAN_EFF_MASK) | CAN_EFF_FLAG if is_extended_id else id & CAN_SFF_MASK
+        frame = CAN_FRAME.pack(can_id, len(data), data.ljust(8, b"\x00"))
+        await asyncio.get_running_loop().sock_sendall(self.sock, frame)
+
+    async def recv(self) -> CanFrame:
+        loop = asyncio.get_running_loop()
+        while True:
+            frame = await loop.sock_recv(self.sock, CAN_FRAME.size)
+            can_id, length, data = CAN_FRAME.unpack(frame)
+            if can_id & (CAN_ERR_FLAG | CAN_RTR_FLAG):
+                continue
+            if can_id & CAN_EFF_FLAG:
+                return CanFrame(can_id & CAN_EFF_MASK, data[:length], True)
+            return CanFrame(can_id & CAN_SFF_MASK, data[:length], False)
@@ -0,0 +1,298 @@
+"""Defines an asyncio interface for talking to many motors over one CAN transport.
+
+A single reader task receives every frame from the transport and resolves the
+future of the request it answers. Requests are matched by a protocol-specific
+key, so any number of requests to different motors can be in flight at once,
+and one event loop can drive several buses concurrently.
+"""
+
+import asyncio
+import logging
+import struct
+from abc import ABC, abstractmethod
+from collections import deque
+from types import TracebackType
+from typing import Callable, Deque, Dict, Hashable, Iterable, List, Optional, Type
+
+from firmware.bionic_motors.commands import (
+    MOTOR_CURRENT_QUERY,
+    MOTOR_POS_QUERY,
+    MOTOR_SPEED_QUERY,
+    force_position_hybrid_control,
+    set_zero_position,
+)
+from firmware.bionic_motors.responses import decode_query, valid_message
+from firmware.motors.can.base import CanBase, CanFrame
+from firmware.robstride_motors.client import (
+    FeedbackResp,
+    MotorMsg,
+    RunMode,
+    decode_read_param,
+    encode_write_param,
+    param_ids_by_name,
+    parse_feedback,
+)
+
+BIONIC_SPECIAL_IDENTIFIER = 0x7FF
+
+logger = logging.getLogger(__name__)
+
+
+class Motors(ABC):
+    """Matches frames received on a transport to outstanding requests.
+
+    The base class matches replies by arbitration ID; subclasses define the
+    request keys for a specific motor protocol and how to probe a motor.
+    """
+
+    def __init__(self, can: CanBase, timeout: float = 1.0) -> None:
+        """Initializes the interface.
+
+        Args:
+            can: The CAN transport to use.
+            timeout: The default timeout for each request, in seconds.
+        """
+        self.can = can
+        self.timeout = timeout
+        self.frame_callbacks: List[Callable[[CanFrame], None]] = []
+        self._pending: Dict[Hashable, Deque[asyncio.Future]] = {}
+        self._reader: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "Motors":
+        await self.can.open()
+        self._reader = asyncio.create_task(self._read_loop())
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[TracebackType],
+    ) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+        for futures in self._pending.values():
+            for future in futures:
+                future.cancel()
+        self._pending.clear()
+        await self.can.close()
+
+    def frame_key(self, frame: CanFrame) -> Optional[Hashable]:
+        """Returns the key of the request a received frame answers.
+
+        Args:
+            frame: The received frame.
+
+        Returns:
+            The request key, or None if the frame is not a reply.
+        """
+        return frame.id
+
+    async def send(self, id: int, data: bytes, is_extended_id: bool = False) -> None:
+        await self.can.send(id, data, is_extended_id)
+
+    async def request(
+        self,
+        id: int,
+        data: bytes,
+        key: Hashable,
+        is_extended_id: bool = False,
+        timeout: Optional[float] = None,
+    ) -> CanFrame:
+        """Sends a frame and waits for the reply matching a key.
+
+        Args:
+            id: The arbitration ID of the request.
+            data: The payload of the request.
+            key: The key of the expected reply, as returned by `frame_key`.
+            is_extended_id: Whether the arbitration ID is a 29-bit extended ID.
+            timeout: How long to wait for the reply, defaults to `self.timeout`.
+
+        Returns:
+            The reply frame.
+
+        Raises:
+            asyncio.TimeoutError: If no reply arrives in time.
+        """
+        if self._reader is not None and self._reader.done():
+            raise RuntimeError("The reader of the CAN transport has stopped")
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._pending.setdefault(key, deque()).append(future)
+        try:
+            await self.can.send(id, data, is_extended_id)
+            return await asyncio.wait_for(future, self.timeout if timeout is None else timeout)
+        finally:
+            futures = self._pending.get(key)
+            if futures is not None and future in futures:
+                futures.remove(future)
+                if not futures:
+                    del self._pending[key]
+
+    async def _read_loop(self) -> None:
+        while True:
+            try:
+                frame = await self.can.recv()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # The transport is broken, so fail the outstanding requests instead of leaving them to time out.
+                logger.exception("Failed to receive from the CAN transport")
+                for futures in self._pending.values():
+                    for future in futures:
+                        if not future.done():
+                            future.set_exception(e)
+                self._pending.clear()
+                return
+            try:
+                self._dispatch(frame)
+            except Exception:
+                logger.exception("Failed to handle frame %x#%s", frame.id, frame.data.hex())
+
+    def _dispatch(self, frame: CanFrame) -> None:
+        key = self.frame_key(frame)
+        futures = self._pending.get(key) if key is not None else None
+        while futures:
+            future = futures.popleft()
+            if not futures:
+                del self._pending[key]
+            if not future.done():
+                future.set_result(frame)
+                return
+        for callback in self.frame_callbacks:
+            callback(frame)
+
+    @abstractmethod
+    async def probe(self, motor_id: int, timeout: Optional[float] = None) -> None:
+        """Sends a read-only request to a motor and waits for its reply.
+
+        Args:
+            motor_id: The ID of the motor.
+            timeout: How long to wait for the reply, defaults to `self.timeout`.
+        """
+
+    async def get_ids(self, motor_ids: Iterable[int], timeout: float) -> List[int]:
+        """Probes motors concurrently and returns the ones that reply.
+
+        Args:
+            motor_ids: The IDs to probe.
+            timeout: How long to wait for each reply, in seconds.
+
+        Returns:
+            The IDs of the motors that replied, in order.
+        """
+        motor_ids = list(motor_ids)
+        results = await asyncio.gather(
+            *(self.probe(motor_id, timeout) for motor_id in motor_ids), return_exceptions=True
+        )
+        return [motor_id for motor_id, result in zip(motor_ids, results) if not isinstance(result, BaseException)]
+
+
+class BionicMotors(Motors):
+    """Asyncio interface for the bionic MyActuator motors."""
+
+    def frame_key(self, frame: CanFrame) -> Optional[Hashable]:
+        if frame.is_extended_id or not frame.data or not valid_message(frame.data):
+            return None
+        message_type = frame.data[0] >> 5
+        if message_type == 5:
+            return (frame.id, message_type, frame.data[1])
+        return (frame.id, message_type)
+
+    async def _query(self, motor_id: int, command: bytes, timeout: Optional[float]) -> float:
+        frame = await self.request(motor_id, command, (motor_id, 5, command[1]), timeout=timeout)
+        return decode_query(frame.data).data
+
+    async def get_position(self, motor_id: int, timeout: Optional[float] = None) -> float:
+        return await self._query(motor_id, MOTOR_POS_QUERY, timeout)
+
+    async def get_speed(self, motor_id: int, timeout: Optional[float] = None) -> float:
+        return await self._query(motor_id, MOTOR_SPEED_QUERY, timeout)
+
+    async def get_current(self, motor_id: int, timeout: Optional[float] = None) -> float:
+        return await self._query(motor_id, MOTOR_CURRENT_QUERY, timeout)
+
+    async def probe(self, motor_id: int, timeout: Optional[float] = None) -> None:
+        await self.get_position(motor_id, timeout)
+
+    async def set_position(
+        self, motor_id: int, position: float, kp: float, kd: float, *, speed: float = 0, torque: float = 0
+    ) -> None:
+        """Sends a force position hybrid control command without waiting for a reply.
+
+        Args:
+            motor_id: The ID of the motor.
+            position: The position to set the motor to, in degrees.
+            kp: The proportional gain.
+            kd: The derivative gain.
+            speed: The speed to set the motor to, in rpm.
+            torque: The feedforward torque in Nm.
+        """
+        command = force_position_hybrid_control(kp, kd, position, speed, int(torque))
+        await self.send(motor_id, bytes(command))
+
+    async def set_zero_position(self, motor_id: int) -> None:
+        await self.send(BIONIC_SPECIAL_IDENTIFIER, bytes(set_zero_position(motor_id)))
+
+
+class RobstrideMotors(Motors):
+    """Asyncio interface for the Robstride motors."""
+
+    def __init__(self, can: CanBase, timeout: float = 1.0, host_can_id: int = 0xAA, motor_model: int = 1) -> None:
+        super().__init__(can, timeout)
+        self.host_can_id = host_can_id
+        self.motor_model = motor_model
+
+    def frame_key(self, frame: CanFrame) -> Optional[Hashable]:
+        if not frame.is_extended_id or (frame.id & 0xFF) != self.host_can_id:
+            return None
+        msg_type = (frame.id & 0x1F000000) >> 24
+        motor_id = (frame.id & 0xFF00) >> 8
+        if msg_type == MotorMsg.ReadParam.value:
+            return (msg_type, motor_id, struct.unpack("<H", frame.data[:2])[0])
+        return (msg_type, motor_id, None)
+
+    async def _feedback_request(
+        self, msg_type: MotorMsg, motor_id: int, data: bytes, timeout: Optional[float]
+    ) -> FeedbackResp:
+        arb_id = motor_id + (self.host_can_id << 8) + (msg_type.value << 24)
+        key = (MotorMsg.Feedback.value, motor_id, None)
+        frame = await self.request(arb_id, data, key, is_extended_id=True, timeout=timeout)
+        return parse_feedback(frame.id, frame.data, motor_id, self.motor_model)
+
+    async def probe(self, motor_id: int, timeout: Optional[float] = None) -> None:
+        await self.read_param(motor_id, "mechpos", timeout)
+
+    async def enable(self, motor_id: int, timeout: Optional[float] = None) -> FeedbackResp:
+        return await self._feedback_request(MotorMsg.Enable, motor_id, bytes(8), timeout)
+
+    async def disable(self, motor_id: int, timeout: Optional[float] = None) -> FeedbackResp:
+        return await self._feedback_request(MotorMsg.Disable, motor_id, bytes(8), timeout)
+
+    async def zero_pos(self, motor_id: int, timeout: Optional[float] = None) -> FeedbackResp:
+        return await self._feedback_request(MotorMsg.ZeroPos, motor_id, bytes([1, 0, 0, 0, 0, 0, 0, 0]), timeout)
+
+    async def write_param(
+        self,
+        motor_id: int,
+        param_id: int | str,
+        param_value: float | RunMode | int,
+        timeout: Optional[float] = None,
+    ) -> FeedbackResp:
+        if isinstance(param_id, str):
+            param_id = param_ids_by_name[param_id]
+        data = encode_write_param(param_id, param_value)
+        return await self._feedback_request(MotorMsg.WriteParam, motor_id, data, timeout)
+
+    async def read_param(self, motor_id: int, param_id: int | str, timeout: Optional[float] = None) -> float | RunMode:
+        if isinstance(param_id, str):
+            param_id = param_ids_by_name[param_id]
+        arb_id = motor_id + (self.host_can_id << 8) + (MotorMsg.ReadParam.value << 24)
+        data = bytes([param_id & 0xFF, param_id >> 8, 0, 0, 0, 0, 0, 0])
+        key = (MotorMsg.ReadParam.value, motor_id, param_id)
+        frame = await self.request(arb_id, data, key, is_extended_id=True, timeout=timeout)
+        return decode_read_param(frame.data)
@@ -1,11 +1,17 @@
 """Simple async script to tick all motors back and forth by n degrees."""
 
 import time
-from typing import List
+from typing import Dict, List
 
 import can
 
-from firmware.bionic_motors.commands import force_position_hybrid_control, set_zero_position
+from firmware.bionic_motors.commands import (
+    force_position_hybrid_control,
+    force_position_hybrid_control_into,
+    set_zero_position,
+)
+from firmware.motor_utils.frames import FrameBuffer
+from firmware.robot.control_loop import ControlLoop
 
 DEFAULT_MAX_DPS = 360.0
 
@@ -46,6 +52,9 @@ class TestCanBus:
         self.delta = delta
         self.seq_timeout = seq_timeout
         self.hold_time = hold_time
+        self.hold_messages: Dict[int, can.Message] = {}
+        self.hold_tasks: Dict[int, can.ModifiableCyclicTaskABC] = {}
+        self.position_frames: Dict[int, FrameBuffer] = {idx: FrameBuffer(idx) for idx in motor_idxs}
 
     def _send(self, id: int, data: bytes, length: int = 8) -> None:
         """Sends a CAN message to a motor.
@@ -74,28 +83,44 @@ class TestCanBus:
             max_dps: The maximum velocity in degrees per second.
         """
         # data = set_position_control(id, location, max_speed=max_dps/6) # takes max RPM instead
-        data = force_position_hybrid_control(100, 4, location, 0, 0)
-        self._send(id, bytes(data))
+        if id not in self.position_frames:
+            self.position_frames[id] = FrameBuffer(id)
+        frame = self.position_frames[id]
+        force_position_hybrid_control_into(frame.data, 0, 100, 4, location, speed=0, torque_ff=0)
+        frame.send(self.write_bus)
 
     def hold_positions(self, positions: List[float]) -> None:
-        """Holds the given position for the specified hold time."""
+        """Holds the given positions by sending them periodically from the kernel.
+
+        The first call starts one periodic task per motor, later calls update
+        the payload of the running tasks in place.
+        """
         assert len(positions) == len(self.motor_idxs), "Number of positions must match number of motors"
-        time.time() + self.hold_time
-        # while time.time() < end_time:
         for idx, pos in zip(self.motor_idxs, positions):
-            time.sleep(self.seq_timeout)
-            self.set_relative_position(idx, pos)
+            data = bytes(force_position_hybrid_control(100, 4, pos, 0, 0))
+            if idx in self.hold_tasks:
+                self.hold_messages[idx].data[:] = data
+                self.hold_tasks[idx].modify_data(self.hold_messages[idx])
+            else:
+                self.hold_messages[idx] = can.Message(arbitration_id=idx, data=data, is_extended_id=False)
+                self.hold_tasks[idx] = self.write_bus.send_periodic(self.hold_messages[idx], self.seq_timeout)
+
+    def release_positions(self) -> None:
+        """Stops the periodic tasks started by `hold_positions`."""
+        for task in self.hold_tasks.values():
+            task.stop()
+        self.hold_tasks.clear()
+        self.hold_messages.clear()
 
     def send_positions(self) -> None:
-        """Sends the target positions to all motors and waits for the timeout period."""
+        """Sends the target positions to all motors, one every `seq_timeout`, and waits for the timeout period."""
         self.delta = -self.delta
-        start_time = time.time()
-        for idx in self.motor_idxs:
-            time.sleep(self.seq_timeout)
-            self.set_relative_position(idx, self.delta)
+        deadline = time.monotonic() + self.timeout
+        motors = iter(self.motor_idxs)
+        loop = ControlLoop(1.0 / self.seq_timeout, write=lambda _: self.set_relative_position(next(motors), self.delta))
+        loop.run(ticks=len(self.motor_idxs))
 
-        while (time.time() - start_time) < self.timeout:
-            time.sleep(time.time() - start_time)
+        time.sleep(max(0.0, deadline - time.monotonic()))
         print("Send all positions")
 
     def receive_messages(self) -> list:
@@ -134,19 +159,24 @@ class TestCanBus:
             increments = [1.4, 0, 0.8, -1, 0, 0]  # per tick increment size
             max_thresholds = [90, 0, 20, -70, 0, 0]  # max angle for arm raise
             min_angle = [20, 0, 0, 0, 0, 0]  # angle before next motor can move
-            while True:
-                print([int(pos) for pos in positions])
-                if positions[0] < min_angle[0]:
-                    positions[0] += increments[0]
-                else:
-                    positions = [
-                        pos + incr if abs(pos) < abs(thr) else pos
-                        for pos, incr, thr in zip(positions, increments, max_thresholds)
-                    ]
-                self.hold_positions([int(pos) for pos in positions])
-
-                # TODO:
-                # self._post_process_messages()
+            try:
+                while True:
+                    print([int(pos) for pos in positions])
+                    if positions[0] < min_angle[0]:
+                        positions[0] += increments[0]
+                    else:
+                        positions = [
+                            pos + incr if abs(pos) < abs(thr) else pos
+                            for pos, incr, thr in zip(positions, increments, max_thresholds)
+                        ]
+                    self.hold_positions([int(pos) for pos in positions])
+                    time.sleep(self.seq_timeout * len(self.motor_idxs))
+
+                    # TODO:
+                    # self._post_process_messages()
+            finally:
+                # Otherwise the kernel keeps sending the last setpoints after the loop exits.
+                self.release_positions()
 
     def _post_process_messages(self) -> None:
         """Processes received messages (placeholder for actual logic)."""
@@ -0,0 +1,335 @@
+"""Compiles the robot config files into immutable, precomputed structures.
+
+A config file like `config.yaml` or `teleop_configs.yaml` is parsed and
+validated once, and every setup in it is compiled into a `RobotConfig`: the
+joint order, and for every joint its bus, sign, limits and merged motor
+parameters. Compiled files are cached on disk as JSON, keyed on the hash of
+the file contents, so later launches with an unchanged file skip the YAML
+parsing and validation, and are also cached in memory for the life of the
+process. The cache only holds data, so a tampered cache file can at worst
+yield a wrong config, never run code.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from firmware.motor_utils.can_filters import DEFAULT_HOST_CAN_ID
+from firmware.motor_utils.motor_factory import MotorFactory
+
+logger = logging.getLogger(__name__)
+
+# Bump when the compiled structures change, so stale cache entries are not loaded.
+COMPILER_VERSION = 2
+
+CONTROL_MODES = ("position", "operation")
+BODY_PARTS = ("left_arm", "right_arm", "left_leg", "right_leg")
+PART_TABLES = ("signs", "increments", "maximum_values", "offsets")
+REQUIRED_PARAMS = {
+    "bionic": ("kp", "kd"),
+    "robstride": (
+        "limit_torque",
+        "cur_kp",
+        "cur_ki",
+        "cur_fit_gain",
+        "limit_spd",
+        "limit_cur",
+        "loc_kp",
+        "spd_kp",
+        "spd_ki",
+        "spd_filt_gain",
+    ),
+}
+# Operation mode sends the gains with every control frame, so they cannot be left out.
+CONTROL_MODE_PARAMS = {"operation": ("kp", "kd")}
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "kscale-firmware", "configs")
+
+
+@dataclass(frozen=True)
+class JointConfig:
+    part: str
+    motor_id: int
+    canbus_id: int
+    # Signs are already reversed for the left body parts.
+    sign: float
+    increment: float
+    maximum_value: float
+    offset: float
+    # The default parameters merged with the ones specific to the motor.
+    params: Tuple[Tuple[str, Any], ...]
+
+    @property
+    def params_dict(self) -> Dict[str, Any]:
+        return dict(self.params)
+
+
+@dataclass(frozen=True)
+class PartConfig:
+    name: str
+    kind: str
+    canbus_id: int
+    start_id: int
+    dof: int
+    # The range of the joints of the part in `RobotConfig.joints`.
+    joints: slice
+
+
+@dataclass(frozen=True)
+class RobotConfig:
+    setup: str
+    motor_type: str
+    control_mode: str
+    delta_change: float
+    host_can_id: int
+    parts: Tuple[PartConfig, ...]
+    joints: Tuple[JointConfig, ...]
+    # The setup as written in the file, for code which still reads the raw keys.
+    raw: Mapping[str, Any] = field(compare=False, hash=False)
+    # Maps each motor ID to the index of its joint.
+    index: Mapping[int, int] = field(compare=False, hash=False, default_factory=dict)
+
+    @property
+    def motor_ids(self) -> List[int]:
+        return [joint.motor_id for joint in self.joints]
+
+    def part(self, name: str) -> PartConfig:
+        for part in self.parts:
+            if part.name == name:
+                return part
+        raise KeyError(name)
+
+    def joint(self, motor_id: int) -> JointConfig:
+        return self.joints[self.index[motor_id]]
+
+    def part_joints(self, name: str) -> Tuple[JointConfig, ...]:
+        return self.joints[self.part(name).joints]
+
+
+def _require(mapping: Mapping[str, Any], key: str, where: str) -> Any:
+    if key not in mapping:
+        raise ValueError(f"Missing '{key}' in {where}")
+    return mapping[key]
+
+
+def compile_setup(setup_config: Mapping[str, Any]) -> RobotConfig:
+    """Validates one setup of a config file and compiles it.
+
+    Args:
+        setup_config: One entry of the `robots` list of the file.
+
+    Returns:
+        The compiled setup.
+    """
+    setup = _require(setup_config, "setup", "robot config")
+    where = f"setup '{setup}'"
+    motor_type = _require(setup_config, "motor_type", where)
+    if not MotorFactory.has_backend(motor_type):
+        raise ValueError(f"Unsupported motor type '{motor_type}' in {where}, expected one of {MotorFactory.backends()}")
+    control_mode = setup_config.get("control_mode", "position")
+    if control_mode not in CONTROL_MODES:
+        raise ValueError(f"Unsupported control mode '{control_mode}' in {where}")
+
+    params = _require(setup_config, "params", where)
+    defaults = next((param for param in params if param.get("motor_id") == "default"), None)
+    if defaults is None:
+        raise ValueError(f"Missing default params in {where}")
+    specific = {param["motor_id"]: param for param in params if param.get("motor_id") != "default"}
+
+    parts: List[PartConfig] = []
+    joints: List[JointConfig] = []
+    seen: Dict[Tuple[int, int], str] = {}
+    for name, part_config in _require(setup_config, "body_parts", where).items():
+        if name not in BODY_PARTS:
+            raise ValueError(f"Unsupported body part '{name}' in {where}, expected one of {BODY_PARTS}")
+        kind = "arm" if name.endswith("_arm") else "leg"
+        tables = _require(_require(setup_config, "motor_config", where), kind, f"motor_config of {where}")
+        # Parts without a dof use every joint listed for their kind.
+        dof = part_config.get("dof", len(_require(tables, "signs", f"{kind} motor_config of {where}")))
+        for table in PART_TABLES:
+            if len(_require(tables, table, f"{kind} motor_config of {where}")) < dof:
+                raise ValueError(f"'{table}' of {kind} in {where} has fewer than {dof} values for {name}")
+        start_id = _require(part_config, "start_id", f"{name} of {where}")
+        canbus_id = part_config.get("canbus_id", 0)
+        parity = -1 if name.startswith("left") else 1
+
+        parts.append(PartConfig(name, kind, canbus_id, start_id, dof, slice(len(joints), len(joints) + dof)))
+        for i in range(dof):
+            motor_id = start_id + i
+            if (canbus_id, motor_id) in seen:
+                raise ValueError(
+                    f"Motor {motor_id} on can{canbus_id} is used by {seen[canbus_id, motor_id]} and {name}"
+                )
+            seen[canbus_id, motor_id] = name
+            merged = {**defaults, **specific.get(motor_id, {})}
+            merged.pop("motor_id")
+            # The parameters of motor types from other packages are checked by their backend.
+            for param in (*REQUIRED_PARAMS.get(motor_type, ()), *CONTROL_MODE_PARAMS.get(control_mode, ())):
+                _require(merged, param, f"params of motor {motor_id} in {where}")
+            joints.append(
+                JointConfig(
+                    name,
+                    motor_id,
+                    canbus_id,
+                    float(parity * tables["signs"][i]),
+                    float(tables["increments"][i]),
+                    float(tables["maximum_values"][i]),
+                    float(tables["offsets"][i]),
+                    tuple(merged.items()),
+                )
+            )
+
+    return RobotConfig(
+        setup,
+        motor_type,
+        control_mode,
+        _require(setup_config, "delta_change", where),
+        setup_config.get("host_can_id", DEFAULT_HOST_CAN_ID),
+        tuple(parts),
+        tuple(joints),
+        copy.deepcopy(dict(setup_config)),
+        {joint.motor_id: i for i, joint in enumerate(joints)},
+    )
+
+
+def compile_config(text: str) -> Dict[str, RobotConfig]:
+    """Parses, validates and compiles every setup of a config file.
+
+    Args:
+        text: The contents of the file.
+
+    Returns:
+        The compiled setups, by name.
+    """
+    import yaml  # noqa: PLC0415 - only needed on a cache miss, see `load_config_file`
+
+    config = yaml.safe_load(text)
+    if not isinstance(config, dict):
+        raise ValueError("Config file must be a mapping with a 'robots' list")
+    return {
+        compiled.setup: compiled
+        for compiled in (compile_setup(setup) for setup in _require(config, "robots", "config"))
+    }
+
+
+def _to_json(compiled: RobotConfig) -> Dict[str, Any]:
+    return {
+        "setup": compiled.setup,
+        "motor_type": compiled.motor_type,
+        "control_mode": compiled.control_mode,
+        "delta_change": compiled.delta_change,
+        "host_can_id": compiled.host_can_id,
+        "parts": [{**vars(part), "joints": [part.joints.start, part.joints.stop]} for part in compiled.parts],
+        "joints": [vars(joint) for joint in compiled.joints],
+        "raw": compiled.raw,
+    }
+
+
+def _from_json(data: Mapping[str, Any]) -> RobotConfig:
+    parts = tuple(PartConfig(**{**part, "joints": slice(*part["joints"])}) for part in data["parts"])
+    joints = tuple(
+        JointConfig(**{**joint, "params": tuple((name, value) for name, value in joint["params"])})
+        for joint in data["joints"]
+    )
+    return RobotConfig(
+        data["setup"],
+        data["motor_type"],
+        data["control_mode"],
+        data["delta_change"],
+        data["host_can_id"],
+        parts,
+        joints,
+        data["raw"],
+        {joint.motor_id: i for i, joint in enumerate(joints)},
+    )
+
+
+def _read_cache(cache_path: str) -> Optional[Dict[str, RobotConfig]]:
+    try:
+        with open(cache_path, "r") as cache_file:
+            return {setup: _from_json(data) for setup, data in json.load(cache_file).items()}
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, IndexError, TypeError):
+        logger.warning("Ignoring unreadable config cache %s", cache_path, exc_info=True)
+        return None
+
+
+def _write_cache(cache_path: str, compiled: Dict[str, RobotConfig]) -> None:
+    try:
+        text = json.dumps({setup: _to_json(setup_config) for setup, setup_config in compiled.items()})
+    except (TypeError, ValueError):
+        logger.warning("Not caching %s, it holds values which JSON cannot represent", cache_path, exc_info=True)
+        return
+    # JSON turns other keys into strings and tuples into lists, so such setups are only cached in memory.
+    decoded = json.loads(text)
+    if any(_from_json(decoded[setup]).raw != setup_config.raw for setup, setup_config in compiled.items()):
+        return
+    cache_dir = os.path.dirname(cache_path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as tmp_file:
+            tmp_file.write(text)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        logger.warning("Could not write config cache %s", cache_path, exc_info=True)
+
+
+_compiled: Dict[str, Dict[str, RobotConfig]] = {}
+
+
+def load_config_file(path: str, cache_dir: Optional[str] = None) -> Dict[str, RobotConfig]:
+    """Returns the compiled setups of a config file, compiling it only if its contents are new.
+
+    Args:
+        path: The path of the config file.
+        cache_dir: Where compiled files are stored, defaults to `default_cache_dir`.
+            Pass an empty string to only cache in memory.
+
+    Returns:
+        The compiled setups, by name.
+    """
+    with open(path, "rb") as config_file:
+        contents = config_file.read()
+    digest = hashlib.sha256(contents + f"\n{COMPILER_VERSION}".encode()).hexdigest()
+    if digest in _compiled:
+        return _compiled[digest]
+
+    cache_dir = default_cache_dir() if cache_dir is None else cache_dir
+    cache_path = os.path.join(cache_dir, f"{digest}.json") if cache_dir else None
+    cached = _read_cache(cache_path) if cache_path is not None else None
+    if cached is not None:
+        _compiled[digest] = cached
+        return cached
+
+    compiled = compile_config(contents.decode())
+    _compiled[digest] = compiled
+    if cache_path is not None:
+        _write_cache(cache_path, compiled)
+    return compiled
+
+
+def load_robot_config(path: str, setup: str, cache_dir: Optional[str] = None) -> RobotConfig:
+    """Returns one compiled setup of a config file.
+
+    Args:
+        path: The path of the config file.
+        setup: The name of the setup.
+        cache_dir: Where compiled files are stored, see `load_config_file`.
+
+    Returns:
+        The compiled setup.
+    """
+    setups = load_config_file(path, cache_dir)
+    if setup not in setups:
+        raise ValueError(f"Setup '{setup}' not found in {path}, expected one of {sorted(setups)}")
+    return setups[setup]
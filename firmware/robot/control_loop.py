@@ -0,0 +1,169 @@
+"""Defines a fixed-rate control loop with monotonic deadlines.
+
+Each tick runs three phases: read the robot state, compute the commands and
+write them to the motors. Deadlines are computed on a fixed grid from the
+monotonic clock, so the time spent in each tick does not accumulate as drift.
+"""
+
+import enum
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+PHASES = ("read", "compute", "write")
+
+
+class OverrunPolicy(enum.Enum):
+    # Drop the missed ticks and wait for the next deadline on the grid.
+    Skip = "skip"
+    # Run the missed ticks back-to-back until the loop is on schedule again.
+    CatchUp = "catch_up"
+
+
+@dataclass
+class LoopStats:
+    """Jitter, overrun and phase timing statistics, in seconds."""
+
+    ticks: int = 0
+    overruns: int = 0
+    skipped: int = 0
+    max_jitter: float = 0.0
+    jitter_sum: float = 0.0
+    jitter_sq_sum: float = 0.0
+    max_tick_time: float = 0.0
+    phase_time_sums: Dict[str, float] = field(default_factory=lambda: {phase: 0.0 for phase in PHASES})
+
+    @property
+    def mean_jitter(self) -> float:
+        return self.jitter_sum / self.ticks if self.ticks else 0.0
+
+    @property
+    def std_jitter(self) -> float:
+        if not self.ticks:
+            return 0.0
+        return math.sqrt(max(0.0, self.jitter_sq_sum / self.ticks - self.mean_jitter**2))
+
+    @property
+    def mean_phase_times(self) -> Dict[str, float]:
+        return {phase: total / self.ticks if self.ticks else 0.0 for phase, total in self.phase_time_sums.items()}
+
+    def record(self, jitter: float, phase_times: Dict[str, float]) -> None:
+        self.ticks += 1
+        self.max_jitter = max(self.max_jitter, jitter)
+        self.jitter_sum += jitter
+        self.jitter_sq_sum += jitter * jitter
+        self.max_tick_time = max(self.max_tick_time, sum(phase_times.values()))
+        for phase, elapsed in phase_times.items():
+            self.phase_time_sums[phase] += elapsed
+
+    def __str__(self) -> str:
+        phases = ", ".join(f"{phase} {elapsed * 1e3:.3f} ms" for phase, elapsed in self.mean_phase_times.items())
+        return (
+            f"{self.ticks} ticks, {self.overruns} overruns, {self.skipped} skipped, "
+            f"jitter mean {self.mean_jitter * 1e3:.3f} ms / std {self.std_jitter * 1e3:.3f} ms / "
+            f"max {self.max_jitter * 1e3:.3f} ms, max tick {self.max_tick_time * 1e3:.3f} ms ({phases})"
+        )
+
+
+class ControlLoop:
+    """Runs read, compute and write phases at a fixed rate."""
+
+    def __init__(
+        self,
+        rate: float,
+        read: Optional[Callable[[], Any]] = None,
+        compute: Optional[Callable[[Any], Any]] = None,
+        write: Optional[Callable[[Any], None]] = None,
+        overrun_policy: OverrunPolicy = OverrunPolicy.Skip,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Initializes the control loop.
+
+        Args:
+            rate: The target rate, in Hz.
+            read: Returns the current state.
+            compute: Maps the state to the commands.
+            write: Sends the commands to the motors.
+            overrun_policy: What to do when a tick misses its deadline.
+            clock: Returns the current monotonic time, in seconds.
+            sleep: Sleeps for a number of seconds.
+        """
+        if rate <= 0:
+            raise ValueError(f"Control loop rate must be positive, got {rate}")
+        self.rate = rate
+        self.period = 1.0 / rate
+        self.read = read
+        self.compute = compute
+        self.write = write
+        self.overrun_policy = overrun_policy
+        self.clock = clock
+        self.sleep = sleep
+        self.stats = LoopStats()
+        self._running = False
+
+    def tick(self) -> Dict[str, float]:
+        """Runs the three phases once.
+
+        Returns:
+            The time spent in each phase, in seconds.
+        """
+        phase_times: Dict[str, float] = {}
+
+        start = self.clock()
+        state = self.read() if self.read is not None else None
+        read_end = self.clock()
+        commands = self.compute(state) if self.compute is not None else state
+        compute_end = self.clock()
+        if self.write is not None:
+            self.write(commands)
+        write_end = self.clock()
+
+        phase_times["read"] = read_end - start
+        phase_times["compute"] = compute_end - read_end
+        phase_times["write"] = write_end - compute_end
+        return phase_times
+
+    def run(self, duration: Optional[float] = None, ticks: Optional[int] = None) -> LoopStats:
+        """Runs the loop until stopped, or for a given duration or number of ticks.
+
+        Args:
+            duration: How long to run for, in seconds.
+            ticks: How many ticks to run.
+
+        Returns:
+            The statistics of the loop.
+        """
+        self._running = True
+        start = self.clock()
+        end = None if duration is None else start + duration
+        deadline = start
+        count = 0
+
+        while self._running and (ticks is None or count < ticks) and (end is None or deadline < end):
+            remaining = deadline - self.clock()
+            if remaining > 0:
+                self.sleep(remaining)
+
+            jitter = self.clock() - deadline
+            self.stats.record(jitter, self.tick())
+            count += 1
+
+            # Deadlines stay on the grid anchored at the start time.
+            deadline += self.period
+            now = self.clock()
+            if now > deadline:
+                self.stats.overruns += 1
+                if self.overrun_policy == OverrunPolicy.Skip:
+                    missed = math.ceil((now - deadline) / self.period)
+                    self.stats.skipped += missed
+                    deadline += missed * self.period
+
+        self._running = False
+        return self.stats
+
+    def stop(self) -> None:
+        """Stops the loop after the current tick, for example from a phase callback."""
+        self._running = False
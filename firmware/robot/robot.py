@@ -2,16 +2,31 @@
 
 import math
 import time
-from typing import Any, Dict, List, Union
+from concurrent.futures import Future
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union
 
-import can
-import yaml
+import numpy as np
+from numpy.typing import ArrayLike
 
-import firmware.robstride_motors.client as robstride
-from firmware.bionic_motors.motors import CANInterface
+from firmware.motor_utils.bus_pool import BusPool
 from firmware.motor_utils.motor_factory import MotorFactory
 from firmware.motor_utils.motor_utils import MotorInterface
+from firmware.motor_utils.rtt import RttStats
+from firmware.robot.config import load_robot_config
+from firmware.robot.control_loop import ControlLoop, LoopStats, OverrunPolicy
 from firmware.robot.model import Arm, Body, Leg
+from firmware.robot.startup import StartupError, StartupReport
+from firmware.robot.state import RobotState
+
+# The stacks of the motor types are imported by the methods which use them, so only the ones in the config are loaded.
+if TYPE_CHECKING:
+    import firmware.robstride_motors.client as robstride
+    from firmware.bionic_motors.bulk import MotorStateSnapshot
+    from firmware.robstride_motors.stream import ReportStream
+
+# How long the bring-up waits for the first replies, before any round-trip times have been measured, in seconds.
+STARTUP_TIMEOUT = 0.1
 
 
 def rad_to_deg(rad: float) -> float:
@@ -22,51 +37,81 @@ def deg_to_rad(deg: float) -> float:
     return deg * math.pi / 180
 
 
+def _request_futures(
+    requests: Dict["robstride.Client", Dict[int, Tuple[Future, Future]]],
+) -> Dict["robstride.Client", List[Future]]:
+    # The reads sent by `request_states` on each bus, to be waited on together.
+    return {
+        client: [future for pair in client_requests.values() for future in pair]
+        for client, client_requests in requests.items()
+    }
+
+
 class Robot:
-    def __init__(self, config_path: str = "config.yaml", setup: str = "full_body") -> None:
-        with open(config_path, "r") as config_file:
-            config = yaml.safe_load(config_file)
-            self.config = next(robot for robot in config["robots"] if robot["setup"] == setup)
+    def __init__(self, config_path: str = "config.yaml", setup: str = "full_body", *, strict: bool = False) -> None:
+        """Loads the config and brings up every motor.
+
+        Args:
+            config_path: The path to the robot config file.
+            setup: The setup to use from the config file.
+            strict: Whether to raise a `StartupError` if any motor fails to come up. By default the robot
+                starts without them, and they are listed in `startup_report.failed_motors`.
+        """
+        self.startup_report = StartupReport()
+        with self.startup_report.phase("load config"):
+            self.robot_config = load_robot_config(config_path, setup)
+            self.config = self.robot_config.raw
         print("Loaded config")
         self.setup = setup
-        self.delta_change = self.config["delta_change"]
+        self.delta_change = self.robot_config.delta_change
 
-        self.communication_interfaces = self._initialize_communication_interfaces()
+        with self.startup_report.phase("open buses"):
+            self.communication_interfaces = self._initialize_communication_interfaces()
         print("Initialized communication interfaces")
-        self.body = self._initialize_body()
-        self.motor_config = self._initialize_motor_config()
+        with self.startup_report.phase("create motors"):
+            self.body = self._initialize_body()
+            self.motor_config = self._initialize_motor_config()
+            self.state = self._initialize_state()
+            self._initialize_command_arrays()
+        if self.robot_config.motor_type == "robstride":
+            with self.startup_report.phase("configure motors"):
+                self._configure_robstride_motors()
+        with self.startup_report.phase("read state"):
+            self._read_initial_state()
+        print(self.startup_report)
+        if strict and self.startup_report.failed_motors:
+            self.shutdown()
+            raise StartupError(self.startup_report)
         self.prev_positions: dict = {part: [] for part in self.motor_config}
 
     def _initialize_communication_interfaces(self) -> Dict[str, Any]:
         """Initialize communication interfaces for each body part.
 
-        Returns:
-            A dictionary mapping body parts to their communication interfaces
-        """
-        interfaces: Any = {}
-        for part, config in self.config["body_parts"].items():
-            canbus_id = config.get("canbus_id", 0)
-            if self.config["motor_type"] == "bionic":
-                interfaces[part] = self._initialize_can_interface(canbus_id)
-            elif self.config["motor_type"] == "robstride":
-                interfaces[part] = robstride.Client(can.interface.Bus(channel=f"can{canbus_id}", bustype="socketcan"))
-            else:
-                raise ValueError(f"Unsupported motor type: {self.config['motor_type']}")
-        return interfaces
-
-    def _initialize_can_interface(self, canbus_id: int) -> CANInterface:
-        """Initialize a CAN interface for a given CAN bus ID.
-
-        Args:
-            canbus_id: The ID of the CAN bus
+        Each CAN channel is opened once, and the interface factory of the motor type creates one interface which is
+        shared by every body part attached to the channel. Receive filters for the configured motors are installed
+        on each channel, so frames from other devices are dropped by the kernel.
 
         Returns:
-            A CAN interface for the given CAN bus ID (used for Bionic motors)
+            A dictionary mapping body parts to their communication interfaces
         """
-        write_bus = can.interface.Bus(channel=f"can{canbus_id}", bustype="socketcan")
-        buffer_reader = can.BufferedReader()
-        notifier = can.Notifier(write_bus, [buffer_reader])
-        return CANInterface(write_bus, buffer_reader, notifier)
+        self.bus_pool = BusPool()
+        self.report_streams: Dict[int, "ReportStream"] = {}
+        create_interface = MotorFactory.get_interface_factory(self.robot_config.motor_type)
+
+        motor_ids: Dict[int, List[int]] = {}
+        for part_config in self.robot_config.parts:
+            ids = motor_ids.setdefault(part_config.canbus_id, [])
+            ids.extend(range(part_config.start_id, part_config.start_id + part_config.dof))
+        self._bus_interfaces = {
+            canbus_id: create_interface(self.bus_pool, canbus_id, ids, self.robot_config.host_can_id)
+            for canbus_id, ids in motor_ids.items()
+        }
+        self._robstride_clients: Dict[int, "robstride.Client"] = (
+            self._bus_interfaces if self.robot_config.motor_type == "robstride" else {}
+        )
+        return {
+            part_config.name: self._bus_interfaces[part_config.canbus_id] for part_config in self.robot_config.parts
+        }
 
     def _create_motor(self, part: str, motor_id: int, control_params: Any) -> MotorInterface:
         """Create a motor for a given body part and motor ID.
@@ -79,10 +124,76 @@ class Robot:
         Returns:
             A motor interface for the given body part and motor ID
         """
+        # Motors are configured and read together once the body is built, see `_configure_robstride_motors`.
         return MotorFactory.create_motor(
-            self.config["motor_type"], motor_id, control_params, self.communication_interfaces[part]
+            self.robot_config.motor_type,
+            motor_id,
+            control_params,
+            self.communication_interfaces[part],
+            initialize=False,
+            control_mode=self.robot_config.control_mode,
         )
 
+    def _configure_robstride_motors(self) -> None:
+        """Bring up every Robstride motor, streaming the writes on each bus and configuring the buses in parallel."""
+        import firmware.robstride_motors.bulk as robstride_bulk
+
+        self.bulk_config_report = robstride_bulk.configure_motors(self._state_motors, timeout=STARTUP_TIMEOUT)
+        for motor_id, result in self.bulk_config_report.results.items():
+            self.startup_report.record_motor(motor_id, "configure motors", result.elapsed)
+        self.startup_report.failed_motors.extend(self.bulk_config_report.failed_motors)
+        if not self.bulk_config_report.ok:
+            print(self.bulk_config_report)
+
+    def _read_initial_state(self) -> None:
+        """Read the position of every motor, sending the reads on every bus before waiting for any reply."""
+        start = time.monotonic()
+        if self.robot_config.motor_type == "bionic":
+            from firmware.bionic_motors.bulk import query_states
+            from firmware.bionic_motors.mailbox import QUERY_ANGLE
+
+            snapshot = query_states(self._state_motors, STARTUP_TIMEOUT)
+            for motor in self._state_motors:
+                mailbox = motor.communication_interface.mailbox
+                if mailbox is not None and motor.motor_id not in snapshot.missing:
+                    self.startup_report.record_motor(
+                        motor.motor_id, "read state", mailbox.received_at(motor.motor_id, QUERY_ANGLE) - start
+                    )
+            self.startup_report.failed_motors.extend(snapshot.missing)
+            return
+        if self.robot_config.motor_type != "robstride":
+            # Motor types from other packages are read one at a time through the motor interface.
+            for motor in self._state_motors:
+                try:
+                    motor.get_position()
+                except Exception:
+                    self.startup_report.failed_motors.append(motor.motor_id)
+                    continue
+                self.startup_report.record_motor(motor.motor_id, "read state", time.monotonic() - start)
+            return
+
+        from firmware.robstride_motors.client import wait_all
+
+        requests = {client: client.request_states(motor_ids) for client, motor_ids in self._client_motor_ids.items()}
+
+        def record(motor_id: int, future: Future) -> None:
+            if not future.cancelled():
+                self.startup_report.record_motor(motor_id, "read state", time.monotonic() - start)
+
+        for client_requests in requests.values():
+            for motor_id, (angle, _) in client_requests.items():
+                angle.add_done_callback(partial(record, motor_id))
+        wait_all(_request_futures(requests), STARTUP_TIMEOUT)
+        states: Dict[int, "robstride.MotorState"] = {}
+        for client, client_requests in requests.items():
+            states.update(client.collect_states(client_requests, 0.0))
+        for motor in self._state_motors:
+            if motor.motor_id in states:
+                motor.position = states[motor.motor_id].angle
+                motor.speed = states[motor.motor_id].velocity
+            elif motor.motor_id not in self.startup_report.failed_motors:
+                self.startup_report.failed_motors.append(motor.motor_id)
+
     def _initialize_body(self) -> Body:
         """Initialize the body of the robot.
 
@@ -90,11 +201,12 @@ class Robot:
             A Body object representing the robot's body
         """
         body_parts: dict = {}
-        for part, config in self.config["body_parts"].items():
-            if part.endswith("_arm"):
-                body_parts[part] = self._create_arm(part, config["start_id"], config["dof"])
-            elif part.endswith("_leg"):
-                body_parts[part] = self._create_leg(part, config["start_id"], config["dof"])
+        for part_config in self.robot_config.parts:
+            part = part_config.name
+            if part_config.kind == "arm":
+                body_parts[part] = self._create_arm(part, part_config.start_id, part_config.dof)
+            elif part_config.kind == "leg":
+                body_parts[part] = self._create_leg(part, part_config.start_id, part_config.dof)
         return Body(**body_parts)
 
     def _create_arm(self, part: str, start_id: int, dof: int) -> Arm:
@@ -128,7 +240,9 @@ class Robot:
         return Leg(motors=motors)
 
     def _get_motor_params(self, motor_id: int) -> Dict[str, Any]:
-        """Get the parameters for a motor by pulling from default parameters and overriding with specific parameters.
+        """Get the parameters for a motor, the default parameters overridden with the specific ones.
+
+        The parameters are merged when the config is compiled, see `firmware.robot.config`.
 
         Args:
             motor_id: The ID of the motor
@@ -136,16 +250,7 @@ class Robot:
         Returns:
             The parameters for the given motor
         """
-        default_params = next(param for param in self.config["params"] if param["motor_id"] == "default")
-        specific_params = next((param for param in self.config["params"] if param["motor_id"] == motor_id), None)
-
-        if specific_params:
-            temp = {**default_params, **specific_params}
-            temp.pop("motor_id")
-            return temp
-        temp = default_params.copy()
-        temp.pop("motor_id")
-        return temp
+        return self.robot_config.joint(motor_id).params_dict
 
     def _initialize_motor_config(self) -> Dict[str, Dict[str, Any]]:
         """Initialize the motor configuration for the robot. Signs are reversed for left body parts.
@@ -155,24 +260,46 @@ class Robot:
 
         """
         motor_config = {}
-        for part, part_config in self.config["body_parts"].items():
+        for part_config in self.robot_config.parts:
+            part = part_config.name
             if hasattr(self.body, part):
-                part_type = "arm" if "arm" in part else "leg"
-                dof = part_config["dof"]
-
-                signs = self.config["motor_config"][part_type]["signs"][:dof]
-                if part.startswith("left"):
-                    signs = [-s for s in signs]
-
+                joints = self.robot_config.part_joints(part)
                 motor_config[part] = {
                     "motors": getattr(self.body, part).motors,
-                    "signs": signs,
-                    "increments": self.config["motor_config"][part_type]["increments"][:dof],
-                    "maximum_values": self.config["motor_config"][part_type]["maximum_values"][:dof],
-                    "offsets": self.config["motor_config"][part_type]["offsets"][:dof],
+                    "signs": [joint.sign for joint in joints],
+                    "increments": [joint.increment for joint in joints],
+                    "maximum_values": [joint.maximum_value for joint in joints],
+                    "offsets": [joint.offset for joint in joints],
                 }
         return motor_config
 
+    def _initialize_state(self) -> RobotState:
+        """Initialize the joint state arrays, in the order of the body parts and their motors.
+
+        Returns:
+            The joint state, refreshed in place by `get_state`
+        """
+        self._state_motors: List[Any] = [motor for config in self.motor_config.values() for motor in config["motors"]]
+        self._client_motor_ids = {
+            client: [motor.motor_id for motor in self._state_motors if motor.communication_interface is client]
+            for client in self._robstride_clients.values()
+        }
+        return RobotState(
+            (part, [motor.motor_id for motor in config["motors"]], config["signs"])
+            for part, config in self.motor_config.items()
+        )
+
+    def _initialize_command_arrays(self) -> None:
+        """Precompute the joint-ordered offsets, limits and gains used by `set_joint_positions`."""
+        joints = [self.robot_config.joint(motor.motor_id) for motor in self._state_motors]
+        self._joint_offsets = np.array([joint.offset for joint in joints], dtype=np.float64)
+        self._joint_maximums = np.array([joint.maximum_value for joint in joints], dtype=np.float64)
+        self._joint_limits = np.abs(self._joint_maximums)
+        self._joint_targets = np.zeros(len(self.state))
+        if self.robot_config.motor_type == "bionic":
+            self._joint_kp = np.array([motor.control_params.kp for motor in self._state_motors], dtype=np.float64)
+            self._joint_kd = np.array([motor.control_params.kd for motor in self._state_motors], dtype=np.float64)
+
     @staticmethod
     def filter_motor_values(values: List[float], max_val: List[float]) -> List[float]:
         """Filter motor values to ensure they do not exceed the maximum values.
@@ -204,21 +331,32 @@ class Robot:
         """
         for part, config in self.motor_config.items():
             for motor, sign in zip(config["motors"], config["signs"]):
-                for val in range(low, high + 1):
-                    if not radians:
-                        set_val = deg_to_rad(float(val))
-                    else:
-                        set_val = val
-                    motor.set_position(total_sign * sign * set_val)
-                    time.sleep(timeout)
+                ramp = [
+                    total_sign * sign * (float(val) if radians else deg_to_rad(float(val)))
+                    for val in range(low, high + 1)
+                ]
+                self._send_targets(motor, ramp, timeout)
                 time.sleep(1)
-                for val in range(high, low - 1, -1):
-                    if not radians:
-                        set_val = deg_to_rad(float(val))
-                    else:
-                        set_val = val
-                    motor.set_position(total_sign * sign * set_val)
-                    time.sleep(timeout)
+                self._send_targets(motor, ramp[::-1], timeout)
+
+    @staticmethod
+    def _send_targets(motor: MotorInterface, targets: List[float], period: float) -> LoopStats:
+        """Send one position target per tick of a control loop.
+
+        Args:
+            motor: The motor to send the targets to
+            targets: The positions to send, in order
+            period: The time between two targets, in seconds
+
+        Returns:
+            The statistics of the loop
+        """
+        pending = iter(targets)
+        loop = ControlLoop(1.0 / period, lambda: next(pending), write=motor.set_position)
+        # The loop exits right after the last tick, so the last target is held for one more period like the others.
+        loop.run(ticks=len(targets))
+        time.sleep(period)
+        return loop.stats
 
     def zero_out(self) -> None:
         """Zero out all motors."""
@@ -228,18 +366,37 @@ class Robot:
 
     def disable_motors(self) -> None:
         """Disable all motors (only available for Robstride motors)."""
-        if self.config["motor_type"] == "robstride":
+        if self.robot_config.motor_type == "robstride":
             for part, part_config in self.motor_config.items():
                 for motor in part_config["motors"]:
                     motor.disable()
 
-    def update_motor_data(self) -> None:
-        """Update the position and speed of all motors."""
-        if self.config["motor_type"] == "bionic":
-            for part, part_config in self.motor_config.items():
-                for motor in part_config["motors"]:
-                    motor.update_position()
-                    motor.update_speed()
+    def update_motor_data(self, wait_time: Optional[float] = None) -> Optional["MotorStateSnapshot"]:
+        """Update the position and speed of all motors.
+
+        For Bionic motors, every query is sent up front and the replies are gathered in one read window. For
+        Robstride motors, the state cached from recent feedback frames is used, and only stale motors are read.
+
+        Args:
+            wait_time: How long to wait for the replies, in seconds, defaults to a window derived from the
+                measured round-trip times
+
+        Returns:
+            The state snapshot for Bionic motors, including motors which did not reply, otherwise None
+        """
+        if self.robot_config.motor_type == "bionic":
+            from firmware.bionic_motors.bulk import query_states
+
+            return query_states(self.body.all_motors, wait_time)  # type: ignore[arg-type]
+        if self.robot_config.motor_type == "robstride":
+            # The reads of the stale motors on every bus are pipelined like in `get_state`, which also updates the
+            # position and speed of the motors.
+            self.get_state(wait_time=wait_time)
+            return None
+        for motor in self.body.all_motors:
+            motor.get_position()
+            motor.get_speed()
+        return None
 
     def set_position(
         self,
@@ -254,26 +411,165 @@ class Robot:
             offset: The offset to apply to the new positions (optional), formatted the same as new_positions
             radians: Whether the values should be interpreted as radians (optional)
         """
-        for part, positions in new_positions.items():
+        for part in new_positions:
             if part not in self.motor_config:
                 raise ValueError(f"Part {part} not in motor config")
 
-            config = self.motor_config[part]
+        parts = self.state.parts
+        if new_positions.keys() == parts.keys() and all(
+            len(new_positions[part]) == part_slice.stop - part_slice.start for part, part_slice in parts.items()
+        ):
+            positions = np.concatenate([new_positions[part] for part in parts])
+            offsets = None if offset is None else np.concatenate([offset[part] for part in parts])
+            self.set_joint_positions(positions, offsets, radians)
+            return
+
+        for part, part_positions in new_positions.items():
+            start = parts[part].start
+            # Like zipping with the motors, a short list only commands the first joints of the part.
+            count = min(len(part_positions), parts[part].stop - start)
+            part_offset = None if offset is None else np.asarray(offset[part][:count], dtype=np.float64)
+            self.set_joint_positions(part_positions[:count], part_offset, radians, slice(start, start + count))
+
+    def set_joint_positions(
+        self,
+        positions: ArrayLike,
+        offset: Optional[ArrayLike] = None,
+        radians: bool = False,
+        joints: slice = slice(None),
+    ) -> np.ndarray:
+        """Set the position of every joint from one array, in the joint order of `state`.
+
+        The offset, the conversion to degrees, the config offsets, the maximum values and the signs are applied to
+        the whole array at once. Bionic commands are then encoded together with the batch encoder and written into
+        the preallocated frame of each motor. Robstride setpoints are all sent before waiting for any reply.
 
-            if offset:
-                positions = [pos - off for pos, off in zip(positions, offset[part])]
+        Args:
+            positions: The new position of each joint
+            offset: The offset to subtract from the positions (optional)
+            radians: Whether the values should be interpreted as radians (optional)
+            joints: The range of joints the positions are for, every joint by default
 
-            if radians:
-                positions = [rad_to_deg(pos) for pos in positions]
-            positions = [val - off for val, off in zip(positions, config["offsets"])]
-            positions = self.filter_motor_values(positions, config["maximum_values"])
+        Returns:
+            The positions sent to the motors, which is a view of a buffer reused by every call
+        """
+        values = np.asarray(positions, dtype=np.float64)
+        if offset is not None:
+            values = values - np.asarray(offset, dtype=np.float64)
+        if radians:
+            values = values / math.pi * 180
+        values = values - self._joint_offsets[joints]
+        # Clamps to the maximum values, keeping the sign of the requested position like `filter_motor_values`.
+        limits = self._joint_limits[joints]
+        values = np.where(np.abs(values) > limits, np.sign(values) * self._joint_maximums[joints], values)
+        targets = self._joint_targets[joints]
+        np.multiply(self.state.signs[joints], values, out=targets)
+
+        motors = self._state_motors[joints]
+        if self.robot_config.motor_type == "bionic":
+            from firmware.bionic_motors.batch import force_position_hybrid_control_batch
+
+            commands = force_position_hybrid_control_batch(
+                self._joint_kp[joints], self._joint_kd[joints], targets, 0, 0
+            )
+            for motor, command in zip(motors, commands):
+                motor.send_position_command(command)
+            return targets
+        if self.robot_config.motor_type != "robstride":
+            for motor, target in zip(motors, targets.tolist()):
+                motor.set_position(target)
+            return targets
+
+        from firmware.robstride_motors.client import wait_all
+
+        futures = [(motor, motor.submit_position(target)) for motor, target in zip(motors, targets.tolist())]
+        pending = {
+            client: [
+                future for motor, future in futures if future is not None and motor.communication_interface is client
+            ]
+            for client in self._robstride_clients.values()
+        }
+        wait_all(pending)
+        for client, client_futures in pending.items():
+            if not client_futures:
+                client.poll(0.0)
+        for motor, future in futures:
+            if future is not None and future.done() and not future.cancelled() and future.exception() is None:
+                motor.position = future.result().angle
+        return targets
+
+    def get_state(self, max_age: Optional[float] = None, wait_time: Optional[float] = None) -> RobotState:
+        """Refresh the state of every joint and return it.
+
+        For Bionic motors, every query is sent up front and the replies are gathered in one read window. For
+        Robstride motors, the state cached from feedback frames and report streams is used, and the reads of the
+        stale motors on every bus are sent before waiting for the replies of every bus against one deadline. Motors
+        of other types are read one at a time through `get_position` and `get_speed`. Joints which do not reply keep
+        their previous values and timestamp.
 
-            # for i, (old, new) in enumerate(zip(self.prev_positions[part], positions)):
-            #     if abs(new - old) > self.delta_change:
-            #         positions[i] = old
+        Args:
+            max_age: The maximum age of a cached state, in seconds, defaults to `DEFAULT_MAX_AGE` of the motors
+                module
+            wait_time: How long to wait for the replies, in seconds, defaults to a window derived from the
+                measured round-trip times
 
-            for motor, pos, sign in zip(config["motors"], positions, config["signs"]):
-                motor.set_position(sign * pos)
+        Returns:
+            The joint state, whose arrays are reused by every call
+        """
+        state = self.state
+        if self.robot_config.motor_type == "bionic":
+            from firmware.bionic_motors.bulk import query_states
+            from firmware.bionic_motors.motors import DEFAULT_MAX_AGE as BIONIC_MAX_AGE
+
+            snapshot = query_states(self._state_motors, wait_time, BIONIC_MAX_AGE if max_age is None else max_age)
+            missing = set(snapshot.missing)
+            now = time.monotonic()
+            for i, motor in enumerate(self._state_motors):
+                if motor.motor_id not in missing:
+                    state.set_joint(
+                        i,
+                        motor.position,
+                        motor.speed,
+                        torque=motor.current,
+                        temperature=motor.temperature,
+                        errors=motor.error,
+                        timestamp=now,
+                    )
+            return state
+        if self.robot_config.motor_type != "robstride":
+            # Motor types from other packages only report their position and speed through the motor interface.
+            for i, motor in enumerate(self._state_motors):
+                position, speed = motor.get_position(), motor.get_speed()
+                state.set_joint(i, position, speed, torque=0.0, temperature=0.0, errors=0, timestamp=time.monotonic())
+            return state
+
+        from firmware.robstride_motors.client import wait_all
+        from firmware.robstride_motors.motors import DEFAULT_MAX_AGE
+
+        max_age = DEFAULT_MAX_AGE if max_age is None else max_age
+        requests = {
+            client: client.request_states(motor_ids, max_age) for client, motor_ids in self._client_motor_ids.items()
+        }
+        wait_all(_request_futures(requests), wait_time)
+        for client, client_requests in requests.items():
+            client.collect_states(client_requests, 0.0)
+        for i, motor in enumerate(self._state_motors):
+            motor_state = motor.communication_interface.states.get(motor.motor_id)
+            if motor_state is None:
+                continue
+            motor.position = motor_state.angle
+            motor.speed = motor_state.velocity
+            error_bits = sum(error.value for error in motor_state.errors)
+            state.set_joint(
+                i,
+                motor_state.angle,
+                motor_state.velocity,
+                torque=motor_state.torque,
+                temperature=motor_state.temp,
+                errors=error_bits,
+                timestamp=motor_state.timestamp,
+            )
+        return state
 
     def get_motor_speeds(self) -> Dict[str, List[float]]:
         """Get the speeds of all motors."""
@@ -286,6 +582,62 @@ class Robot:
             for part, config in self.motor_config.items()
         }
 
+    def control_loop(
+        self,
+        compute: Callable[[Dict[str, List[float]]], Dict[str, List[float]]],
+        rate: float = 100.0,
+        overrun_policy: OverrunPolicy = OverrunPolicy.Skip,
+    ) -> ControlLoop:
+        """Create a fixed-rate loop which reads the motor positions, computes new targets and sends them.
+
+        Args:
+            compute: Maps the current positions to the new positions, both formatted like `get_motor_positions`
+            rate: The target rate of the loop, in Hz
+            overrun_policy: What to do when a tick misses its deadline
+
+        Returns:
+            The control loop, which is started with `run`
+        """
+        return ControlLoop(rate, self.get_motor_positions, compute, self.set_position, overrun_policy)
+
+    def rtt_stats(self) -> Dict[int, RttStats]:
+        """Get the reply round-trip time statistics of every motor which has been queried.
+
+        Returns:
+            A dictionary mapping motor IDs to their statistics, including the current read window
+        """
+        trackers = [interface.rtt for interface in self._bus_interfaces.values() if hasattr(interface, "rtt")]
+        return {motor_id: stats for tracker in trackers for motor_id, stats in tracker.summary().items()}
+
+    def start_report_streams(self) -> Dict[int, "ReportStream"]:
+        """Switch every Robstride motor to active reporting and consume the reports in the background.
+
+        Afterwards the state of the motors is updated without sending query frames, see `ReportStream.read`.
+
+        Returns:
+            The report stream of each CAN bus
+        """
+        from firmware.robstride_motors.stream import ReportStream
+
+        for canbus_id, client in self._robstride_clients.items():
+            if canbus_id in self.report_streams:
+                continue
+            motor_ids = [motor.motor_id for motor in self.body.all_motors if motor.communication_interface is client]
+            self.report_streams[canbus_id] = ReportStream(client, motor_ids)
+            self.report_streams[canbus_id].start()
+        return self.report_streams
+
+    def stop_report_streams(self) -> None:
+        """Stop the active reporting started by `start_report_streams`."""
+        for stream in self.report_streams.values():
+            stream.stop()
+        self.report_streams.clear()
+
+    def shutdown(self) -> None:
+        """Stop the bus workers and close every CAN channel."""
+        self.stop_report_streams()
+        self.bus_pool.shutdown()
+
     def calibrate_motors(self) -> None:
         """Calibrate all motors."""
         for part, config in self.motor_config.items():
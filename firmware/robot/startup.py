@@ -0,0 +1,57 @@
+"""Defines the timing report of the robot bring-up.
+
+The bring-up is split into phases, like opening the buses or configuring the
+motors. The report records how long each phase took, and how long each motor
+took within the phases that handle motors individually. If any motor fails to
+come up, the robot raises a `StartupError` carrying the report.
+"""
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List
+
+
+@dataclass
+class StartupReport:
+    phases: Dict[str, float] = field(default_factory=dict)
+    # Maps each motor ID to the time it took in each phase, in seconds.
+    motors: Dict[int, Dict[str, float]] = field(default_factory=dict)
+    failed_motors: List[int] = field(default_factory=list)
+
+    @property
+    def elapsed(self) -> float:
+        return sum(self.phases.values())
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Times the body of the `with` block as a phase.
+
+        Args:
+            name: The name of the phase.
+        """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.monotonic() - start
+
+    def record_motor(self, motor_id: int, phase: str, elapsed: float) -> None:
+        self.motors.setdefault(motor_id, {})[phase] = elapsed
+
+    def __str__(self) -> str:
+        phases = ", ".join(f"{name} {elapsed * 1e3:.1f} ms" for name, elapsed in self.phases.items())
+        lines = [f"Started up in {self.elapsed * 1e3:.1f} ms ({phases})"]
+        for motor_id, motor_phases in self.motors.items():
+            timings = ", ".join(f"{name} {elapsed * 1e3:.1f} ms" for name, elapsed in motor_phases.items())
+            status = ", failed" if motor_id in self.failed_motors else ""
+            lines.append(f"  Motor {motor_id}: {timings}{status}")
+        return "\n".join(lines)
+
+
+class StartupError(Exception):
+    """Raised when some motors fail to come up, with the report of the bring-up."""
+
+    def __init__(self, report: StartupReport) -> None:
+        super().__init__(f"Failed to bring up motors {report.failed_motors}")
+        self.report = report
@@ -0,0 +1,102 @@
+"""Defines a whole-robot joint state backed by preallocated NumPy arrays.
+
+Joints are indexed in a fixed order, the order of the body parts in the
+config followed by the order of the motors in each part. The same arrays are
+overwritten every time the state is refreshed, so a control loop can keep
+references to them (or to views of one body part) across ticks.
+"""
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+
+class RobotState:
+    """Position, velocity, torque, temperature, errors and timestamp of every joint.
+
+    Positions, velocities and torques are in the units of the motors with the
+    joint signs applied, like `Robot.get_motor_positions`. Errors hold the
+    error bits of Robstride motors or the error code of Bionic motors, and
+    timestamps the monotonic time each joint was last updated, so joints which
+    did not reply keep their previous values and timestamp.
+    """
+
+    def __init__(self, parts: Iterable[Tuple[str, Sequence[int], Sequence[float]]]) -> None:
+        """Initializes the state with every value set to zero.
+
+        Args:
+            parts: The name, motor IDs and joint signs of each body part, in order.
+        """
+        motor_ids: List[int] = []
+        signs: List[float] = []
+        self.parts: Dict[str, slice] = {}
+        for name, part_motor_ids, part_signs in parts:
+            if len(part_motor_ids) != len(part_signs):
+                raise ValueError(f"Part {name} has {len(part_motor_ids)} motors but {len(part_signs)} signs")
+            self.parts[name] = slice(len(motor_ids), len(motor_ids) + len(part_motor_ids))
+            motor_ids.extend(part_motor_ids)
+            signs.extend(part_signs)
+
+        self.motor_ids = np.array(motor_ids, dtype=np.int64)
+        self.signs = np.array(signs, dtype=np.float64)
+        self.index: Dict[int, int] = {motor_id: i for i, motor_id in enumerate(motor_ids)}
+
+        size = len(motor_ids)
+        self.position = np.zeros(size)
+        self.velocity = np.zeros(size)
+        self.torque = np.zeros(size)
+        self.temperature = np.zeros(size)
+        self.errors = np.zeros(size, dtype=np.uint32)
+        self.timestamp = np.zeros(size)
+
+    def __len__(self) -> int:
+        return len(self.motor_ids)
+
+    def set_joint(
+        self,
+        i: int,
+        position: float,
+        velocity: float,
+        *,
+        torque: float,
+        temperature: float,
+        errors: int,
+        timestamp: float,
+    ) -> None:
+        """Writes the raw motor values of one joint, applying its sign.
+
+        Args:
+            i: The index of the joint.
+            position: The position reported by the motor.
+            velocity: The velocity reported by the motor.
+            torque: The torque or current reported by the motor.
+            temperature: The temperature of the motor.
+            errors: The error bits or code of the motor.
+            timestamp: When the values were received, in monotonic seconds.
+        """
+        sign = self.signs[i]
+        self.position[i] = sign * position
+        self.velocity[i] = sign * velocity
+        self.torque[i] = sign * torque
+        self.temperature[i] = temperature
+        self.errors[i] = errors
+        self.timestamp[i] = timestamp
+
+    def age(self, now: float) -> np.ndarray:
+        """Returns how old the values of each joint are, in seconds.
+
+        Args:
+            now: The current monotonic time.
+        """
+        return now - self.timestamp
+
+    def as_dict(self, values: np.ndarray) -> Dict[str, List[float]]:
+        """Splits a per-joint array into lists per body part, like `Robot.get_motor_positions`.
+
+        Args:
+            values: One of the per-joint arrays, like `position`.
+
+        Returns:
+            A dictionary mapping body parts to their values.
+        """
+        return {name: values[part].tolist() for name, part in self.parts.items()}
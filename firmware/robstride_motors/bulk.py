@@ -0,0 +1,190 @@
+"""Defines a pipelined bulk configuration of many Robstride motors.
+
+Configuring motors one parameter at a time costs a full round trip per write.
+Here every write for the motors on one bus is streamed through the client
+with a bounded number of requests in flight, while the acknowledgements are
+matched as they arrive. Each bus is configured from its own thread, so buses
+are configured in parallel.
+"""
+
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+import firmware.robstride_motors.client as robstride
+from firmware.robstride_motors.motors import RobstrideMotor
+
+Step = Tuple[str, Callable[[], Future]]
+
+
+@dataclass
+class MotorConfigResult:
+    motor_id: int
+    acked: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    errors: Set[robstride.MotorError] = field(default_factory=set)
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    def __str__(self) -> str:
+        status = "ok" if self.ok else f"failed {', '.join(self.failed)}"
+        errors = f", errors {sorted(error.name for error in self.errors)}" if self.errors else ""
+        return f"Motor {self.motor_id}: {len(self.acked)} acked in {self.elapsed * 1e3:.1f} ms, {status}{errors}"
+
+
+@dataclass
+class BulkConfigReport:
+    results: Dict[int, MotorConfigResult] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(result.ok for result in self.results.values())
+
+    @property
+    def failed_motors(self) -> List[int]:
+        return [motor_id for motor_id, result in self.results.items() if not result.ok]
+
+    def __str__(self) -> str:
+        lines = [f"Configured {len(self.results)} motors in {self.elapsed * 1e3:.1f} ms"]
+        lines.extend(str(result) for result in self.results.values())
+        return "\n".join(lines)
+
+
+def startup_steps(motor: RobstrideMotor, run_mode: Optional[robstride.RunMode] = None) -> List[Step]:
+    """Returns the requests which bring a motor up, in the order of `RobstrideMotor.__init__`.
+
+    Args:
+        motor: The motor to configure.
+        run_mode: The run mode to put the motor in, defaults to the one for
+            the control mode of the motor.
+
+    Returns:
+        The named requests, each of which sends a frame and returns the
+        future of its acknowledgement.
+    """
+    client: robstride.Client = motor.communication_interface
+    motor_id = motor.motor_id
+    steps: List[Step] = [
+        ("disable", partial(client.submit_disable, motor_id)),
+        ("run_mode", partial(client.submit_write_param, motor_id, "run_mode", run_mode or motor.run_mode)),
+        ("enable", partial(client.submit_enable, motor_id)),
+    ]
+    for param, value in motor.control_params.__dict__.items():
+        steps.append((param, partial(client.submit_write_param, motor_id, param, value)))
+    return steps
+
+
+def configure_bus(
+    client: robstride.Client,
+    steps: Dict[int, List[Step]],
+    window: int = 16,
+    timeout: float = 0.1,
+) -> Dict[int, MotorConfigResult]:
+    """Streams the requests for the motors on one bus and checks every acknowledgement.
+
+    Requests are interleaved across motors, with at most `window` waiting for
+    an acknowledgement at once. The requests of one motor are sent in order.
+    If a request is not acknowledged in time, the remaining requests of that
+    motor are skipped, since the acknowledgements of one motor are matched in
+    the order they were sent.
+
+    Args:
+        client: The client of the bus.
+        steps: The requests for each motor, in the order they should be sent.
+        window: The maximum number of unacknowledged requests.
+        timeout: How long to wait for each acknowledgement, in seconds.
+
+    Returns:
+        The result for each motor.
+    """
+    results = {motor_id: MotorConfigResult(motor_id) for motor_id in steps}
+    queues: Dict[int, Deque[Step]] = {motor_id: deque(motor_steps) for motor_id, motor_steps in steps.items()}
+    started: Dict[int, float] = {}
+    outstanding: Deque[Tuple[int, str, Future, float]] = deque()
+    busy: Set[int] = set()
+
+    def fail(motor_id: int, name: str) -> None:
+        results[motor_id].failed.append(name)
+        results[motor_id].failed.extend(skipped for skipped, _ in queues[motor_id])
+        queues[motor_id].clear()
+
+    while any(queues.values()) or outstanding:
+        # Round-robin over the motors, so each motor has at most one request in flight.
+        for motor_id, queue in queues.items():
+            if len(outstanding) >= window:
+                break
+            if queue and motor_id not in busy:
+                name, submit = queue.popleft()
+                now = time.monotonic()
+                started.setdefault(motor_id, now)
+                outstanding.append((motor_id, name, submit(), now))
+                busy.add(motor_id)
+
+        # Returns as soon as the next acknowledgement arrives.
+        client.poll(timeout if outstanding else 0.0)
+
+        now = time.monotonic()
+        for _ in range(len(outstanding)):
+            motor_id, name, future, sent_at = outstanding.popleft()
+            if future.done():
+                busy.discard(motor_id)
+                exception = future.exception()
+                if exception is not None:
+                    print(f"Motor {motor_id} rejected {name}:", exception)
+                    fail(motor_id, name)
+                    continue
+                results[motor_id].acked.append(name)
+                results[motor_id].errors.update(future.result().errors)
+                results[motor_id].elapsed = now - started[motor_id]
+            elif now - sent_at > timeout:
+                busy.discard(motor_id)
+                client.wait([future], timeout=0.0)
+                fail(motor_id, name)
+                results[motor_id].elapsed = now - started[motor_id]
+            else:
+                outstanding.append((motor_id, name, future, sent_at))
+
+    return results
+
+
+def configure_motors(
+    motors: Sequence[RobstrideMotor],
+    window: int = 16,
+    timeout: float = 0.1,
+    steps: Optional[Callable[[RobstrideMotor], List[Step]]] = None,
+) -> BulkConfigReport:
+    """Configures many motors, pipelining the writes on each bus and running the buses in parallel.
+
+    Args:
+        motors: The motors to configure, possibly spread across several buses.
+        window: The maximum number of unacknowledged requests per bus.
+        timeout: How long to wait for each acknowledgement, in seconds.
+        steps: Builds the requests for a motor, defaults to `startup_steps`.
+
+    Returns:
+        The report, with the acknowledged and failed requests and the time
+        taken for each motor.
+    """
+    build_steps = startup_steps if steps is None else steps
+    buses: Dict[int, Tuple[robstride.Client, Dict[int, List[Step]]]] = {}
+    for motor in motors:
+        client = motor.communication_interface
+        buses.setdefault(id(client), (client, {}))[1][motor.motor_id] = build_steps(motor)
+
+    report = BulkConfigReport()
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, len(buses))) as executor:
+        futures = [
+            executor.submit(configure_bus, client, bus_steps, window, timeout) for client, bus_steps in buses.values()
+        ]
+        for future in futures:
+            report.results.update(future.result())
+    report.elapsed = time.monotonic() - start
+    return report
@@ -7,11 +7,16 @@ import dataclasses
 import enum
 import math
 import struct
-from typing import List
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, wait as wait_futures
+from typing import Any, Callable, Deque, Dict, Iterable, List, Mapping, Optional, Set, Tuple
 
 import can
 
-from firmware.bionic_motors.commands import push_bits
+from firmware.motor_utils.frames import FrameBuffer
+from firmware.motor_utils.rtt import RttTracker
 
 
 class RunMode(enum.Enum):
@@ -31,6 +36,7 @@ class MotorMsg(enum.Enum):
     SetID = 7
     ReadParam = 17
     WriteParam = 18
+    ActiveReport = 24
 
 
 class MotorMode(enum.Enum):
@@ -59,6 +65,23 @@ class FeedbackResp:
     temp: float
 
 
+@dataclasses.dataclass
+class MotorState:
+    """The latest known state of a motor, with the monotonic time it was received at."""
+
+    angle: float
+    velocity: float
+    torque: float
+    temp: float
+    errors: List[MotorError]
+    mode: Optional[MotorMode]
+    timestamp: float
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.timestamp
+
+
 params = [
     ("run_mode", 0x7005),
     ("iq_ref", 0x7006),
@@ -84,91 +107,475 @@ params = [
 
 param_ids_by_name = dict(params)
 
+# How long to wait for the reply to a control frame while no other frames arrive, in seconds.
+CONTROL_REPLY_TIMEOUT = 1.0
+
+# Outstanding requests are keyed by (msg type, motor id, param id). Feedback
+# replies do not echo the parameter they acknowledge, so their param id is
+# None and requests sharing a key are matched in the order they were sent.
+# Control frames are answered with feedback frames too, so they are queued
+# under the same key without a future, to keep their replies from being taken
+# as the acknowledgement of a later request.
+InFlightKey = Tuple[int, int, Optional[int]]
+
+
+@dataclasses.dataclass
+class PendingRequest:
+    future: Optional[Future]
+    parse: Callable[[can.Message], Any]
+    sent_at: float
+
+
+def parse_feedback(aid: int, data: bytes | bytearray, motor_id: int, motor_model: int = 1) -> FeedbackResp:
+    """Decodes a feedback frame without validating its arbitration ID.
+
+    Args:
+        aid: The arbitration ID of the frame.
+        data: The 8-byte payload of the frame.
+        motor_id: The ID of the motor which sent the frame.
+        motor_model: The motor model, which determines the velocity and torque scaling.
+
+    Returns:
+        The decoded feedback.
+    """
+    error_bits = (aid & 0x1F0000) >> 16
+    errors = []
+    for i in range(6):
+        value = 1 << i
+        if value & error_bits:
+            errors.append(MotorError(value))
+
+    mode = MotorMode((aid & 0x400000) >> 22)
+
+    angle_raw = struct.unpack(">H", data[0:2])[0]
+    angle = (float(angle_raw) / 65535 * 8 * math.pi) - 4 * math.pi
+
+    velocity_raw = struct.unpack(">H", data[2:4])[0]
+    velocity_range = 88 if motor_model == 1 else 30
+    velocity = (float(velocity_raw) / 65535 * velocity_range) - velocity_range / 2
+
+    torque_raw = struct.unpack(">H", data[4:6])[0]
+    torque_range = 34 if motor_model == 1 else 240
+    torque = (float(torque_raw) / 65535 * torque_range) - torque_range / 2
+
+    temp_raw = struct.unpack(">H", data[6:8])[0]
+    temp = float(temp_raw) / 10
+
+    return FeedbackResp(motor_id, errors, mode, angle, velocity, torque, temp)
+
+
+_PARAM_HEADER = struct.Struct("<HH")
+_PARAM_RUN_MODE = struct.Struct("<I")
+_PARAM_FLOAT = struct.Struct("<f")
+_CONTROL_DATA = struct.Struct("<HHHH")
+
+
+def encode_write_param_into(buffer: bytearray | memoryview, param_id: int, param_value: float | RunMode | int) -> None:
+    _PARAM_HEADER.pack_into(buffer, 0, param_id, 0)
+    if param_id == 0x7005:
+        if isinstance(param_value, RunMode):
+            int_value = int(param_value.value)
+        elif isinstance(param_value, int):
+            int_value = param_value
+        _PARAM_RUN_MODE.pack_into(buffer, 4, int_value & 0xFF)
+    else:
+        _PARAM_FLOAT.pack_into(buffer, 4, param_value)
+
+
+def encode_write_param(param_id: int, param_value: float | RunMode | int) -> bytes:
+    data = bytearray(8)
+    encode_write_param_into(data, param_id, param_value)
+    return bytes(data)
+
+
+def encode_control_into(
+    buffer: bytearray | memoryview, angle: float, angular_velocity: float, kp: float, kd: float
+) -> None:
+    # Ensure values are within their respective ranges
+    angle = max(min(angle, 4 * 3.14159), -4 * 3.14159)
+    angular_velocity = max(min(angular_velocity, 15.0), -15.0)
+    kp = max(min(kp, 5000.0), 0.0)
+    kd = max(min(kd, 100.0), 0.0)
+
+    angle_bytes = int(((angle + 4 * 3.14159) / (8 * 3.14159)) * 65535)
+    angular_velocity_bytes = int(((angular_velocity + 15.0) / 30.0) * 65535)
+    kp_bytes = int((kp / 5000.0) * 65535)
+    kd_bytes = int((kd / 100.0) * 65535)
+
+    # The four fields are packed big-endian into a 64-bit word which is sent little-endian.
+    _CONTROL_DATA.pack_into(buffer, 0, kd_bytes, kp_bytes, angular_velocity_bytes, angle_bytes)
+
+
+def decode_read_param(data: bytes | bytearray) -> float | RunMode:
+    if struct.unpack("<H", data[:2])[0] == 0x7005:
+        return RunMode(int(data[4]))
+    return struct.unpack("<f", data[4:])[0]
+
+
+def _succeeded(future: Future) -> bool:
+    return future.done() and not future.cancelled() and future.exception() is None
+
 
 class Client:
-    def __init__(self, bus: can.BusABC, retry_count: int = 2, recv_timeout: int = 2, host_can_id: int = 0xAA) -> None:
+    def __init__(
+        self,
+        bus: can.BusABC,
+        retry_count: int = 2,
+        recv_timeout: int = 2,
+        host_can_id: int = 0xAA,
+        rtt: Optional[RttTracker] = None,
+    ) -> None:
         self.bus = bus
         self.retry_count = retry_count
         self.recv_timeout = recv_timeout
+        # Replies to submitted requests are timed per motor, which sets how long `wait` waits by default.
+        self.rtt = rtt if rtt is not None else RttTracker(initial=0.02, minimum=0.001, maximum=0.1)
         self.host_can_id = host_can_id
         self._recv_count = 0
         self._recv_error_count = 0
+        self._in_flight: Dict[InFlightKey, Deque[PendingRequest]] = {}
+        self._frames: Dict[Tuple[int, int], FrameBuffer] = {}
+        # Called with feedback which does not answer an outstanding request, like replies to control frames.
+        self.feedback_handlers: Dict[int, Callable[[FeedbackResp], None]] = {}
+        # Updated by every decoded feedback frame.
+        self.states: Dict[int, MotorState] = {}
+        self.feedback_listeners: List[Callable[[FeedbackResp], None]] = []
+        self._motor_models: Dict[int, int] = {}
+        self._feedback: Dict[int, FeedbackResp] = {}
+        # The motors which send feedback frames on their own, see `set_active_report`.
+        self.reporting: Set[int] = set()
+        # The thread which receives every frame while a report stream owns the bus, see `stream.ReportStream`.
+        self.consumer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # The blocking calls go through the in-flight table, so replies to control frames
+    # are never mistaken for the reply. Active reports cannot be told apart from
+    # acknowledgements, so while a motor sends them its writes are confirmed by
+    # reading the parameter back, and the other acknowledged commands are refused.
 
     def enable(self, motor_id: int, motor_model: int = 1) -> FeedbackResp:
-        self.bus.send(self._rs_msg(MotorMsg.Enable, self.host_can_id, motor_id, bytes([0, 0, 0, 0, 0, 0, 0, 0])))
-        resp = self._recv()
-        return self._parse_feedback_resp(resp, motor_id, motor_model)
+        return self._result(self.submit_enable(motor_id, motor_model))
 
     def disable(self, motor_id: int, motor_model: int = 1) -> FeedbackResp:
-        self.bus.send(self._rs_msg(MotorMsg.Disable, self.host_can_id, motor_id, bytes([0, 0, 0, 0, 0, 0, 0, 0])))
-        resp = self._recv()
-        return self._parse_feedback_resp(resp, motor_id, motor_model)
+        return self._result(self.submit_disable(motor_id, motor_model))
 
     def update_id(self, motor_id: int, new_motor_id: int) -> None:
+        self._check_no_consumer()
         id_data_1 = self.host_can_id | (new_motor_id << 8)
         self.bus.send(self._rs_msg(MotorMsg.SetID, id_data_1, motor_id, bytes([0, 0, 0, 0, 0, 0, 0, 0])))
         self._recv()
 
     def zero_pos(self, motor_id: int, motor_model: int = 1) -> FeedbackResp:
-        self.bus.send(
-            self._rs_msg(MotorMsg.ZeroPos, self.host_can_id, motor_id, bytes([1, 0, 0, 0, 0, 0, 0, 0]))
-        )  # TODO: test this function
-        resp = self._recv()
-        return self._parse_feedback_resp(resp, motor_id, motor_model)
+        # TODO: test this function
+        return self._result(self.submit_zero_pos(motor_id, motor_model))
+
+    def set_active_report(self, motor_id: int, enable: bool = True) -> None:
+        """Starts or stops the periodic feedback frames sent by a motor on its own.
+
+        Args:
+            motor_id: The ID of the motor.
+            enable: Whether to start or stop the reports.
+        """
+        data = bytes([1, 2, 3, 4, 5, 6, 1 if enable else 0, 0])
+        if enable:
+            self.reporting.add(motor_id)
+        self.bus.send(self._rs_msg(MotorMsg.ActiveReport, self.host_can_id, motor_id, data))
+        if not enable:
+            self.reporting.discard(motor_id)
 
     def use_control_mode(
         self, motor_id: int, torque: float, velocity: float, position: float, kp: float, kd: float
     ) -> None:
-        data = self._convert_to_bytes(position, velocity, kp, kd)
         torque = max(min(torque, 120.0), -120.0)
         moment_bytes = int(((torque + 120.0) / 240.0) * 65535)
-        self.bus.send(self._rs_msg(MotorMsg.Control, moment_bytes, motor_id, data))
+        frame = self._frame(MotorMsg.Control, moment_bytes, motor_id)
+        encode_control_into(frame.data, position, velocity, kp, kd)
+        if motor_id in self.reporting:
+            # Replies and reports all go to the feedback handlers, so there is nothing to match.
+            frame.send(self.bus)
+            return
+        key = (MotorMsg.Feedback.value, motor_id, None)
+        now = time.monotonic()
+        with self._lock:
+            requests = self._in_flight.setdefault(key, deque())
+            # Bounds the queue of a motor which stopped replying while no other frames arrive.
+            self._expire_control_replies(requests, now - CONTROL_REPLY_TIMEOUT)
+            requests.append(PendingRequest(None, self._parse_unsolicited, now))
+        frame.send(self.bus)
 
     def get_motor_info(self, motor_id: int) -> bytearray:
+        self._check_no_consumer()
         self.bus.send(self._rs_msg(MotorMsg.Info, self.host_can_id, motor_id, bytes([0, 0, 0, 0, 0, 0, 0, 0])))
         resp = self._recv()
         return resp.data
 
     def read_param(self, motor_id: int, param_id: int | str) -> float | RunMode:
-        param_id = self._normalize_param_id(param_id)
+        # Replies are matched on the echoed param ID, so a reply to another read is never returned.
+        return self._result(self.submit_read_param(motor_id, param_id))
 
-        data = [param_id & 0xFF, param_id >> 8, 0, 0, 0, 0, 0, 0]
-        self.bus.send(self._rs_msg(MotorMsg.ReadParam, self.host_can_id, motor_id, bytes(data)))
-        resp = self._recv()
-
-        while not self._parse_and_validate_read_resp_arbitration_id(resp, MotorMsg.ReadParam.value, motor_id):
-            resp = self._recv()
+    def write_param(
+        self, motor_id: int, param_id: int | str, param_value: float | RunMode | int, motor_model: int = 1
+    ) -> FeedbackResp:
+        return self._result(self.submit_write_param(motor_id, param_id, param_value, motor_model))
 
-        resp_param_id = struct.unpack("<H", resp.data[:2])[0]
-        if resp_param_id != param_id:
-            raise Exception("Invalid param id")
+    def submit_enable(self, motor_id: int, motor_model: int = 1) -> Future:
+        return self._submit_feedback(MotorMsg.Enable, motor_id, bytes([0, 0, 0, 0, 0, 0, 0, 0]), motor_model)
 
-        if param_id == 0x7005:
-            value = RunMode(int(resp.data[4]))
-        else:
-            value = struct.unpack("<f", resp.data[4:])[0]
+    def submit_disable(self, motor_id: int, motor_model: int = 1) -> Future:
+        return self._submit_feedback(MotorMsg.Disable, motor_id, bytes([0, 0, 0, 0, 0, 0, 0, 0]), motor_model)
 
-        return value
+    def submit_zero_pos(self, motor_id: int, motor_model: int = 1) -> Future:
+        return self._submit_feedback(MotorMsg.ZeroPos, motor_id, bytes([1, 0, 0, 0, 0, 0, 0, 0]), motor_model)
 
-    def write_param(
-        self, motor_id: int, param_id: int | str, param_value: float | RunMode | int, motor_model: int = 1
-    ) -> FeedbackResp:
-        param_id = self._normalize_param_id(param_id)
+    def submit_read_param(self, motor_id: int, param_id: int | str) -> Future:
+        """Sends a parameter read without waiting for the reply.
 
-        data = bytes([param_id & 0xFF, param_id >> 8, 0, 0])
-        if param_id == 0x7005:
-            if isinstance(param_value, RunMode):
-                int_value = int(param_value.value)
-            elif isinstance(param_value, int):
-                int_value = param_value
-            data += bytes([int_value, 0, 0, 0])
-        else:
-            data += struct.pack("<f", param_value)
+        Args:
+            motor_id: The ID of the motor.
+            param_id: The parameter ID or name.
 
-        self.bus.send(self._rs_msg(MotorMsg.WriteParam, self.host_can_id, motor_id, data))
-        resp = self._recv()
+        Returns:
+            A future which resolves to the parameter value once the reply is
+            matched by `poll` or `wait`.
+        """
+        param_id = self._normalize_param_id(param_id)
+        data = bytes([param_id & 0xFF, param_id >> 8, 0, 0, 0, 0, 0, 0])
+        key = (MotorMsg.ReadParam.value, motor_id, param_id)
+        return self._submit(MotorMsg.ReadParam, motor_id, data, key, lambda resp: decode_read_param(resp.data))
 
-        return self._parse_feedback_resp(resp, motor_id, motor_model)
+    def submit_write_param(
+        self, motor_id: int, param_id: int | str, param_value: float | RunMode | int, motor_model: int = 1
+    ) -> Future:
+        """Sends a parameter write without waiting for the acknowledgement.
+
+        Args:
+            motor_id: The ID of the motor.
+            param_id: The parameter ID or name.
+            param_value: The value to write.
+            motor_model: The motor model, used to scale the feedback reply.
+
+        Returns:
+            A future which resolves to the feedback reply acknowledging the write.
+            While the motor sends active reports, the write is instead confirmed
+            by reading the parameter back, and the future resolves to the latest
+            report once the value read back matches.
+        """
+        param_id = self._normalize_param_id(param_id)
+        frame = self._frame(MotorMsg.WriteParam, self.host_can_id, motor_id)
+        encode_write_param_into(frame.data, param_id, param_value)
+        if motor_id not in self.reporting:
+            return self._submit_feedback(MotorMsg.WriteParam, motor_id, None, motor_model)
+
+        frame.send(self.bus)
+        # Only the run mode is written as a single byte, the other parameters are floats.
+        size = 1 if param_id == param_ids_by_name["run_mode"] else 4
+        written = bytes(frame.data[4 : 4 + size])
+
+        def confirm(resp: can.Message) -> FeedbackResp:
+            if bytes(resp.data[4 : 4 + size]) != written:
+                raise Exception(f"Motor {motor_id} did not take the write of parameter {param_id:#x}")
+            feedback = self._feedback.get(motor_id)
+            if feedback is None:
+                raise Exception("No feedback from motor received")
+            return feedback
+
+        data = bytes([param_id & 0xFF, param_id >> 8, 0, 0, 0, 0, 0, 0])
+        return self._submit(MotorMsg.ReadParam, motor_id, data, (MotorMsg.ReadParam.value, motor_id, param_id), confirm)
+
+    def read_params(self, motor_ids: Iterable[int], param_id: int | str, timeout: Optional[float] = None) -> Dict:
+        """Reads the same parameter from many motors with all requests in flight at once.
+
+        Args:
+            motor_ids: The IDs of the motors to read from.
+            param_id: The parameter ID or name.
+            timeout: How long to wait for all replies, defaults to the timeout derived
+                from the measured round-trip times.
+
+        Returns:
+            A mapping from motor ID to value for every motor which replied in time.
+        """
+        futures = {motor_id: self.submit_read_param(motor_id, param_id) for motor_id in motor_ids}
+        self.wait(futures.values(), timeout)
+        return {motor_id: future.result() for motor_id, future in futures.items() if _succeeded(future)}
+
+    def cached_state(self, motor_id: int, max_age: float) -> Optional[MotorState]:
+        """Returns the cached state of a motor if it is recent enough.
+
+        Args:
+            motor_id: The ID of the motor.
+            max_age: The maximum age of the cached state, in seconds.
+
+        Returns:
+            The cached state, or None if there is none or it is too old.
+        """
+        state = self.states.get(motor_id)
+        if state is None or time.monotonic() - state.timestamp > max_age:
+            return None
+        return state
+
+    def get_state(self, motor_id: int, max_age: float = 0.0, timeout: Optional[float] = None) -> MotorState:
+        """Returns the state of a motor, only going to the bus if the cached state is too old.
+
+        A stale state is refreshed by reading the position and velocity
+        parameters, the other fields are kept from the last feedback frame.
+
+        Args:
+            motor_id: The ID of the motor.
+            max_age: The maximum age of the cached state, in seconds.
+            timeout: How long to wait for the replies, defaults to the timeout derived
+                from the measured round-trip times.
+
+        Returns:
+            The state of the motor.
+        """
+        state = self.cached_state(motor_id, max_age)
+        if state is not None:
+            return state
+        states = self.collect_states(self.request_states([motor_id], max_age), timeout)
+        if motor_id not in states:
+            raise Exception("No response from motor received")
+        return states[motor_id]
+
+    def request_states(self, motor_ids: Iterable[int], max_age: float = 0.0) -> Dict[int, Tuple[Future, Future]]:
+        """Sends position and velocity reads to every motor whose cached state is too old.
+
+        Args:
+            motor_ids: The IDs of the motors.
+            max_age: The maximum age of the cached states, in seconds.
+
+        Returns:
+            The outstanding position and velocity reads of each stale motor, to
+            be passed to `collect_states`.
+        """
+        return {
+            motor_id: (self.submit_read_param(motor_id, "mechpos"), self.submit_read_param(motor_id, "mechvel"))
+            for motor_id in motor_ids
+            if self.cached_state(motor_id, max_age) is None
+        }
+
+    def collect_states(
+        self, requests: Dict[int, Tuple[Future, Future]], timeout: Optional[float] = None
+    ) -> Dict[int, MotorState]:
+        """Waits for the reads sent by `request_states` and updates the cached states.
+
+        Args:
+            requests: The outstanding reads returned by `request_states`.
+            timeout: How long to wait for the replies, defaults to the timeout derived
+                from the measured round-trip times.
+
+        Returns:
+            The refreshed state of every motor which replied in time.
+        """
+        self.wait([future for pair in requests.values() for future in pair], timeout)
+        now = time.monotonic()
+        states: Dict[int, MotorState] = {}
+        for motor_id, (angle, velocity) in requests.items():
+            if not _succeeded(angle) or not _succeeded(velocity):
+                continue
+            previous = self.states.get(motor_id)
+            states[motor_id] = self.states[motor_id] = MotorState(
+                angle.result(),
+                velocity.result(),
+                previous.torque if previous is not None else 0.0,
+                previous.temp if previous is not None else 0.0,
+                previous.errors if previous is not None else [],
+                previous.mode if previous is not None else None,
+                now,
+            )
+        return states
+
+    def poll(self, timeout: float = 0.0) -> int:
+        """Receives and dispatches every frame which is already available.
+
+        While a report stream owns the bus, frames are received by its thread
+        and this returns 0 right away when called from any other thread.
+
+        Args:
+            timeout: How long to wait for the first frame, in seconds.
+
+        Returns:
+            The number of frames that were matched to an outstanding request.
+        """
+        if self.consumer is not None and self.consumer is not threading.current_thread():
+            return 0
+        matched = 0
+        resp = self.bus.recv(timeout)
+        while resp is not None:
+            if self._dispatch(resp):
+                matched += 1
+            resp = self.bus.recv(0.0)
+        return matched
+
+    def wait(self, futures: Iterable[Future], timeout: Optional[float] = None) -> bool:
+        """Dispatches incoming frames until the given futures complete.
+
+        Requests which are still outstanding when the timeout expires are
+        cancelled and removed from the in-flight table.
+
+        Args:
+            futures: The futures returned by the `submit_*` methods.
+            timeout: How long to wait, defaults to the largest timeout derived
+                from the round-trip times of the motors the requests went to.
+
+        Returns:
+            True if every future completed, False otherwise.
+        """
+        pending = [future for future in futures if not future.done()]
+        if timeout is None:
+            timeout = self.request_timeout(pending)
+        deadline = time.monotonic() + timeout
+        if pending and self.consumer is not None and self.consumer is not threading.current_thread():
+            # The consumer thread completes the futures, so there is nothing to receive here.
+            pending = list(wait_futures(pending, max(0.0, deadline - time.monotonic())).not_done)
+        while pending:
+            remaining = deadline - time.monotonic()
+            # Replies which arrived while another bus was being waited on are dispatched even past the deadline.
+            self.poll(max(0.0, remaining))
+            pending = [future for future in pending if not future.done()]
+            if remaining <= 0:
+                break
+
+        if not pending:
+            return True
+
+        cancelled = set(pending)
+        with self._lock:
+            for key, requests in list(self._in_flight.items()):
+                missed = [i for i, request in enumerate(requests) if request.future in cancelled]
+                for _ in missed:
+                    self.rtt.record_miss(key[1])
+                # Replies come in order, so the control frames sent before an unanswered request are given up on.
+                last = missed[-1] if missed else -1
+                kept = deque(
+                    request
+                    for i, request in enumerate(requests)
+                    if request.future not in cancelled and (request.future is not None or i > last)
+                )
+                if kept:
+                    self._in_flight[key] = kept
+                else:
+                    del self._in_flight[key]
+        for future in pending:
+            future.cancel()
+        return False
+
+    def request_timeout(self, futures: Iterable[Future]) -> float:
+        """Returns the largest timeout derived from the round-trip times of the motors the requests went to.
+
+        Args:
+            futures: The futures returned by the `submit_*` methods.
+        """
+        return max((self.rtt.timeout(motor_id) for motor_id in self._motor_ids(futures)), default=0.0)
+
+    def _motor_ids(self, futures: Iterable[Future]) -> Set[int]:
+        # The motors which the outstanding requests behind the futures were sent to.
+        wanted = set(futures)
+        with self._lock:
+            return {key[1] for key, requests in self._in_flight.items() if any(r.future in wanted for r in requests)}
+
+    @property
+    def in_flight(self) -> int:
+        return sum(len(requests) for requests in self._in_flight.values())
 
     def error_rate(self) -> float:
         return self._recv_error_count / self._recv_count
@@ -177,6 +584,108 @@ class Client:
         arb_id = id_data_2 + (id_data_1 << 8) + (msg_type.value << 24)
         return can.Message(arbitration_id=arb_id, data=data, is_extended_id=True)
 
+    def _frame(self, msg_type: MotorMsg, id_data_1: int, id_data_2: int) -> FrameBuffer:
+        # One preallocated frame per command type and motor, patched in place before each send.
+        arb_id = id_data_2 + (id_data_1 << 8) + (msg_type.value << 24)
+        key = (msg_type.value, id_data_2)
+        frame = self._frames.get(key)
+        if frame is None:
+            frame = self._frames[key] = FrameBuffer(arb_id, is_extended_id=True)
+        else:
+            frame.arbitration_id = arb_id
+        return frame
+
+    def _submit(
+        self,
+        msg_type: MotorMsg,
+        motor_id: int,
+        data: Optional[bytes],
+        key: InFlightKey,
+        parse: Callable[[can.Message], Any],
+    ) -> Future:
+        # If `data` is None, the payload has already been written into the frame.
+        frame = self._frame(msg_type, self.host_can_id, motor_id)
+        if data is not None:
+            frame.data[:] = data
+        future: Future = Future()
+        with self._lock:
+            self._in_flight.setdefault(key, deque()).append(PendingRequest(future, parse, time.monotonic()))
+        frame.send(self.bus)
+        return future
+
+    def _result(self, future: Future) -> Any:
+        if not self.wait([future]):
+            raise Exception("No response from motor received")
+        return future.result()
+
+    def _submit_feedback(self, msg_type: MotorMsg, motor_id: int, data: Optional[bytes], motor_model: int) -> Future:
+        if motor_id in self.reporting:
+            raise Exception(f"Motor {motor_id} is sending active reports, which cannot be told apart from the reply")
+        key = (MotorMsg.Feedback.value, motor_id, None)
+        return self._submit(
+            msg_type, motor_id, data, key, lambda resp: self._parse_feedback_resp(resp, motor_id, motor_model)
+        )
+
+    def _dispatch(self, resp: can.Message) -> bool:
+        self._recv_count += 1
+        if resp.is_error_frame:
+            self._recv_error_count += 1
+            return False
+
+        msg_type, msg_motor_id, host_id = self._parse_resp_abitration_id(resp.arbitration_id)
+        if host_id != self.host_can_id:
+            return False
+
+        param_id = struct.unpack("<H", resp.data[:2])[0] if msg_type == MotorMsg.ReadParam.value else None
+        key = (msg_type, msg_motor_id, param_id)
+        now = time.monotonic()
+        # Frames can wait in the receive queue, so lost replies are detected by when the frame arrived.
+        arrived = now - max(0.0, time.time() - resp.timestamp) if resp.timestamp else now
+        if msg_type == MotorMsg.Feedback.value and msg_motor_id in self.reporting:
+            # Any feedback frame may be a report, so none is taken as an acknowledgement.
+            self._parse_unsolicited(resp)
+            return False
+        with self._lock:
+            requests = self._in_flight.get(key)
+            if requests:
+                self._expire_control_replies(requests, arrived - self.rtt.timeout(msg_motor_id))
+            request = requests.popleft() if requests else None
+            if requests is not None and not requests:
+                del self._in_flight[key]
+
+        if request is None:
+            if msg_type == MotorMsg.Feedback.value:
+                self._parse_unsolicited(resp)
+            return False
+
+        if request.future is None:
+            request.parse(resp)
+            return False
+        self.rtt.record(msg_motor_id, now - request.sent_at)
+        try:
+            request.future.set_result(request.parse(resp))
+        except Exception as e:
+            request.future.set_exception(e)
+        return True
+
+    def _parse_unsolicited(self, resp: can.Message) -> None:
+        # Feedback which does not acknowledge a request, like replies to control frames.
+        motor_id = (resp.arbitration_id & 0xFF00) >> 8
+        feedback = self._parse_feedback_resp(resp, motor_id, self._motor_models.get(motor_id, 1))
+        handler = self.feedback_handlers.get(motor_id)
+        if handler is not None:
+            handler(feedback)
+
+    def _expire_control_replies(self, requests: Deque[PendingRequest], sent_before: float) -> None:
+        # Replies to control frames which were lost would otherwise swallow the acknowledgements queued after them.
+        while requests and requests[0].future is None and requests[0].sent_at < sent_before:
+            requests.popleft()
+
+    def _check_no_consumer(self) -> None:
+        # These calls receive their reply directly, which would race with the thread owning the bus.
+        if self.consumer is not None:
+            raise Exception("The bus is owned by a report stream, stop it first")
+
     def _recv(self) -> can.Message:
         retry_count = 0
         while retry_count <= self.retry_count:
@@ -200,18 +709,6 @@ class Client:
         host_id = aid & 0xFF
         return msg_type, msg_motor_id, host_id
 
-    def _parse_and_validate_read_resp_arbitration_id(
-        self, resp: can.Message, expected_msg_type: int, expected_motor_id: int
-    ) -> bool:
-        msg_type, msg_motor_id, host_id = self._parse_resp_abitration_id(resp.arbitration_id)
-        if msg_type != expected_msg_type:
-            return False
-        if host_id != self.host_can_id:
-            raise Exception("Invalid host CAN ID", resp)
-        if msg_motor_id != expected_motor_id:
-            raise Exception("Invalid motor ID received", resp)
-        return True
-
     def _parse_and_validate_resp_arbitration_id(
         self, resp: can.Message, expected_msg_type: int, expected_motor_id: int
     ) -> tuple:
@@ -228,31 +725,21 @@ class Client:
     def _parse_feedback_resp(self, resp: can.Message, motor_id: int, motor_model: int) -> FeedbackResp:
         self._parse_and_validate_resp_arbitration_id(resp, MotorMsg.Feedback.value, motor_id)
 
-        aid = resp.arbitration_id
-        error_bits = (aid & 0x1F0000) >> 16
-        errors = []
-        for i in range(6):
-            value = 1 << i
-            if value & error_bits:
-                errors.append(MotorError(value))
-
-        mode = MotorMode((aid & 0x400000) >> 22)
-
-        angle_raw = struct.unpack(">H", resp.data[0:2])[0]
-        angle = (float(angle_raw) / 65535 * 8 * math.pi) - 4 * math.pi
-
-        velocity_raw = struct.unpack(">H", resp.data[2:4])[0]
-        velocity_range = 88 if motor_model == 1 else 30
-        velocity = (float(velocity_raw) / 65535 * velocity_range) - velocity_range / 2
-
-        torque_raw = struct.unpack(">H", resp.data[4:6])[0]
-        torque_range = 34 if motor_model == 1 else 240
-        torque = (float(torque_raw) / 65535 * torque_range) - torque_range / 2
-
-        temp_raw = struct.unpack(">H", resp.data[6:8])[0]
-        temp = float(temp_raw) / 10
-
-        return FeedbackResp(motor_id, errors, mode, angle, velocity, torque, temp)
+        feedback = parse_feedback(resp.arbitration_id, resp.data, motor_id, motor_model)
+        self._motor_models[motor_id] = motor_model
+        self._feedback[motor_id] = feedback
+        self.states[motor_id] = MotorState(
+            feedback.angle,
+            feedback.velocity,
+            feedback.torque,
+            feedback.temp,
+            feedback.errors,
+            feedback.mode,
+            time.monotonic(),
+        )
+        for listener in self.feedback_listeners:
+            listener(feedback)
+        return feedback
 
     def _normalize_param_id(self, param_id: int | str) -> int:
         if isinstance(param_id, str):
@@ -261,22 +748,36 @@ class Client:
         return param_id
 
     def _convert_to_bytes(self, angle: float, angular_velocity: float, kp: float, kd: float) -> bytes:
-        # Ensure values are within their respective ranges
-        angle = max(min(angle, 4 * 3.14159), -4 * 3.14159)
-        angular_velocity = max(min(angular_velocity, 15.0), -15.0)
-        kp = max(min(kp, 5000.0), 0.0)
-        kd = max(min(kd, 100.0), 0.0)
-
-        # Convert each parameter to the corresponding byte values in big-endian order
-        angle_bytes = int(((angle + 4 * 3.14159) / (8 * 3.14159)) * 65535)
-        angular_velocity_bytes = int(((angular_velocity + 15.0) / 30.0) * 65535)
-        kp_bytes = int((kp / 5000.0) * 65535)
-        kd_bytes = int((kd / 100.0) * 65535)
-
-        command = 0
-        command = push_bits(command, angle_bytes, 16)
-        command = push_bits(command, angular_velocity_bytes, 16)
-        command = push_bits(command, kp_bytes, 16)
-        command = push_bits(command, kd_bytes, 16)
-
-        return command.to_bytes(8, byteorder="little")
+        data = bytearray(8)
+        encode_control_into(data, angle, angular_velocity, kp, kd)
+        return bytes(data)
+
+
+def wait_all(futures: Mapping[Client, Iterable[Future]], timeout: Optional[float] = None) -> bool:
+    """Waits for requests sent on several buses against one deadline.
+
+    Replies queue up on every bus while another one is being waited on, so
+    waiting on each client in turn until the shared deadline takes as long as
+    the slowest bus rather than the sum of their timeouts.
+
+    Args:
+        futures: The futures returned by the `submit_*` methods, by the client they were sent through.
+        timeout: How long to wait, defaults to the largest timeout derived from the round-trip times of the
+            motors the requests went to.
+
+    Returns:
+        True if every future completed, False otherwise.
+    """
+    pending = {
+        client: [future for future in client_futures if not future.done()] for client, client_futures in futures.items()
+    }
+    if timeout is None:
+        timeout = max(
+            (client.request_timeout(client_futures) for client, client_futures in pending.items()), default=0.0
+        )
+    deadline = time.monotonic() + timeout
+    completed = True
+    for client, client_futures in pending.items():
+        if client_futures and not client.wait(client_futures, max(0.0, deadline - time.monotonic())):
+            completed = False
+    return completed
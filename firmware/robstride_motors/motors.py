@@ -5,10 +5,13 @@ TODO: create a generic motor class that can work with any motor type.
 """
 
 import time
+from concurrent.futures import Future
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Dict, Optional, Sequence
 
 import firmware.robstride_motors.client as robstride
+from firmware.motor_utils.bus_pool import BusPool
+from firmware.motor_utils.can_filters import robstride_filters
 from firmware.motor_utils.motor_utils import MotorInterface, MotorParams
 
 
@@ -26,22 +29,59 @@ class RobstrideParams(MotorParams):
     spd_filt_gain: float
 
 
+# How old a cached state can be before `get_state` goes to the bus, in seconds.
+DEFAULT_MAX_AGE = 0.01
+
+# "position" writes the `loc_ref` parameter and waits for the feedback reply, "operation" sends fire-and-forget
+# control frames with the position, velocity, gains and torque, and consumes the replies in the background.
+CONTROL_MODES = {
+    "position": robstride.RunMode.Position,
+    "operation": robstride.RunMode.Operation,
+}
+
+
 class RobstrideMotor(MotorInterface):
     """A class to interface with a motor over a CAN bus."""
 
     CALIBRATION_SPEED = 0.5  # rad/s
 
-    def __init__(self, motor_id: int, control_params: RobstrideParams, client: robstride.Client) -> None:
+    def __init__(
+        self,
+        motor_id: int,
+        control_params: RobstrideParams,
+        client: robstride.Client,
+        *,
+        initialize: bool = True,
+        control_mode: str = "position",
+        kp: float = 0.0,
+        kd: float = 0.0,
+    ) -> None:
         """Initializes the motor.
 
         Args:
             motor_id: The ID of the motor.
             control_params: The control parameters for the motor.
             client: The CAN bus interface.
+            initialize: Whether to configure the motor right away. Pass False
+                to configure many motors at once with `bulk.configure_motors`.
+            control_mode: How positions are commanded, one of `CONTROL_MODES`.
+            kp: The position gain of the control frames, used in operation mode.
+            kd: The velocity gain of the control frames, used in operation mode.
         """
         super().__init__(motor_id, control_params, client)
+        if control_mode not in CONTROL_MODES:
+            raise ValueError(f"Unsupported control mode: {control_mode}")
+        self.control_mode = control_mode
+        self.run_mode = CONTROL_MODES[control_mode]
+        self.kp = kp
+        self.kd = kd
+        self.feedback: Optional[robstride.FeedbackResp] = None
+        if self.run_mode == robstride.RunMode.Operation:
+            client.feedback_handlers[motor_id] = self._on_feedback
+        if not initialize:
+            return
         self.disable()
-        self.set_operation_mode(robstride.RunMode.Position)
+        self.set_operation_mode(self.run_mode)
         self.enable()
         self.get_position()
         self.set_control_params()
@@ -67,43 +107,98 @@ class RobstrideMotor(MotorInterface):
         self.communication_interface.enable(self.motor_id)
 
     def set_position(self, position: float, **kwargs: Any) -> None:
-        """Sets the position of the motor using force position hybrid control.
+        """Sets the position of the motor.
+
+        In operation mode a single control frame is sent without waiting for
+        the reply, and replies to earlier frames which have already arrived
+        update the motor state.
 
         Args:
             position: The position to set the motor to.
-            kwargs: Additional arguments to pass to the motor.
+            kwargs: Additional arguments to pass to the motor. (speed in rad/s, torque in Nm)
         """
+        if self.run_mode == robstride.RunMode.Operation:
+            speed = kwargs.get("speed", 0.0)
+            torque = kwargs.get("torque", 0.0)
+            self.communication_interface.use_control_mode(self.motor_id, torque, speed, position, self.kp, self.kd)
+            self.communication_interface.poll(0.0)
+            return
+
         resp = self.communication_interface.write_param(self.motor_id, "loc_ref", position)
         self.position = resp.angle
 
+    def submit_position(self, position: float) -> Optional[Future]:
+        """Sends a position setpoint without waiting for the reply.
+
+        Args:
+            position: The position to set the motor to.
+
+        Returns:
+            In position mode, the future of the `loc_ref` write, which resolves
+            to the feedback reply. In operation mode the control frame has no
+            matched reply, so None.
+        """
+        if self.run_mode == robstride.RunMode.Operation:
+            self.communication_interface.use_control_mode(self.motor_id, 0.0, 0.0, position, self.kp, self.kd)
+            return None
+        return self.communication_interface.submit_write_param(self.motor_id, "loc_ref", position)
+
+    def _on_feedback(self, feedback: robstride.FeedbackResp) -> None:
+        self.feedback = feedback
+        self.position = feedback.angle
+        self.speed = feedback.velocity
+
+    def get_state(self, max_age: float = DEFAULT_MAX_AGE) -> robstride.MotorState:
+        """Returns the state of the motor, only going to the bus if the cached state is too old.
+
+        The cache is updated by every feedback frame from the motor, including
+        the replies to enable, disable, zero position and parameter writes.
+
+        Args:
+            max_age: The maximum age of the cached state, in seconds.
+
+        Returns:
+            The state of the motor.
+        """
+        state = self.communication_interface.get_state(self.motor_id, max_age)
+        self.position = state.angle
+        self.speed = state.velocity
+        return state
+
     def set_zero_position(self) -> None:
         """Sets the zero position of the motor."""
         _ = self.communication_interface.zero_pos(self.motor_id)
         self.set_position(0)
 
-    def get_position(self) -> float:
+    def get_position(self, max_age: float = 0.0) -> float:
         """Updates the value of the motor's position attribute.
 
         Args:
-            wait_time: how long to wait for a response from the motor
-            read_only: whether to read the position value or not
+            max_age: use the cached position instead of reading it if it is at most this old, in seconds
         Returns:
-            "Valid" if the message is valid, "Invalid" otherwise
+            The position of the motor
         """
+        state = self.communication_interface.cached_state(self.motor_id, max_age)
+        if state is not None:
+            self.position = state.angle
+            return self.position
         resp = self.communication_interface.read_param(self.motor_id, "mechpos")
         if type(resp) is float:
             self.position = resp
         return self.position
 
-    def get_speed(self) -> float:
+    def get_speed(self, max_age: float = 0.0) -> float:
         """Updates the value of the motor's speed attribute.
 
         Args:
-            wait_time: how long to wait for a response from the motor
-            read_only: whether to read the speed value or not
+            max_age: use the cached speed instead of reading it if it is at most this old, in seconds
         Returns:
-            "Valid" if the message is valid, "Invalid" otherwise
+            The speed of the motor
         """
+        state = self.communication_interface.cached_state(self.motor_id, max_age)
+        if state is not None:
+            self.speed = state.velocity
+            return self.speed
         resp = self.communication_interface.read_param(self.motor_id, "mechvel")
         if type(resp) is float:
             self.speed = resp
@@ -177,8 +272,8 @@ class RobstrideMotor(MotorInterface):
         low = self.get_position()
         print(f"Low: {low}")
 
-        # Set run mode to position
-        self.set_operation_mode(robstride.RunMode.Position)
+        # Set run mode back to the control mode
+        self.set_operation_mode(self.run_mode)
 
         setpoint = (high + low) / 2
 
@@ -195,3 +290,69 @@ class RobstrideMotor(MotorInterface):
 
     def __str__(self) -> str:
         return f"RobstrideMotor ({self.motor_id})"
+
+
+def create_motor(
+    motor_id: int,
+    control_params: Dict[str, Any],
+    communication_interface: robstride.Client,
+    *,
+    initialize: bool = True,
+    control_mode: str = "position",
+) -> RobstrideMotor:
+    """Creates a Robstride motor from its config parameters, the `robstride` backend of `MotorFactory`.
+
+    Args:
+        motor_id: The ID of the motor.
+        control_params: The parameters of the motor from the config.
+        communication_interface: The client of the bus of the motor.
+        initialize: Whether to configure the motor right away.
+        control_mode: One of `CONTROL_MODES`.
+
+    Returns:
+        The motor.
+    """
+    robstride_params = RobstrideParams(
+        limit_torque=control_params["limit_torque"],
+        cur_kp=control_params["cur_kp"],
+        cur_ki=control_params["cur_ki"],
+        cur_fit_gain=control_params["cur_fit_gain"],
+        limit_spd=control_params["limit_spd"],
+        limit_cur=control_params["limit_cur"],
+        loc_kp=control_params["loc_kp"],
+        spd_kp=control_params["spd_kp"],
+        spd_ki=control_params["spd_ki"],
+        spd_filt_gain=control_params["spd_filt_gain"],
+    )
+    if control_mode == "operation":
+        # The config requires the gains in operation mode, position mode does not use them.
+        return RobstrideMotor(
+            motor_id,
+            robstride_params,
+            communication_interface,
+            initialize=initialize,
+            control_mode=control_mode,
+            kp=control_params["kp"],
+            kd=control_params["kd"],
+        )
+    return RobstrideMotor(
+        motor_id, robstride_params, communication_interface, initialize=initialize, control_mode=control_mode
+    )
+
+
+def create_interface(bus_pool: BusPool, canbus_id: int, motor_ids: Sequence[int], host_can_id: int) -> robstride.Client:
+    """Opens the bus of Robstride motors, the `robstride` interface factory of `MotorFactory`.
+
+    Args:
+        bus_pool: The pool of the shared CAN channels.
+        canbus_id: The ID of the CAN bus.
+        motor_ids: The IDs of the motors on the bus, whose replies pass the receive filters.
+        host_can_id: The CAN ID of the host, which the replies are addressed to.
+
+    Returns:
+        The client shared by every motor on the bus, since it reads the replies from the bus directly.
+    """
+    view = bus_pool.view(f"can{canbus_id}", filter_builder=lambda ids: robstride_filters(ids, host_can_id))
+    for motor_id in motor_ids:
+        view.add_motor(motor_id)
+    return robstride.Client(view, host_can_id=host_can_id)
@@ -0,0 +1,145 @@
+"""Defines a continuous feedback stream from Robstride motors in active report mode.
+
+In active report mode every motor sends feedback frames on its own at a fixed
+rate. A background thread receives them, together with the replies to any
+requests, and writes the decoded values into a `StateTable`. The control loop
+then reads the state of every joint from the table without sending any
+query frames.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+import firmware.robstride_motors.client as robstride
+
+logger = logging.getLogger(__name__)
+
+
+class StateSnapshot(NamedTuple):
+    motor_ids: List[int]
+    angles: np.ndarray
+    velocities: np.ndarray
+    torques: np.ndarray
+    temps: np.ndarray
+    timestamps: np.ndarray
+    # Number of frames received for each motor, an unchanged count means no new feedback.
+    sequences: np.ndarray
+
+
+class StateTable:
+    """The latest feedback of each motor, written by one thread and read without locks.
+
+    Every slot has a sequence counter which is odd while the slot is being
+    written. Readers copy the table and retry if any counter changed or was
+    odd during the copy, like a seqlock.
+    """
+
+    def __init__(self, motor_ids: Iterable[int]) -> None:
+        self.motor_ids = list(motor_ids)
+        self.index: Dict[int, int] = {motor_id: i for i, motor_id in enumerate(self.motor_ids)}
+        size = len(self.motor_ids)
+        self._sequences = np.zeros(size, dtype=np.uint64)
+        self._angles = np.zeros(size)
+        self._velocities = np.zeros(size)
+        self._torques = np.zeros(size)
+        self._temps = np.zeros(size)
+        self._timestamps = np.zeros(size)
+
+    def update(self, feedback: robstride.FeedbackResp) -> None:
+        i = self.index.get(feedback.servo_id)
+        if i is None:
+            return
+        self._sequences[i] += 1
+        self._angles[i] = feedback.angle
+        self._velocities[i] = feedback.velocity
+        self._torques[i] = feedback.torque
+        self._temps[i] = feedback.temp
+        self._timestamps[i] = time.monotonic()
+        self._sequences[i] += 1
+
+    def read(self, retries: int = 100) -> StateSnapshot:
+        """Returns a consistent copy of the table.
+
+        Args:
+            retries: How many times to retry if a write happened during the copy.
+
+        Returns:
+            The snapshot of every motor, in the order of `motor_ids`.
+        """
+        for _ in range(retries):
+            before = self._sequences.copy()
+            snapshot = StateSnapshot(
+                self.motor_ids,
+                self._angles.copy(),
+                self._velocities.copy(),
+                self._torques.copy(),
+                self._temps.copy(),
+                self._timestamps.copy(),
+                before // 2,
+            )
+            if not (before & 1).any() and np.array_equal(before, self._sequences):
+                return snapshot
+        raise Exception("State table is being written too often to read a consistent snapshot")
+
+
+class ReportStream:
+    """Enables active reporting on a set of motors and consumes the reports in the background."""
+
+    def __init__(self, client: robstride.Client, motor_ids: Iterable[int], poll_timeout: float = 0.05) -> None:
+        """Initializes the stream.
+
+        Args:
+            client: The client of the bus the motors are on.
+            motor_ids: The IDs of the motors to stream from.
+            poll_timeout: How long the background thread waits for a frame
+                before checking whether it should stop, in seconds.
+        """
+        self.client = client
+        self.table = StateTable(motor_ids)
+        self.poll_timeout = poll_timeout
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self.client.feedback_listeners.append(self.table.update)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="robstride-report-stream", daemon=True)
+        # From now on, only the stream thread receives frames from the bus.
+        self.client.consumer = self._thread
+        self._thread.start()
+        for motor_id in self.table.motor_ids:
+            self.client.set_active_report(motor_id, True)
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        for motor_id in self.table.motor_ids:
+            self.client.set_active_report(motor_id, False)
+        self._running = False
+        self._thread.join()
+        self._thread = None
+        self.client.consumer = None
+        self.client.feedback_listeners.remove(self.table.update)
+
+    def read(self) -> StateSnapshot:
+        return self.table.read()
+
+    def _run(self) -> None:
+        while self._running:
+            try:
+                self.client.poll(self.poll_timeout)
+            except Exception:
+                logger.exception("Failed to decode report")
+
+    def __enter__(self) -> "ReportStream":
+        self.start()
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.stop()
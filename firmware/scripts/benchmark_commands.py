@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""Compares the list-based bionic command builders with the struct-based encoders.
+
+Usage:
+    python -m firmware.scripts.benchmark_commands --number 100000
+"""
+
+import timeit
+from typing import Callable, List, Tuple
+
+from tap import Tap
+
+from firmware.bionic_motors import commands
+
+
+class ArgumentParser(Tap):
+    number: int = 100000  # The number of calls to time for each encoder.
+
+
+def main() -> None:
+    args = ArgumentParser().parse_args()
+    buffer = bytearray(8)
+
+    cases: List[Tuple[str, Callable[[], object], Callable[[], object]]] = [
+        (
+            "force_position_hybrid_control",
+            lambda: bytes(commands.force_position_hybrid_control(100, 4, 12.5, 1.0, 0)),
+            lambda: commands.force_position_hybrid_control_into(buffer, 0, 100, 4, 12.5, speed=1.0, torque_ff=0),
+        ),
+        (
+            "set_position_control",
+            lambda: bytes(commands.set_position_control(1, 12.5)),
+            lambda: commands.set_position_control_into(buffer, 0, 12.5),
+        ),
+        (
+            "set_speed_control",
+            lambda: bytes(commands.set_speed_control(1, 30.0)),
+            lambda: commands.set_speed_control_into(buffer, 0, 30.0),
+        ),
+        (
+            "set_current_torque_control",
+            lambda: bytes(commands.set_current_torque_control(1, 5)),
+            lambda: commands.set_current_torque_control_into(buffer, 0, 5),
+        ),
+        (
+            "set_zero_position",
+            lambda: bytes(commands.set_zero_position(1)),
+            lambda: commands.set_zero_position_into(buffer, 0, 1),
+        ),
+        ("get_motor_pos", lambda: bytes(commands.get_motor_pos()), lambda: commands.MOTOR_POS_QUERY),
+    ]
+
+    print(f"{'command':<32}{'builder (us)':>14}{'encoder (us)':>14}{'speedup':>10}")
+    for name, builder, encoder in cases:
+        builder_time = timeit.timeit(builder, number=args.number) / args.number * 1e6
+        encoder_time = timeit.timeit(encoder, number=args.number) / args.number * 1e6
+        print(f"{name:<32}{builder_time:>14.3f}{encoder_time:>14.3f}{builder_time / encoder_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    # python -m firmware.scripts.benchmark_commands
+    main()
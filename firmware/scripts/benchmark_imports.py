@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""Measures how long importing the robot modules takes in a fresh interpreter.
+
+Each module is imported in a new Python process with `-X importtime`, and the
+median of the cumulative import times is reported, together with which motor
+stacks the import loaded.
+
+Usage:
+    python -m firmware.scripts.benchmark_imports --repeat 10
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+from typing import List, Tuple
+
+from tap import Tap
+
+STACKS = ("firmware.bionic_motors", "firmware.robstride_motors", "yaml", "can", "numpy")
+
+# Prints the motor stacks which were loaded, so the parent can report them.
+PROBE = "import sys, json, {module}; print(json.dumps([s for s in {stacks} if s in sys.modules]))"
+
+
+class ArgumentParser(Tap):
+    modules: List[str] = [
+        "firmware.robot.robot",
+        "firmware.robot.config",
+        "firmware.motor_utils.motor_factory",
+    ]  # The modules to import.
+    repeat: int = 10  # The number of fresh interpreters to import each module in.
+
+
+def import_time(module: str) -> Tuple[float, List[str]]:
+    """Imports a module in a fresh interpreter.
+
+    Args:
+        module: The module to import.
+
+    Returns:
+        The cumulative import time of the module in seconds, and the stacks it loaded.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module, stacks=STACKS)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in reversed(result.stderr.splitlines()):
+        # Lines look like "import time:  self [us] | cumulative | imported package".
+        _, cumulative, name = line.split("|")
+        if name.strip() == module:
+            return int(cumulative) / 1e6, json.loads(result.stdout)
+    raise Exception(f"No import time reported for {module}")
+
+
+def main() -> None:
+    args = ArgumentParser().parse_args()
+
+    print(f"{'module':<40}{'median (ms)':>12}{'min (ms)':>10}  loaded")
+    for module in args.modules:
+        times: List[float] = []
+        for _ in range(args.repeat):
+            elapsed, loaded = import_time(module)
+            times.append(elapsed)
+        print(f"{module:<40}{statistics.median(times) * 1e3:>12.1f}{min(times) * 1e3:>10.1f}  {', '.join(loaded)}")
+
+
+if __name__ == "__main__":
+    # python -m firmware.scripts.benchmark_imports
+    main()
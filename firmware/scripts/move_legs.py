@@ -21,6 +21,7 @@ import math
 import time
 from typing import Dict, List
 
+from firmware.robot.control_loop import ControlLoop
 from firmware.robot.robot import Robot
 
 
@@ -33,7 +34,7 @@ def test_motor(robot: Robot, config: Dict, motor_num: int) -> None:
     robot.test_motor(config["motors"][motor_num], sign=config["signs"][motor_num])
 
 
-def test_torque_control(robot: Robot, config: Dict) -> None:
+def test_torque_control(robot: Robot, config: Dict, rate: float = 100.0) -> None:
     # In an ideal world, kt would actually be the torque constant, but we're using it as a scaling factor
     integral_errors: List[int] = [0, 0, 0, 0, 0, 0]
     last_errors: List[int] = [0, 0, 0, 0, 0, 0]
@@ -79,13 +80,17 @@ def test_torque_control(robot: Robot, config: Dict) -> None:
 
     i_max = 40
     desired_positions: List[int] = [30, 0, 0, 0, 0, 0]
+    motors = config["motors"][:6]
 
-    while True:
-        for motor_num in range(6):
-            motor = config["motors"][motor_num]
-            pos_current = motor.position
-            speed_current = motor.speed
-            # print(f"Motor {motor_num}: position={pos_current} speed={speed_current}")
+    def read() -> List[tuple]:
+        for motor in motors:
+            motor.update_position()
+            motor.update_speed()
+        return [(motor.position, motor.speed) for motor in motors]
+
+    def compute(state: List[tuple]) -> List[float]:
+        efforts = []
+        for motor_num, (pos_current, speed_current) in enumerate(state):
             if motor_num < 2:
                 torque_ff = 400 * math.sin(pos_current)
             else:
@@ -97,10 +102,18 @@ def test_torque_control(robot: Robot, config: Dict) -> None:
             print(f"Motor {motor_num} error: {error} control effort: {control_effort}")
             if abs(control_effort) > i_max:
                 control_effort = control_effort // abs(control_effort) * i_max
+            efforts.append(control_effort)
+        return efforts
 
+    def write(efforts: List[float]) -> None:
+        for motor, control_effort in zip(motors, efforts):
             motor.set_position_current_control(control_effort)
-            motor.update_position()
-            motor.update_speed()
+
+    loop = ControlLoop(rate, read, compute, write)
+    try:
+        loop.run()
+    finally:
+        print(loop.stats)
 
 
 def main() -> None:
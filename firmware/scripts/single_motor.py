@@ -1,5 +1,5 @@
 #!/usr/bin/env python
-"""Control a single motor from the command line."""
+"""Control a single Bionic or Robstride motor from the command line."""
 
 import asyncio
 import curses
@@ -12,13 +12,45 @@ from tap import Tap
 from firmware.motors.can.callback import CanWithCallback
 from firmware.motors.can.dry_run import CanDryRun
 from firmware.motors.can.ip import CanIP
-from firmware.motors.motor import Motors
+from firmware.motors.motor import BionicMotors, Motors, RobstrideMotors
+from firmware.robstride_motors.client import FeedbackResp, RunMode, param_ids_by_name
+
+BIONIC_COMMANDS = {
+    "q": "Quit the program",
+    "c": "Clear the TX and RX panes",
+    "a <n>": "Set absolute position to N degrees",
+    "zero": "Set the current position as zero",
+    "r p": "Read the position",
+    "r v": "Read the speed",
+    "r c": "Read the current",
+}
+
+ROBSTRIDE_COMMANDS = {
+    "q": "Quit the program",
+    "c": "Clear the TX and RX panes",
+    "e": "Enable the motor",
+    "d": "Disable the motor",
+    "mode <m>": f"Set the run mode to one of {', '.join(mode.name.lower() for mode in RunMode)}",
+    "a <n>": "Set the position reference to N radians",
+    "zero": "Set the current position as zero",
+    "r p": "Read the position",
+    "r v": "Read the speed",
+    "r c": "Read the current",
+    "r <param>": f"Read a parameter, one of {', '.join(param_ids_by_name)}",
+    "w <param> <n>": "Write a parameter",
+}
+
+# Parameters read by the shorthand read commands of Robstride motors.
+ROBSTRIDE_READS = {"p": "mechpos", "v": "mechvel", "c": "iqf"}
 
 
 class ArgumentParser(Tap):
     can_bus: int = 0  # The CAN bus to use.
-    can_read_bus: int = 1  # The CAN bus to use for reading.
-    motor_id: int | None = None  # The specific motor to control.
+    motor_type: str = "bionic"  # The type of the motor, "bionic" or "robstride".
+    motor_id: int | None = None  # The specific motor to control, found by probing IDs 1 to 127 if not set.
+    kp: float = 0.5  # The proportional gain of Bionic position commands.
+    kd: float = 0.1  # The derivative gain of Bionic position commands.
+    host_can_id: int = 0xAA  # The CAN ID of the host for Robstride motors.
     dry_run: bool = False  # Use the dry run interface.
     width: int = 90  # The width of the Curses window.
     height: int = 25  # The height of the Curses window.
@@ -33,6 +65,8 @@ class ArgumentParser(Tap):
 
 async def main() -> None:
     args = ArgumentParser().parse_args()
+    if args.motor_type not in ("bionic", "robstride"):
+        raise ValueError(f"Unsupported motor type: {args.motor_type}")
 
     try:
         stdscr = curses.initscr()
@@ -79,33 +113,7 @@ async def main() -> None:
         command_win_offset_h = 0
         command_win_offset_w = 0
 
-        commands = {
-            "q": "Quit the program",
-            "c": "Clear the TX and RX panes",
-            "m <n>": "Move by N degrees",
-            "v <n>": "Set velocity to N degrees / second",
-            "a <n>": "Set absolute position to N degrees",
-            "t <n>": "Set motor current to N amps",
-            "reset": "Reset the motor",
-            "r a": "Read acceleration",
-            "r i": "Read single-turn encoder",
-            "r m": "Read multi-turn encoder angle",
-            "r p": "Reads multi-turn encoder position",
-            "r o": "Reads multi-turn encoder original position",
-            "r z": "Reads multi-turn encoder zero offset",
-            "r s": "Read motor status and errors",
-            "r t": "Get system runtime",
-            "r w": "Get the motor power",
-            "r pid": "Read the PID values",
-            "w z": "Write multi-turn encoder zero offset",
-            "w z <n>": "Write multi-turn encoder zero offset value",
-            "w pid <v/p/c> <ki/kp> <n>": "Write PID value",
-            "mode": "Get the system operating mode",
-            "version": "Gets the system version",
-            "model": "Gets the motor model",
-            "shutdown": "Shutdown the motor",
-            "stop": "Stop the motor",
-        }
+        commands = BIONIC_COMMANDS if args.motor_type == "bionic" else ROBSTRIDE_COMMANDS
         command_list = list(commands.items())
 
         def write_commands() -> None:
@@ -212,6 +220,50 @@ async def main() -> None:
 
         set_command("")
 
+        async def add_feedback(feedback: FeedbackResp) -> None:
+            await add_rx(f"Temp.: {feedback.temp}")
+            await add_rx(f"Trq.: {feedback.torque}")
+            await add_rx(f"Vel.: {feedback.velocity}")
+            await add_rx(f"Ang.: {feedback.angle}")
+            for error in feedback.errors:
+                await add_rx(f"Error: {error.name}")
+
+        async def run_bionic_command(motor: BionicMotors, command: str) -> None:
+            if command.startswith("a "):
+                await motor.set_position(motor_id, float(command[2:].strip()), args.kp, args.kd)
+            elif command == "zero":
+                await motor.set_zero_position(motor_id)
+            elif command == "r p":
+                await add_rx(f"Pos.: {await motor.get_position(motor_id)}")
+            elif command == "r v":
+                await add_rx(f"Vel.: {await motor.get_speed(motor_id)}")
+            elif command == "r c":
+                await add_rx(f"Cur.: {await motor.get_current(motor_id)}")
+            else:
+                raise ValueError
+
+        async def run_robstride_command(motor: RobstrideMotors, command: str) -> None:
+            if command == "e":
+                await add_feedback(await motor.enable(motor_id))
+            elif command == "d":
+                await add_feedback(await motor.disable(motor_id))
+            elif command.startswith("mode "):
+                run_mode = RunMode[command[5:].strip().capitalize()]
+                await add_feedback(await motor.write_param(motor_id, "run_mode", run_mode))
+            elif command.startswith("a "):
+                await add_feedback(await motor.write_param(motor_id, "loc_ref", float(command[2:].strip())))
+            elif command == "zero":
+                await add_feedback(await motor.zero_pos(motor_id))
+            elif command.startswith("r "):
+                param = command[2:].strip()
+                param = ROBSTRIDE_READS.get(param, param)
+                await add_rx(f"{param}: {await motor.read_param(motor_id, param)}")
+            elif command.startswith("w "):
+                param, value = command[2:].split()
+                await add_feedback(await motor.write_param(motor_id, param, float(value)))
+            else:
+                raise ValueError
+
         async def run_command(command: str) -> None:
             command = command.lower().strip()
             await add_tx(command)
@@ -222,132 +274,10 @@ async def main() -> None:
                     if command == "c":
                         clear_tx()
                         clear_rx()
-                    elif command.startswith("a "):
-                        degrees = float(command[2:].strip())
-                        status = await motor.set_position(motor_id, degrees)
-                        await add_rx(f"Temp.: {status.temperature}")
-                        await add_rx(f"Trq.: {status.torque_current}")
-                        await add_rx(f"Vel.: {status.shaft_velocity}")
-                        await add_rx(f"Ang.: {status.shaft_angle}")
-                    elif command.startswith("v "):
-                        rpm = float(command[2:].strip())
-                        status = await motor.set_velocity(motor_id, rpm)
-                        await add_rx(f"Temp.: {status.temperature}")
-                        await add_rx(f"Trq.: {status.torque_current}")
-                        await add_rx(f"Vel.: {status.shaft_velocity}")
-                        await add_rx(f"Ang.: {status.shaft_angle}")
-                    elif command.startswith("t "):
-                        torque = float(command[2:].strip())
-                        status = await motor.set_torque(motor_id, torque)
-                        await add_rx(f"Temp.: {status.temperature}")
-                        await add_rx(f"Trq.: {status.torque_current}")
-                        await add_rx(f"Vel.: {status.shaft_velocity}")
-                        await add_rx(f"Ang.: {status.shaft_angle}")
-                    elif command.startswith("m "):
-                        degrees = float(command[2:].strip())
-                        status = await motor.set_relative_position(motor_id, degrees)
-                        await add_rx(f"Temp.: {status.temperature}")
-                        await add_rx(f"Trq.: {status.torque_current}")
-                        await add_rx(f"Vel.: {status.shaft_velocity}")
-                        await add_rx(f"Ang.: {status.shaft_angle}")
-                    elif command == "reset":
-                        await motor.reset(motor_id)
-                        await asyncio.sleep(1.0)
-                    elif command == "shutdown":
-                        await motor.shutdown(motor_id)
-                    elif command == "stop":
-                        await motor.stop(motor_id)
-                    elif command == "mode":
-                        system_operating_mode = await motor.system_operating_mode(motor_id)
-                        await add_rx(f"Mode: {system_operating_mode}")
-                    elif command == "version":
-                        version_str = await motor.get_system_version(motor_id)
-                        await add_rx(f"Version: {version_str}")
-                    elif command == "model":
-                        model_str = await motor.motor_model(motor_id)
-                        await add_rx(f"Model: {model_str}")
-                    elif command.startswith("r "):
-                        subcommand = command[2:].strip()
-                        if subcommand == "a":
-                            acceleration = await motor.read_acceleration(motor_id)
-                            await add_rx(f"Acc.: {acceleration}")
-                        elif subcommand == "i":
-                            single_turn_data = await motor.read_single_turn_encoder(motor_id)
-                            await add_rx(f"Orig. pos.: {single_turn_data.original_position}")
-                            await add_rx(f"Current pos.: {single_turn_data.position}")
-                            await add_rx(f"Zero bias: {single_turn_data.zero_bias}")
-                        elif subcommand == "m":
-                            multi_turn_angle = await motor.read_multi_turn_angle(motor_id)
-                            await add_rx(f"Angle: {multi_turn_angle}")
-                        elif subcommand == "p":
-                            position = await motor.read_multi_turn_encoder_position(motor_id)
-                            await add_rx(f"Pos.: {position}")
-                        elif subcommand == "o":
-                            original_position = await motor.read_multi_turn_encoder_original_position(motor_id)
-                            await add_rx(f"Orig. pos.: {original_position}")
-                        elif subcommand == "z":
-                            zero_offset = await motor.read_multi_turn_encoder_zero_offset(motor_id)
-                            await add_rx(f"Zero offset: {zero_offset}")
-                        elif subcommand == "s":
-                            motor_status = await motor.read_motor_status_and_errors(motor_id)
-                            await add_rx(f"Temp.: {motor_status.temperature}")
-                            await add_rx(f"Mos. temp.: {motor_status.mos_temperature}")
-                            await add_rx(f"Brake lock: {motor_status.brake_is_locked}")
-                            await add_rx(f"Voltage: {motor_status.voltage}")
-                            for motor_status_error in motor_status.errors:
-                                await add_rx(f"Error: {motor_status_error}")
-                        elif subcommand == "t":
-                            runtime = await motor.get_system_runtime(motor_id)
-                            await add_rx(f"Runtime: {runtime}")
-                        elif subcommand == "w":
-                            power = await motor.get_power(motor_id)
-                            await add_rx(f"Power: {power}")
-                        elif subcommand == "pid":
-                            pid = await motor.read_pid(motor_id)
-                            await add_rx(f"Curr. Ki: {pid.current_ki}")
-                            await add_rx(f"Curr. Kp: {pid.current_kp}")
-                            await add_rx(f"Pos. Ki: {pid.position_ki}")
-                            await add_rx(f"Pos. Kp: {pid.position_kp}")
-                            await add_rx(f"Vel. Ki: {pid.speed_ki}")
-                            await add_rx(f"Vel. Kp: {pid.speed_kp}")
-                        else:
-                            raise ValueError
-                    elif command.startswith("w "):
-                        subcommand = command[2:].strip()
-                        if subcommand == "z":
-                            await motor.write_multi_turn_encoder_zero_offset(motor_id)
-                        elif subcommand.startswith("z "):
-                            zero_offset = int(subcommand[2:].strip())
-                            await motor.write_multi_turn_encoder_zero_offset(motor_id, zero_offset)
-                        elif subcommand.startswith("pid "):
-                            mode, kp_ki, value_str = subcommand[4:].strip().split()
-                            assert mode in ("v", "p", "c")
-                            assert kp_ki in ("ki", "kp")
-                            pid_value = int(value_str)
-                            pid = await motor.read_pid(motor_id)
-                            match mode:
-                                case "v":
-                                    if kp_ki == "ki":
-                                        pid.speed_ki = pid_value
-                                    else:
-                                        pid.speed_kp = pid_value
-                                case "p":
-                                    if kp_ki == "ki":
-                                        pid.position_ki = pid_value
-                                    else:
-                                        pid.position_kp = pid_value
-                                case "c":
-                                    if kp_ki == "ki":
-                                        pid.current_ki = pid_value
-                                    else:
-                                        pid.current_kp = pid_value
-                                case _:
-                                    raise ValueError
-                            await motor.write_pid_to_ram(motor_id, pid)
-                        else:
-                            raise ValueError
-                    else:
-                        raise ValueError
+                    elif isinstance(motor, BionicMotors):
+                        await run_bionic_command(motor, command)
+                    elif isinstance(motor, RobstrideMotors):
+                        await run_robstride_command(motor, command)
             except asyncio.TimeoutError:
                 await add_tx(f"Timeout: {command}")
             except Exception as e:
@@ -373,13 +303,22 @@ async def main() -> None:
         command_str = ""
         last_command_str = ""
 
-        async with Motors(can_interface) as motor:
+        motors: Motors
+        if args.motor_type == "bionic":
+            motors = BionicMotors(can_interface, args.timeout)
+        else:
+            motors = RobstrideMotors(can_interface, args.timeout, host_can_id=args.host_can_id)
+
+        async with motors as motor:
             if args.dry_run:
                 motor_id = 1
             elif args.motor_id is not None:
                 motor_id = args.motor_id
             else:
-                motor_id = await motor.get_single_motor_id()
+                motor_ids = await motor.get_ids(range(1, 128), args.timeout)
+                if len(motor_ids) != 1:
+                    raise ValueError(f"Expected a single motor on can{args.can_bus}, found {motor_ids}")
+                motor_id = motor_ids[0]
                 await add_rx(f"Motor ID: {motor_id}")
 
             # Main loop.
@@ -1,32 +1,59 @@
 #!/usr/bin/env python
-"""Tick all motors back and forth by 2 degrees."""
+"""Tick all motors of a Bionic robot back and forth by a few degrees.
+
+Usage:
+    python -m firmware.scripts.tick --setup full_body
+"""
 
 import asyncio
+from pathlib import Path
+from typing import Dict, List
+
+from tap import Tap
 
 from firmware.motors.can.ip import CanIP
-from firmware.motors.motor import Motors
+from firmware.motors.motor import BionicMotors
+from firmware.robot.config import JointConfig, load_robot_config
 
 
-async def main() -> None:
-    flag = False
-    delta = 3
+class ArgumentParser(Tap):
+    config: str = str(Path(__file__).parents[1] / "robot" / "config.yaml")  # The robot config file.
+    setup: str = "full_body"  # The setup of a Bionic robot in the config.
+    delta: float = 3.0  # How far to tick the motors, in degrees.
+    period: float = 1.0  # The time between ticks, in seconds.
+    timeout: float = 0.005  # How long to wait for each motor to reply when probing.
 
-    print("Starting")
-    async with Motors(CanIP("can0")) as motor:
-        await motor.reset_all()
 
-        while True:
-            motor_ids = await motor.get_ids(False, 0.005)
-            print("Tick", flag, motor_ids)
+async def tick_bus(canbus_id: int, joints: List[JointConfig], args: ArgumentParser) -> None:
+    async with BionicMotors(CanIP(f"can{canbus_id}")) as motor:
+        motor_ids = await motor.get_ids([joint.motor_id for joint in joints], args.timeout)
+        params = {joint.motor_id: joint.params_dict for joint in joints}
+        start = {motor_id: await motor.get_position(motor_id) for motor_id in motor_ids}
 
+        flag = False
+        while True:
+            print("Tick", f"can{canbus_id}", flag, motor_ids)
             for motor_id in motor_ids:
-                # position = await motor.read_multi_turn_encoder_position(motor_id)
-                # await motor.set_absolute_location(motor_id, position + (delta if flag else -delta))
-                await motor.set_relative_position(motor_id, delta if flag else -delta)
-
+                target = start[motor_id] + (args.delta if flag else -args.delta)
+                await motor.set_position(motor_id, target, params[motor_id]["kp"], params[motor_id]["kd"])
             flag = not flag
-            await asyncio.sleep(1)
+            await asyncio.sleep(args.period)
+
+
+async def main() -> None:
+    args = ArgumentParser().parse_args()
+    config = load_robot_config(args.config, args.setup)
+    if config.motor_type != "bionic":
+        raise ValueError(f"Setup {args.setup} uses {config.motor_type} motors, expected bionic")
+
+    buses: Dict[int, List[JointConfig]] = {}
+    for joint in config.joints:
+        buses.setdefault(joint.canbus_id, []).append(joint)
+
+    print("Starting")
+    await asyncio.gather(*(tick_bus(canbus_id, joints, args) for canbus_id, joints in buses.items()))
 
 
 if __name__ == "__main__":
+    # python -m firmware.scripts.tick
     asyncio.run(main())
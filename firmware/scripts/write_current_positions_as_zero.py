@@ -1,33 +1,59 @@
 #!/usr/bin/env python
-"""Writes the current motor positions as zero."""
+"""Writes the current motor positions as zero.
+
+Usage:
+    python -m firmware.scripts.write_current_positions_as_zero --setup full_body --parts left_leg right_leg
+"""
 
 import asyncio
+from pathlib import Path
+from typing import Dict, List
+
+from tap import Tap
 
 from firmware.motors.can.ip import CanIP
-from firmware.motors.model import Model
-from firmware.motors.motor import Motors
+from firmware.motors.motor import BionicMotors, RobstrideMotors
+from firmware.robot.config import load_robot_config
 
 
-async def main() -> None:
-    # motors = Model.motor_ids
-    motors = Model.left_leg.motor_ids + Model.right_leg.motor_ids
+class ArgumentParser(Tap):
+    config: str = str(Path(__file__).parents[1] / "robot" / "config.yaml")  # The robot config file.
+    setup: str = "full_body"  # The setup of the robot in the config.
+    parts: List[str] = ["left_leg", "right_leg"]  # The body parts whose motors are zeroed.
 
-    async with Motors(CanIP("can0")) as motor:
-        # for i in motors:
-        #     await motor.write_multi_turn_encoder_zero_offset(i)
-        #     await asyncio.sleep(0.1)
 
-        # for i in motors:
-        #     await motor.reset(i)
-        #     await asyncio.sleep(0.1)
+async def zero_bus(motor_type: str, canbus_id: int, host_can_id: int, motor_ids: List[int]) -> None:
+    if motor_type == "bionic":
+        async with BionicMotors(CanIP(f"can{canbus_id}")) as bionic:
+            for motor_id in motor_ids:
+                await bionic.set_zero_position(motor_id)
+                await asyncio.sleep(0.1)
+    elif motor_type == "robstride":
+        async with RobstrideMotors(CanIP(f"can{canbus_id}"), host_can_id=host_can_id) as robstride:
+            for motor_id in motor_ids:
+                await robstride.zero_pos(motor_id)
+    else:
+        raise ValueError(f"Unsupported motor type: {motor_type}")
+    print(f"Zeroed motors {motor_ids} on can{canbus_id}")
+
+
+async def main() -> None:
+    args = ArgumentParser().parse_args()
+    config = load_robot_config(args.config, args.setup)
 
-        # for i in motors:
-        #     print(i, await motor.read_multi_turn_angle(i))
-        #     await asyncio.sleep(0.1)
+    buses: Dict[int, List[int]] = {}
+    for part in args.parts:
+        for joint in config.part_joints(part):
+            buses.setdefault(joint.canbus_id, []).append(joint.motor_id)
 
-        for i in motors:
-            await motor.set_relative_position(i, 0)
+    await asyncio.gather(
+        *(
+            zero_bus(config.motor_type, canbus_id, config.host_can_id, motor_ids)
+            for canbus_id, motor_ids in buses.items()
+        )
+    )
 
 
 if __name__ == "__main__":
+    # python -m firmware.scripts.write_current_positions_as_zero
     asyncio.run(main())
@@ -214,5 +214,13 @@ setup(
         "console_scripts": [
             "motor-cli = firmware.scripts.single_motor:cli_entry_point",
         ],
+        "firmware.motors": [
+            "bionic = firmware.bionic_motors.motors:create_motor",
+            "robstride = firmware.robstride_motors.motors:create_motor",
+        ],
+        "firmware.motor_interfaces": [
+            "bionic = firmware.bionic_motors.motors:create_interface",
+            "robstride = firmware.robstride_motors.motors:create_interface",
+        ],
     },
 )
@@ -0,0 +1,81 @@
+"""Tests the encoders for the bionic motor commands."""
+
+import random
+from typing import Literal, Tuple
+
+import numpy as np
+
+from firmware.bionic_motors import commands
+from firmware.bionic_motors.batch import force_position_hybrid_control_batch
+from firmware.bionic_motors.commands import force_position_hybrid_control
+
+MESSAGE_RETURNS: Tuple[Literal[0, 1, 2, 3], ...] = (0, 1, 2, 3)
+
+
+def test_force_position_hybrid_control_batch_matches_scalar() -> None:
+    rng = np.random.default_rng(1337)
+    n = 1000
+    kp = rng.uniform(-10.0, 600.0, n)
+    kd = rng.uniform(-1.0, 6.0, n)
+    position = rng.uniform(-1000.0, 1000.0, n)
+    speed = rng.uniform(-40.0, 40.0, n)
+    torque = rng.uniform(-200.0, 200.0, n)
+    # Includes the positions at the ends of the range, where the 16-bit field wraps around.
+    position[:4] = [0.0, 716.2, -716.2, 716.197243913529]
+
+    payloads = force_position_hybrid_control_batch(kp, kd, position, speed, torque)
+
+    assert payloads.shape == (n, 8) and payloads.dtype == np.uint8
+    for i in range(n):
+        expected = bytes(force_position_hybrid_control(kp[i], kd[i], position[i], speed[i], torque[i]))
+        assert payloads[i].tobytes() == expected
+
+
+def test_force_position_hybrid_control_batch_broadcasts_gains() -> None:
+    payloads = force_position_hybrid_control_batch(100, 4, [10.0, -20.0], 0, 0)
+    assert payloads[0].tobytes() == bytes(force_position_hybrid_control(100, 4, 10.0, 0, 0))
+    assert payloads[1].tobytes() == bytes(force_position_hybrid_control(100, 4, -20.0, 0, 0))
+
+
+def test_struct_encoders_match_builders() -> None:
+    rng = random.Random(1337)
+    buffer = bytearray(8)
+    for _ in range(1000):
+        kp, kd = rng.uniform(0.0, 500.0), rng.uniform(0.0, 5.0)
+        position, speed, torque = rng.uniform(-800.0, 800.0), rng.uniform(-20.0, 20.0), rng.randint(-160, 160)
+        commands.force_position_hybrid_control_into(buffer, 0, kp, kd, position, speed=speed, torque_ff=torque)
+        assert bytes(buffer) == bytes(commands.force_position_hybrid_control(kp, kd, position, speed, torque))
+
+        max_speed, max_current = rng.uniform(0.0, 3000.0), rng.uniform(0.0, 400.0)
+        message_return = rng.choice(MESSAGE_RETURNS)
+        commands.set_position_control_into(
+            buffer,
+            0,
+            position,
+            motor_mode=1,
+            max_speed=max_speed,
+            max_current=max_current,
+            message_return=message_return,
+        )
+        expected = commands.set_position_control(1, position, 1, max_speed, max_current, message_return)
+        assert bytes(buffer) == bytes(expected)
+
+        commands.set_speed_control_into(
+            buffer, 0, speed, motor_mode=2, current=max_current, message_return=message_return
+        )
+        assert bytes(buffer[:7]) == bytes(commands.set_speed_control(1, speed, 2, max_current, message_return))
+
+        current = rng.randint(-3000, 3000)
+        commands.set_current_torque_control_into(
+            buffer, 0, current, control_status=1, motor_mode=3, message_return=message_return
+        )
+        assert bytes(buffer[:3]) == bytes(commands.set_current_torque_control(1, current, 1, 3, message_return))
+
+        motor_id = rng.randint(0, 0xFFFF)
+        commands.set_zero_position_into(buffer, 0, motor_id)
+        assert bytes(buffer[:4]) == bytes(commands.set_zero_position(motor_id))
+
+    assert commands.MOTOR_POS_QUERY == bytes(commands.get_motor_pos())
+    assert commands.MOTOR_SPEED_QUERY == bytes(commands.get_motor_speed(1))
+    assert commands.MOTOR_CURRENT_QUERY == bytes(commands.get_motor_current())
+    assert commands.MOTOR_POWER_QUERY == bytes(commands.get_motor_power())
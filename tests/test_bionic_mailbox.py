@@ -0,0 +1,133 @@
+"""Tests the response mailbox for the bionic motors."""
+
+import struct
+import threading
+import time
+from typing import List
+
+import can
+
+from firmware.bionic_motors.mailbox import QUERY_ANGLE, QUERY_SPEED, ResponseMailbox
+from firmware.bionic_motors.motors import BionicMotor, CANInterface, CanMessage, ControlParams
+from firmware.bionic_motors.responses import PositionResponse, Response
+
+
+def _query_response(motor_id: int, query_code: int, value: float) -> can.Message:
+    data = bytes([5 << 5, query_code]) + struct.pack("!f", value)
+    return can.Message(arbitration_id=motor_id, data=data, is_extended_id=False)
+
+
+def test_mailbox_latest() -> None:
+    mailbox = ResponseMailbox(maxlen=2)
+    assert mailbox.latest(1, QUERY_ANGLE) is None
+
+    since = mailbox.count(1, QUERY_ANGLE)
+    for value in (1.0, 2.0, 3.0):
+        mailbox.on_message_received(_query_response(1, QUERY_ANGLE, value))
+    mailbox.on_message_received(_query_response(2, QUERY_ANGLE, 4.0))
+    mailbox.on_message_received(_query_response(1, QUERY_SPEED, 5.0))
+
+    latest = mailbox.latest(1, QUERY_ANGLE, since)
+    assert latest is not None and latest.data == 3.0
+    assert mailbox.count(1, QUERY_ANGLE) == 3
+    assert mailbox.latest(1, QUERY_ANGLE, mailbox.count(1, QUERY_ANGLE)) is None
+
+    other = mailbox.latest(2, QUERY_ANGLE)
+    assert other is not None and other.data == 4.0
+    speed = mailbox.latest(1, QUERY_SPEED)
+    assert speed is not None and speed.data == 5.0
+
+
+def test_mailbox_ignores_invalid_frames() -> None:
+    mailbox = ResponseMailbox()
+    mailbox.on_message_received(can.Message(arbitration_id=1, data=bytes(8), is_extended_id=False))
+    assert mailbox.count(1, 0) == 0
+
+
+def test_mailbox_wait_for_returns_early() -> None:
+    mailbox = ResponseMailbox()
+    expected = {(1, QUERY_ANGLE): mailbox.count(1, QUERY_ANGLE), (2, QUERY_ANGLE): mailbox.count(2, QUERY_ANGLE)}
+
+    def reply() -> None:
+        mailbox.on_message_received(_query_response(1, QUERY_ANGLE, 1.0))
+        mailbox.on_message_received(_query_response(2, QUERY_ANGLE, 2.0))
+
+    timer = threading.Timer(0.01, reply)
+    timer.start()
+    start = time.monotonic()
+    assert mailbox.wait_for(expected, timeout=5.0) == []
+    assert time.monotonic() - start < 1.0
+    timer.join()
+
+    assert mailbox.wait_for({(3, QUERY_ANGLE): 0}, timeout=0.01) == [(3, QUERY_ANGLE)]
+
+
+def test_mailbox_hands_automatic_replies_to_handler() -> None:
+    mailbox = ResponseMailbox()
+    replies: List[Response] = []
+    mailbox.subscribe(1, replies.append)
+
+    # Type 2 reply: position 12.5 degrees, current 1.5 A, temperature 60 C.
+    data = bytes([2 << 5]) + struct.pack("!fHB", 12.5, 15, 170)
+    mailbox.on_message_received(can.Message(arbitration_id=1, data=data, is_extended_id=False))
+    mailbox.on_message_received(can.Message(arbitration_id=2, data=data, is_extended_id=False))
+
+    assert replies == [PositionResponse(0, 12.5, 1.5, 60.0)]
+    assert mailbox.count(1, QUERY_ANGLE) == 0
+
+    mailbox.subscribe(1, None)
+    mailbox.on_message_received(can.Message(arbitration_id=1, data=data, is_extended_id=False))
+    assert len(replies) == 1
+
+
+def test_mailbox_survives_short_frames_and_failing_handlers() -> None:
+    mailbox = ResponseMailbox()
+    replies: List[Response] = []
+
+    def handler(reply: Response) -> None:
+        replies.append(reply)
+        if len(replies) == 1:
+            raise RuntimeError("handler failed")
+
+    mailbox.subscribe(1, handler)
+    data = bytes([2 << 5]) + struct.pack("!fHB", 12.5, 15, 170)
+    for frame in (data[:5], bytes([5 << 5, QUERY_ANGLE, 0]), data, data):
+        mailbox.on_message_received(can.Message(arbitration_id=1, data=frame, is_extended_id=False))
+
+    assert len(replies) == 2
+    assert mailbox.count(1, QUERY_ANGLE) == 0
+    mailbox.on_message_received(_query_response(1, QUERY_ANGLE, 1.0))
+    assert mailbox.count(1, QUERY_ANGLE) == 1
+
+
+def test_automatic_replies_go_stale() -> None:
+    mailbox = ResponseMailbox()
+    can_bus = CANInterface(bus=None, channel=None, bustype=None, mailbox=mailbox)  # type: ignore[arg-type]
+    motor = BionicMotor(1, ControlParams(kp=10, kd=1), can_bus, message_return=2, initialize=False)
+    assert not motor.position_fresh()
+
+    data = bytes([2 << 5]) + struct.pack("!fHB", 12.5, 15, 170)
+    mailbox.on_message_received(can.Message(arbitration_id=1, data=data, is_extended_id=False))
+    assert motor.position_fresh()
+    assert motor.position == 12.5
+    assert not motor.speed_fresh()
+
+    time.sleep(0.02)
+    assert not motor.position_fresh(max_age=0.01)
+    assert motor.position_fresh(max_age=1.0)
+
+
+def test_fallback_read_clears_the_frames_before_the_reply() -> None:
+    bus = can.Bus(interface="virtual", channel="bionic-fallback-test")
+    try:
+        can_bus = CANInterface(bus=bus, channel=can.BufferedReader(), bustype=None)  # type: ignore[arg-type]
+        motor = BionicMotor(1, ControlParams(kp=10, kd=1), can_bus, initialize=False)
+        reply = {"Message Type": 5, "Data": 12.5}
+        BionicMotor.can_messages[:] = [CanMessage(2, reply), CanMessage(3, reply), CanMessage(1, reply)]
+
+        motor.update_position(wait_time=0.0)
+        assert motor.position == 12.5
+        assert BionicMotor.can_messages == []
+    finally:
+        BionicMotor.can_messages.clear()
+        bus.shutdown()
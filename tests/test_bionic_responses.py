@@ -0,0 +1,20 @@
+"""Tests the response decoders for the bionic motors."""
+
+import struct
+
+from firmware.bionic_motors.responses import QueryResponse, decode, read_result
+
+
+def test_decode_query_response() -> None:
+    msg = bytes([5 << 5 | 2, 1]) + struct.pack("!f", 12.5)
+
+    record = decode(msg)
+    assert record == QueryResponse(error=2, query_code=1, data=12.5)
+    assert record is not None and record.message_type == 5
+    assert read_result(msg) == {"Message Type": 5, "Error": "Motor Overcurrent", "Query Code": "Angle", "Data": 12.5}
+
+
+def test_decode_invalid_message_type() -> None:
+    assert decode(bytes([0, 0, 0, 0, 0, 0])) is None
+    assert decode(bytes([7 << 5, 0, 0, 0, 0, 0])) is None
+    assert read_result(bytes([6 << 5, 0, 0, 0, 0, 0])) is None
@@ -0,0 +1,97 @@
+"""Tests the deadlines, overrun policies and statistics of the control loop."""
+
+from typing import List, Optional
+
+import pytest
+
+from firmware.robot.control_loop import ControlLoop, OverrunPolicy
+
+# Powers of two keep the simulated times exact.
+RATE = 4.0
+PERIOD = 0.25
+
+
+class FakeClock:
+    """A monotonic clock which only advances when slept on or when a phase does work."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: List[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_loop(clock: FakeClock, work: List[float], policy: OverrunPolicy, reads: List[float]) -> ControlLoop:
+    ticks = iter(work)
+
+    def read() -> float:
+        reads.append(clock.now)
+        return clock.now
+
+    def write(_: Optional[float]) -> None:
+        clock.now += next(ticks, 0.0)
+
+    return ControlLoop(RATE, read, write=write, overrun_policy=policy, clock=clock, sleep=clock.sleep)
+
+
+def test_time_spent_in_ticks_does_not_drift() -> None:
+    clock = FakeClock()
+    reads: List[float] = []
+    loop = make_loop(clock, [0.125] * 4, OverrunPolicy.Skip, reads)
+
+    stats = loop.run(ticks=4)
+
+    assert reads == [0.0, 0.25, 0.5, 0.75]
+    assert clock.sleeps == [0.125] * 3
+    assert (stats.ticks, stats.overruns, stats.skipped, stats.max_jitter) == (4, 0, 0, 0.0)
+    assert stats.max_tick_time == 0.125
+    assert stats.mean_phase_times["write"] == 0.125
+
+
+def test_skip_drops_missed_ticks() -> None:
+    clock = FakeClock()
+    reads: List[float] = []
+    loop = make_loop(clock, [0.0, 0.625], OverrunPolicy.Skip, reads)
+
+    stats = loop.run(ticks=4)
+
+    # The second tick ends at 0.875, so the ticks due at 0.5 and 0.75 are dropped.
+    assert reads == [0.0, 0.25, 1.0, 1.25]
+    assert (stats.overruns, stats.skipped, stats.max_jitter) == (1, 2, 0.0)
+    assert stats.max_tick_time == 0.625
+
+
+def test_catch_up_runs_missed_ticks_back_to_back() -> None:
+    clock = FakeClock()
+    reads: List[float] = []
+    loop = make_loop(clock, [0.0, 0.625], OverrunPolicy.CatchUp, reads)
+
+    stats = loop.run(ticks=4)
+
+    assert reads == [0.0, 0.25, 0.875, 0.875]
+    assert (stats.overruns, stats.skipped) == (2, 0)
+    assert stats.max_jitter == 0.375
+    jitters = [0.0, 0.0, 0.375, 0.125]
+    assert stats.mean_jitter == pytest.approx(0.125)
+    assert stats.std_jitter == pytest.approx((sum((jitter - 0.125) ** 2 for jitter in jitters) / 4) ** 0.5)
+
+
+def test_run_stops_after_duration_or_stop() -> None:
+    clock = FakeClock()
+    reads: List[float] = []
+    assert make_loop(clock, [], OverrunPolicy.Skip, reads).run(duration=1.0).ticks == 4
+    assert reads == [0.0, 0.25, 0.5, 0.75]
+
+    loop = ControlLoop(RATE, clock=clock, sleep=clock.sleep)
+    loop.write = lambda _: loop.stop()
+    assert loop.run().ticks == 1
+
+
+def test_rate_must_be_positive() -> None:
+    with pytest.raises(ValueError, match="must be positive"):
+        ControlLoop(0.0)
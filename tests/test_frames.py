@@ -0,0 +1,80 @@
+"""Tests sending preallocated CAN frames."""
+
+import errno
+import socket
+from typing import List, Optional
+
+import can
+import pytest
+
+from firmware.motor_utils.bus_pool import BusPool, send_raw
+from firmware.motor_utils.frames import FrameBuffer
+
+
+class FlakySocket:
+    def __init__(self, failures: List[int]) -> None:
+        self.failures = failures
+        self.sent: List[bytes] = []
+        self._sock, self._peer = socket.socketpair()
+
+    def fileno(self) -> int:
+        return self._sock.fileno()
+
+    def send(self, frame: bytes) -> int:
+        if self.failures:
+            code = self.failures.pop(0)
+            raise OSError(code, errno.errorcode[code])
+        self.sent.append(bytes(frame))
+        return len(frame)
+
+
+def test_send_raw_retries_full_queue() -> None:
+    sock = FlakySocket([errno.ENOBUFS, errno.ENOBUFS])
+    send_raw(sock, b"frame")  # type: ignore[arg-type]
+    assert sock.sent == [b"frame"]
+
+    with pytest.raises(can.CanOperationError):
+        send_raw(FlakySocket([errno.EIO]), b"frame")  # type: ignore[arg-type]
+    with pytest.raises(can.CanOperationError):
+        send_raw(FlakySocket([errno.ENOBUFS] * 1000), b"frame", timeout=0.002)  # type: ignore[arg-type]
+
+
+def test_frames_on_shared_channels_are_written_in_place() -> None:
+    pool = BusPool("virtual")
+    receiver = can.interface.Bus(channel="frames-test", interface="virtual")
+    try:
+        frame = FrameBuffer(0x12, length=2)
+        view = pool.view("frames-test")
+        channel = view.shared
+        sent: List[can.Message] = []
+        bus_send = channel.bus.send
+
+        def send(msg: can.Message, timeout: Optional[float] = None) -> None:
+            sent.append(msg)
+            bus_send(msg, timeout)
+
+        channel.bus.send = send  # type: ignore[method-assign]
+
+        frame.data[:] = b"\x01\x02"
+        frame.send(view)
+        # Patching the frame again must not change the frame already sent.
+        frame.data[:] = b"\x03\x04"
+        frame.send(view)
+
+        received = [receiver.recv(1.0), receiver.recv(1.0)]
+        assert [bytes(msg.data) for msg in received if msg is not None] == [b"\x01\x02", b"\x03\x04"]
+        assert all(msg is not None and msg.arbitration_id == 0x12 for msg in received)
+        # The preallocated message is sent from the calling thread, nothing is built or queued per frame.
+        assert len(sent) == 2 and all(msg is frame.message for msg in sent)
+        assert channel._tx_queue.empty()
+
+        # With a raw socket, the buffer itself is written to it.
+        channel.raw_socket, peer = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        with channel.raw_socket, peer:
+            frame.send(view)
+            assert peer.recv(64) == bytes(frame.buffer)
+            channel.raw_socket = None
+        assert channel._tx_queue.empty()
+    finally:
+        receiver.shutdown()
+        pool.shutdown()
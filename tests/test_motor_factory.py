@@ -0,0 +1,59 @@
+"""Tests the lazy motor backend registry."""
+
+import subprocess
+import sys
+from typing import Any, List, cast
+
+import pytest
+
+from firmware.motor_utils.motor_factory import BUILTIN_BACKENDS, BUILTIN_INTERFACE_FACTORIES, MotorFactory
+from firmware.motor_utils.motor_utils import MotorInterface
+from firmware.robot.config import compile_setup
+
+
+def test_backends_are_imported_on_first_use() -> None:
+    code = (
+        "import sys\n"
+        "from firmware.motor_utils.motor_factory import MotorFactory\n"
+        "assert 'firmware.robstride_motors.motors' not in sys.modules\n"
+        "MotorFactory.get_backend('bionic')\n"
+        "assert 'firmware.bionic_motors.motors' in sys.modules\n"
+        "assert 'firmware.robstride_motors.motors' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_registered_backend_creates_motors(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(MotorFactory, "_backends", dict(BUILTIN_BACKENDS))
+    monkeypatch.setattr(MotorFactory, "_interface_factories", dict(BUILTIN_INTERFACE_FACTORIES))
+    monkeypatch.setattr(MotorFactory, "_entry_points_scanned", True)
+    calls = []
+    motor = cast(MotorInterface, object())
+
+    def create(motor_id: int, control_params: Any, communication_interface: Any, **kwargs: Any) -> MotorInterface:
+        calls.append((motor_id, control_params, kwargs))
+        return motor
+
+    def create_interface(bus_pool: Any, canbus_id: int, motor_ids: List[int], host_can_id: int) -> Any:
+        return canbus_id, motor_ids
+
+    MotorFactory.register_backend("fake", create, create_interface)
+    assert MotorFactory.create_motor("fake", 3, {"kp": 1}, None, initialize=False) is motor
+    assert calls == [(3, {"kp": 1}, {"initialize": False, "control_mode": "position"})]
+    assert MotorFactory.get_interface_factory("fake")(None, 1, [3], 0xAA) == (1, [3])
+    assert MotorFactory.backends() == ["bionic", "fake", "robstride"]
+    with pytest.raises(ValueError, match="not recognized"):
+        MotorFactory.get_backend("missing")
+
+    # Setups of registered types compile, with their parameters left for the backend to check.
+    setup = {
+        "setup": "test",
+        "motor_type": "fake",
+        "delta_change": 1.0,
+        "params": [{"motor_id": "default", "gain": 2}],
+        "body_parts": {"left_arm": {"start_id": 3, "dof": 1}},
+        "motor_config": {"arm": {"signs": [1], "increments": [4], "maximum_values": [90], "offsets": [0]}},
+    }
+    assert compile_setup(setup).joint(3).params_dict == {"gain": 2}
+    with pytest.raises(ValueError, match="Unsupported motor type 'missing'"):
+        compile_setup({**setup, "motor_type": "missing"})
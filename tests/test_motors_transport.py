@@ -0,0 +1,50 @@
+"""Tests matching replies to requests in the asyncio CAN transport layer."""
+
+import asyncio
+from typing import Iterable, List
+
+import pytest
+
+from firmware.motors.can.base import CanFrame
+from firmware.motors.can.dry_run import CanDryRun
+from firmware.motors.motor import RobstrideMotors
+
+HOST_CAN_ID = 0xAA
+READ_PARAM = 17
+
+
+def _read_param_reply(motor_id: int, data: bytes) -> CanFrame:
+    return CanFrame((READ_PARAM << 24) | (motor_id << 8) | HOST_CAN_ID, data, True)
+
+
+def test_malformed_frames_do_not_stop_the_reader() -> None:
+    def responder(frame: CanFrame) -> Iterable[CanFrame]:
+        motor_id = frame.id & 0xFF
+        # A truncated reply first, then the real one: mechpos (0x7019) = 1.5.
+        yield _read_param_reply(motor_id, b"\x19")
+        yield _read_param_reply(motor_id, bytes.fromhex("19700000") + bytes.fromhex("0000c03f"))
+
+    async def run() -> List[int]:
+        async with RobstrideMotors(CanDryRun(responder), timeout=1.0, host_can_id=HOST_CAN_ID) as motors:
+            assert await motors.read_param(3, "mechpos") == 1.5
+            assert await motors.get_ids([3, 4], timeout=0.5) == [3, 4]
+            assert motors._pending == {}
+            return [frame.id & 0xFF for frame in motors.can.sent]
+
+    assert asyncio.run(run()) == [3, 3, 4]
+
+
+def test_transport_errors_fail_pending_requests() -> None:
+    class BrokenCan(CanDryRun):
+        async def recv(self) -> CanFrame:
+            await asyncio.sleep(0.01)
+            raise OSError("bus down")
+
+    async def run() -> None:
+        async with RobstrideMotors(BrokenCan(), timeout=5.0, host_can_id=HOST_CAN_ID) as motors:
+            with pytest.raises(OSError, match="bus down"):
+                await motors.read_param(3, "mechpos")
+            with pytest.raises(RuntimeError, match="stopped"):
+                await motors.read_param(3, "mechpos")
+
+    asyncio.run(run())
@@ -0,0 +1,116 @@
+"""Tests compiling and caching the robot config files."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+import firmware.robot.config as robot_config
+from firmware.robot.config import compile_config, load_config_file, load_robot_config
+
+CONFIG_DIR = Path(robot_config.__file__).parent
+
+
+@pytest.mark.parametrize("name", ["config.yaml", "teleop_configs.yaml"])
+def test_shipped_configs_compile(name: str) -> None:
+    setups = compile_config((CONFIG_DIR / name).read_text())
+
+    assert setups
+    for compiled in setups.values():
+        assert len(set(compiled.motor_ids)) == len(compiled.joints)
+        for part in compiled.parts:
+            assert [joint.part for joint in compiled.part_joints(part.name)] == [part.name] * part.dof
+
+
+def test_left_signs_are_reversed_and_params_merged(tmp_path: Path) -> None:
+    compiled = load_robot_config(str(CONFIG_DIR / "config.yaml"), "full_body", cache_dir=str(tmp_path))
+    left, right = compiled.part_joints("left_leg"), compiled.part_joints("right_leg")
+
+    assert [joint.sign for joint in left] == [-joint.sign for joint in right]
+    assert "motor_id" not in compiled.joint(left[0].motor_id).params_dict
+
+
+def test_compiled_file_is_cached_by_contents(tmp_path: Path) -> None:
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text((CONFIG_DIR / "config.yaml").read_text())
+    cache_dir = tmp_path / "cache"
+    robot_config._compiled.clear()
+
+    first = load_config_file(str(config_path), str(cache_dir))
+    assert load_config_file(str(config_path), str(cache_dir)) is first
+    assert len(os.listdir(cache_dir)) == 1
+
+    # A cold process reads the compiled file back instead of parsing the YAML.
+    robot_config._compiled.clear()
+    assert load_config_file(str(config_path), str(cache_dir)) == first
+
+    # A cache file which cannot be read is compiled again.
+    (cache_file,) = cache_dir.iterdir()
+    assert cache_file.suffix == ".json"
+    cache_file.write_text("{")
+    robot_config._compiled.clear()
+    assert load_config_file(str(config_path), str(cache_dir)) == first
+
+    config_path.write_text(config_path.read_text() + "\n# edited\n")
+    load_config_file(str(config_path), str(cache_dir))
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_invalid_setups_are_rejected() -> None:
+    text = """
+robots:
+  - setup: test
+    motor_type: bionic
+    delta_change: 1.0
+    params:
+      - motor_id: default
+        kp: 100
+        kd: 5
+    body_parts:
+      left_arm:
+        start_id: 1
+        dof: 2
+      right_arm:
+        start_id: 2
+        dof: 2
+    motor_config:
+      arm:
+        signs: [1, 1]
+        increments: [4, 4]
+        maximum_values: [90, 90]
+        offsets: [0, 0]
+"""
+    with pytest.raises(ValueError, match="Motor 2 on can0 is used by left_arm and right_arm"):
+        compile_config(text)
+    with pytest.raises(ValueError, match="Missing 'kd'"):
+        compile_config(text.replace("start_id: 2", "start_id: 3").replace("kd: 5", "ki: 5"))
+    with pytest.raises(ValueError, match="fewer than 3 values"):
+        compile_config(text.replace("dof: 2", "dof: 3", 1))
+
+
+def test_operation_mode_requires_gains() -> None:
+    gains = ["cur_kp", "cur_ki", "cur_fit_gain", "loc_kp", "spd_kp", "spd_ki", "spd_filt_gain"]
+    params = "\n".join(f"        {name}: 1.0" for name in ["limit_torque", "limit_spd", "limit_cur", *gains])
+    text = f"""
+robots:
+  - setup: test
+    motor_type: robstride
+    control_mode: position
+    delta_change: 1.0
+    params:
+      - motor_id: default
+{params}
+    body_parts:
+      left_leg:
+        start_id: 1
+        dof: 1
+    motor_config:
+      leg:
+        signs: [1]
+        increments: [4]
+        maximum_values: [90]
+        offsets: [0]
+"""
+    assert "kp" not in compile_config(text)["test"].joints[0].params_dict
+    with pytest.raises(ValueError, match="Missing 'kp'"):
+        compile_config(text.replace("control_mode: position", "control_mode: operation"))
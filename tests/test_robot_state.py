@@ -0,0 +1,19 @@
+"""Tests the array-backed whole-robot joint state."""
+
+from firmware.robot.state import RobotState
+
+
+def test_robot_state_applies_signs_in_joint_order() -> None:
+    state = RobotState([("right_leg", [16, 17], [-1, 1]), ("left_leg", [11], [1])])
+    position = state.position
+
+    state.set_joint(state.index[17], 0.5, 2.0, torque=1.0, temperature=30.0, errors=4, timestamp=10.0)
+    state.set_joint(state.index[16], 0.25, 1.0, torque=-1.0, temperature=31.0, errors=0, timestamp=11.0)
+
+    assert state.position is position
+    assert state.motor_ids.tolist() == [16, 17, 11]
+    assert state.position.tolist() == [-0.25, 0.5, 0.0]
+    assert state.torque.tolist() == [1.0, 1.0, 0.0]
+    assert state.errors.tolist() == [0, 4, 0]
+    assert state.age(12.0).tolist() == [1.0, 2.0, 12.0]
+    assert state.as_dict(state.velocity) == {"right_leg": [-1.0, 2.0], "left_leg": [0.0]}
@@ -0,0 +1,109 @@
+"""Tests matching the replies of Robstride motors to the requests of the client."""
+
+import struct
+import time
+from typing import Iterator, List, Tuple
+
+import can
+import pytest
+
+from firmware.robstride_motors.client import Client, FeedbackResp, MotorMsg, param_ids_by_name, wait_all
+
+MOTOR_ID = 11
+HOST_ID = 0xAA
+
+
+@pytest.fixture()
+def buses() -> Iterator[Tuple[Client, can.BusABC]]:
+    host = can.Bus(interface="virtual", channel="robstride-client-test")
+    motor = can.Bus(interface="virtual", channel="robstride-client-test")
+    yield Client(host, host_can_id=HOST_ID), motor
+    host.shutdown()
+    motor.shutdown()
+
+
+def feedback_frame(temp: float) -> can.Message:
+    # The temperature tells the frames apart, the other fields are left at zero.
+    data = struct.pack(">HHHH", 0, 0, 0, int(temp * 10))
+    arbitration_id = (MotorMsg.Feedback.value << 24) | (MOTOR_ID << 8) | HOST_ID
+    return can.Message(arbitration_id=arbitration_id, data=data, is_extended_id=True)
+
+
+def read_param_frame(param_id: int, value: float) -> can.Message:
+    arbitration_id = (MotorMsg.ReadParam.value << 24) | (MOTOR_ID << 8) | HOST_ID
+    return can.Message(arbitration_id=arbitration_id, data=struct.pack("<HHf", param_id, 0, value), is_extended_id=True)
+
+
+def test_control_replies_are_not_taken_as_acknowledgements(buses: Tuple[Client, can.BusABC]) -> None:
+    client, motor = buses
+    handled: List[FeedbackResp] = []
+    client.feedback_handlers[MOTOR_ID] = handled.append
+
+    client.use_control_mode(MOTOR_ID, 0.0, 0.0, 0.5, 10.0, 1.0)
+    future = client.submit_write_param(MOTOR_ID, "limit_spd", 2.0)
+    motor.send(feedback_frame(20.0))
+    motor.send(feedback_frame(30.0))
+
+    assert client.wait([future], timeout=1.0)
+    assert future.result().temp == 30.0
+    assert [feedback.temp for feedback in handled] == [20.0]
+    assert client.in_flight == 0
+
+
+def test_lost_control_reply_is_given_up_on(buses: Tuple[Client, can.BusABC]) -> None:
+    client, motor = buses
+
+    client.use_control_mode(MOTOR_ID, 0.0, 0.0, 0.5, 10.0, 1.0)
+    future = client.submit_write_param(MOTOR_ID, "limit_spd", 2.0)
+    motor.send(feedback_frame(30.0))
+    assert not client.wait([future], timeout=0.05)
+    assert client.in_flight == 0
+
+    future = client.submit_write_param(MOTOR_ID, "limit_spd", 2.0)
+    motor.send(feedback_frame(31.0))
+    assert client.wait([future], timeout=1.0)
+    assert future.result().temp == 31.0
+
+
+def test_reports_are_not_taken_as_acknowledgements(buses: Tuple[Client, can.BusABC]) -> None:
+    client, motor = buses
+    client.set_active_report(MOTOR_ID, True)
+
+    future = client.submit_write_param(MOTOR_ID, "limit_spd", 2.0)
+    motor.send(feedback_frame(20.0))
+    motor.send(feedback_frame(21.0))
+    assert client.poll(0.1) == 0
+    assert not future.done()
+
+    # The write is confirmed by the value read back, and resolves to the latest report.
+    motor.send(read_param_frame(param_ids_by_name["limit_spd"], 2.0))
+    assert client.wait([future], timeout=1.0)
+    assert future.result().temp == 21.0
+
+    future = client.submit_write_param(MOTOR_ID, "limit_spd", 3.0)
+    motor.send(read_param_frame(param_ids_by_name["limit_spd"], 2.0))
+    assert client.wait([future], timeout=1.0)
+    with pytest.raises(Exception, match="did not take the write"):
+        future.result()
+
+    with pytest.raises(Exception, match="active reports"):
+        client.enable(MOTOR_ID)
+
+
+def test_buses_are_waited_on_against_one_deadline(buses: Tuple[Client, can.BusABC]) -> None:
+    client, motor = buses
+    silent = can.Bus(interface="virtual", channel="robstride-client-silent")
+    try:
+        silent_client = Client(silent, host_can_id=HOST_ID)
+        lost = silent_client.submit_read_param(MOTOR_ID, "limit_spd")
+        answered = client.submit_read_param(MOTOR_ID, "limit_spd")
+        motor.send(read_param_frame(param_ids_by_name["limit_spd"], 2.0))
+
+        start = time.monotonic()
+        assert not wait_all({silent_client: [lost], client: [answered]}, timeout=0.1)
+        # The reply which arrived while the silent bus was waited on is still taken, without a wait of its own.
+        assert time.monotonic() - start < 0.15
+        assert answered.result() == 2.0
+        assert lost.cancelled()
+    finally:
+        silent.shutdown()
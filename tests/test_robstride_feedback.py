@@ -0,0 +1,31 @@
+"""Tests the batch decoder for the Robstride feedback frames."""
+
+import random
+
+from firmware.robstride_motors.batch import decode_feedback_batch
+from firmware.robstride_motors.client import parse_feedback
+
+
+def test_decode_feedback_batch_matches_scalar() -> None:
+    rng = random.Random(1337)
+    n = 500
+    aids = [
+        (2 << 24) | (rng.randint(0, 3) << 22) | (rng.randint(0, 31) << 16) | (rng.randint(1, 127) << 8) | 0xAA
+        for _ in range(n)
+    ]
+    payloads = [bytes(rng.randint(0, 255) for _ in range(8)) for _ in range(n)]
+    models = [rng.choice([1, 2]) for _ in range(n)]
+
+    feedback = decode_feedback_batch(aids, payloads, models)
+
+    for i, row in enumerate(feedback):
+        expected = parse_feedback(aids[i], payloads[i], (aids[i] >> 8) & 0xFF, models[i])
+        assert row["motor_id"] == expected.servo_id
+        assert row["errors"] == sum(error.value for error in expected.errors)
+        assert row["mode"] == expected.mode.value
+        assert (row["angle"], row["velocity"], row["torque"], row["temp"]) == (
+            expected.angle,
+            expected.velocity,
+            expected.torque,
+            expected.temp,
+        )
@@ -0,0 +1,49 @@
+"""Tests the latest-state table fed by the Robstride report stream."""
+
+import struct
+import time
+
+import can
+import pytest
+
+from firmware.robstride_motors.client import Client, FeedbackResp, MotorMode, MotorMsg
+from firmware.robstride_motors.stream import ReportStream, StateTable
+
+
+def test_state_table_keeps_latest_feedback() -> None:
+    table = StateTable([11, 12])
+    table.update(FeedbackResp(11, [], MotorMode.Run, 0.5, 1.0, 2.0, 30.0))
+    table.update(FeedbackResp(11, [], MotorMode.Run, 0.6, 1.1, 2.1, 31.0))
+    table.update(FeedbackResp(99, [], MotorMode.Run, 9.0, 9.0, 9.0, 99.0))
+
+    snapshot = table.read()
+    assert snapshot.motor_ids == [11, 12]
+    assert snapshot.angles.tolist() == [0.6, 0.0]
+    assert snapshot.temps.tolist() == [31.0, 0.0]
+    assert snapshot.sequences.tolist() == [2, 0]
+
+
+def test_report_stream_consumes_reports() -> None:
+    host = can.Bus(interface="virtual", channel="robstride-stream-test")
+    motor = can.Bus(interface="virtual", channel="robstride-stream-test")
+    client = Client(host, host_can_id=0xAA)
+    stream = ReportStream(client, [11, 12], poll_timeout=0.01)
+
+    with stream:
+        assert client.reporting == {11, 12}
+        with pytest.raises(Exception, match="report stream"):
+            client.get_motor_info(11)
+        for temp in (30.0, 31.0, 32.0):
+            data = struct.pack(">HHHH", 0, 0, 0, int(temp * 10))
+            motor.send(can.Message(arbitration_id=(MotorMsg.Feedback.value << 24) | (11 << 8) | 0xAA, data=data))
+        deadline = time.monotonic() + 1.0
+        while stream.read().sequences[0] < 3 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        snapshot = stream.read()
+
+    assert snapshot.sequences.tolist() == [3, 0]
+    assert snapshot.temps.tolist() == [32.0, 0.0]
+    assert client.consumer is None
+    assert not client.reporting
+    host.shutdown()
+    motor.shutdown()
@@ -0,0 +1,47 @@
+"""Tests the round-trip time tracker which sets the read windows."""
+
+import pytest
+
+from firmware.motor_utils.rtt import RttTracker
+
+
+def test_timeout_follows_percentile_within_bounds() -> None:
+    tracker = RttTracker(initial=0.005, minimum=0.001, maximum=0.02, margin=0.0005, min_samples=4)
+    assert tracker.timeout(1) == 0.005
+
+    for rtt in (0.0010, 0.0012, 0.0011, 0.0030):
+        tracker.record(1, rtt)
+    assert tracker.timeout(1) == pytest.approx(0.0035)
+
+    tracker.record(2, 1.0)
+    assert tracker.timeout(2) == 0.005
+    for _ in range(4):
+        tracker.record(2, 1.0)
+    assert tracker.timeout(2) == 0.02
+
+
+def test_misses_widen_the_timeout_until_the_next_reply() -> None:
+    tracker = RttTracker(initial=0.004, minimum=0.001, maximum=0.01)
+    tracker.record_miss(1)
+    assert tracker.timeout(1) == 0.008
+    tracker.record_miss(1)
+    assert tracker.timeout(1) == 0.01
+
+    tracker.record(1, 0.001)
+    stats = tracker.stats(1)
+    assert stats.timeout == 0.004
+    assert (stats.count, stats.misses) == (1, 2)
+    assert stats.p99 == stats.max == 0.001
+
+
+def test_old_samples_leave_the_window() -> None:
+    tracker = RttTracker(initial=0.005, minimum=0.0001, maximum=0.02, margin=0.0, window=4, min_samples=4)
+    for rtt in (0.004, 0.001, 0.003, 0.002):
+        tracker.record(1, rtt)
+    assert tracker.timeout(1) == 0.004
+
+    # The slowest sample is the oldest, so it is the first one dropped.
+    tracker.record(1, 0.001)
+    assert tracker.timeout(1) == 0.003
+    stats = tracker.stats(1)
+    assert (stats.p50, stats.max) == (0.001, 0.003)